@@ -1,8 +1,29 @@
+import importlib
+
 from fastapi import APIRouter
-from app.api.endpoints import auth, items, users, chatbot
+from app.core.config import settings
+
+# Feature name -> URL prefix. Each feature's router lives in
+# app.api.endpoints.<feature> and is imported only when settings.FEATURES lists it.
+ROUTERS = {
+    "auth": "/auth",
+    "items": "/items",
+    "users": "/users",
+    "swaps": "/swaps",
+    "wishlist": "/wishlist",
+    "notifications": "/notifications",
+    "exports": "/exports",
+    "activity": "/activity",
+    "feed": "/feed",
+    "chatbot": "/chatbot",
+}
+
+unknown = settings.FEATURES - ROUTERS.keys()
+if unknown:
+    raise ValueError(f"Unknown FEATURES {', '.join(sorted(unknown))}; choose from {', '.join(ROUTERS)}")
 
 api_router = APIRouter()
-api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
-api_router.include_router(items.router, prefix="/items", tags=["items"])
-api_router.include_router(users.router, prefix="/users", tags=["users"])
-api_router.include_router(chatbot.router, prefix="/chatbot", tags=["chatbot"])
\ No newline at end of file
+for feature, prefix in ROUTERS.items():
+    if feature in settings.FEATURES:
+        module = importlib.import_module(f"app.api.endpoints.{feature}")
+        api_router.include_router(module.router, prefix=prefix, tags=[feature])
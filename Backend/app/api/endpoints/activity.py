@@ -0,0 +1,57 @@
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+from app.crud import crud_activity
+from app.api.endpoints.auth import get_async_db, get_token_principal
+from app.services.activity import COMMUNITY
+
+router = APIRouter()
+
+PERIOD_QUERY = Query("day", pattern="^(day|week)$")
+SINCE_QUERY = Query(None, description="Only buckets starting on or after this date")
+
+async def _totals(db: AsyncSession, user_id: int):
+    return await crud_activity.get_totals_async(db, user_id) or schemas.ActivityTotals()
+
+@router.get("/me", response_model=schemas.ActivityTotals, summary="My activity and impact")
+async def read_my_activity(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    """
+    Items listed, swaps completed, points earned and the estimated CO2 and
+    water saved by the items received in swaps.
+    """
+    return await _totals(db, current_user.id)
+
+@router.get("/me/history", response_model=List[schemas.ActivityBucket], summary="My activity per day or week")
+async def read_my_activity_history(
+    period: str = PERIOD_QUERY,
+    since: Optional[date] = SINCE_QUERY,
+    limit: int = Query(30, ge=1, le=366),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    """
+    Newest first; days or weeks without activity are left out.
+    """
+    return await crud_activity.get_rollups_async(db, current_user.id, period, since=since, limit=limit)
+
+@router.get("/community", response_model=schemas.ActivityTotals, summary="Community activity and impact")
+async def read_community_activity(db: AsyncSession = Depends(get_async_db)):
+    """
+    The same figures as /me, for everyone together.
+    """
+    return await _totals(db, COMMUNITY)
+
+@router.get("/community/history", response_model=List[schemas.ActivityBucket], summary="Community activity per day or week")
+async def read_community_activity_history(
+    period: str = PERIOD_QUERY,
+    since: Optional[date] = SINCE_QUERY,
+    limit: int = Query(30, ge=1, le=366),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await crud_activity.get_rollups_async(db, COMMUNITY, period, since=since, limit=limit)
@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import timedelta
+import time
 from jose import JWTError, jwt
 
 from app import schemas, crud, models
 from app.core import security
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.core.principal_cache import principal_cache
+from app.db.session import AsyncSessionLocal, SessionLocal
 from app.crud import crud_user
+from app.services.password_hasher import PasswordHasherBusy, get_password_hasher
 
 router = APIRouter()
 
@@ -18,58 +22,139 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
-async def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> models.User:
+
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def decode_token(token: str) -> dict:
     """
-    Decodes the JWT token to get the username, then fetches the user from the DB.
-    This function will be used as a dependency in protected endpoints.
+    Verifies the JWT signature and expiry and returns its claims.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = schemas.TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    
-    user = crud_user.get_user_by_username(db, username=token_data.username)
+    if payload.get("sub") is None:
+        raise credentials_exception
+    return payload
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> schemas.Principal:
+    """
+    Decodes the JWT token to get the username, then resolves the user through
+    the principal cache, reading the DB only on a miss.
+    This function will be used as a dependency in protected endpoints.
+    """
+    token_data = schemas.TokenData(username=decode_token(token)["sub"])
+
+    started = time.perf_counter()
+    principal = principal_cache.get(token_data.username)
+    if principal is not None:
+        principal_cache.record(True, time.perf_counter() - started)
+        return principal
+
+    version = principal_cache.version(token_data.username)
+    user = await crud_user.get_user_by_username_async(db, username=token_data.username)
     if user is None:
         raise credentials_exception
-    return user
+    principal = schemas.Principal.model_validate(user)
+    principal_cache.set(token_data.username, version, principal)
+    principal_cache.record(False, time.perf_counter() - started)
+    return principal
+
+async def get_token_principal(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> schemas.Principal:
+    """
+    Fast path for routes that only need who the caller is: builds the principal
+    from the token's claims without any lookup. `points_balance` and
+    `is_admin` are the values when the token was issued, so they are for
+    display only; decisions that depend on them use get_current_user or
+    get_admin_principal. Tokens without these claims fall back to
+    get_current_user.
+    """
+    payload = decode_token(token)
+    if "uid" not in payload:
+        return await get_current_user(db=db, token=token)
+    return schemas.Principal(
+        id=payload["uid"],
+        username=payload["sub"],
+        is_admin=payload.get("adm", False),
+        points_balance=payload.get("pts", 0),
+    )
+
+async def get_admin_principal(
+    current_user: schemas.Principal = Depends(get_current_user)
+) -> schemas.Principal:
+    """
+    For admin-only routes. Checks the stored user rather than the token's
+    claim, so revoking admin rights takes effect before the token expires.
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
 
+def hasher_busy_error(exc: PasswordHasherBusy):
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=exc.detail,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 @router.post("/register", response_model=schemas.User)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.crud_user.get_user_by_email(db, email=user.email)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await crud_user.get_user_by_email_async(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.crud_user.create_user(db=db, user=user)
+    try:
+        hashed_password = await get_password_hasher().hash(user.password)
+    except PasswordHasherBusy as e:
+        raise hasher_busy_error(e)
+    return await crud_user.create_user_async(db=db, user=user, hashed_password=hashed_password)
 
 @router.post("/login", response_model=schemas.Token)
-def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
+async def login_for_access_token(db: AsyncSession = Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()):
     # Try to find user by email first, then by username
-    user = crud.crud_user.get_user_by_email(db, email=form_data.username)
+    user = await crud_user.get_user_by_email_async(db, email=form_data.username)
     if not user:
-        user = crud.crud_user.get_user_by_username(db, username=form_data.username)
-    
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+        user = await crud_user.get_user_by_username_async(db, username=form_data.username)
+
+    try:
+        valid, new_hash = await get_password_hasher().verify_and_update(
+            form_data.password, user.hashed_password if user else None
+        )
+    except PasswordHasherBusy as e:
+        raise hasher_busy_error(e)
+    if not user or not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made
+        await crud_user.update_password_hash_async(db, user, new_hash)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # Claims let read-only routes identify the caller without a user lookup
     access_token = security.create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={
+            "sub": user.username,
+            "uid": user.id,
+            "adm": bool(user.is_admin),
+            "pts": user.points_balance,
+        },
+        expires_delta=access_token_expires,
     )
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
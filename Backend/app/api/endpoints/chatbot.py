@@ -1,41 +1,67 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile
+from pydantic import BaseModel, Field
 from typing import Optional
-import os
+import asyncio
 import datetime
-from openai import OpenAI
-from textblob import TextBlob
-import speech_recognition as sr
-import tempfile
+import json
+import re
+import importlib
 import io
-from gtts import gTTS
 import base64
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from app.core.config import settings
+from app.core.instrumentation import traced
+from app.services.conversations import compact_history, get_conversation_store, new_session_id
+from app.services.llm_gateway import LLMGatewayBusy, get_llm_gateway
+from app.services.speech import AudioTooLarge, SpeechBusy, SpeechRecognitionFailed, get_speech_pipeline
+from app.services.response_cache import fingerprint, get_response_cache
+from app.services.sentiment import get_sentiment_analyzer, get_sentiment_log, start_sentiment
+from app.services.tts_cache import get_tts_cache
 
 router = APIRouter()
 
-# OpenRouter client configuration
-# Get API key from environment variable for security
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+# Imported by start_chatbot() when CHATBOT_PRELOAD is on, otherwise on first use
+HEAVY_MODULES = ("openai", "gtts", "speech_recognition")
 
-if not OPENROUTER_API_KEY:
-    raise ValueError("OPENROUTER_API_KEY not found in environment variables. Please check your .env file.")
+def check_api_key():
+    """
+    Loads .env and checks the OpenRouter API key, raising ValueError if it is
+    missing or malformed. Run from start_chatbot() so a bad key still stops
+    the app at startup, without making this module fail to import.
+    """
+    from dotenv import load_dotenv
 
-if OPENROUTER_API_KEY == "sk-or-v1-your-openrouter-key-here":
-    raise ValueError("Please replace the placeholder API key in your .env file with your actual OpenRouter API key from https://openrouter.ai/keys")
+    load_dotenv()
+    # Get API key from environment variable for security
+    api_key = settings.OPENROUTER_API_KEY
 
-if not OPENROUTER_API_KEY.startswith("sk-or-v1-"):
-    raise ValueError("Invalid OpenRouter API key format. The key should start with 'sk-or-v1-'. Please check your .env file.")
+    if not api_key:
+        raise ValueError("OPENROUTER_API_KEY not found in environment variables. Please check your .env file.")
 
-print(f"OpenRouter API key loaded: {OPENROUTER_API_KEY[:20]}..." + "*" * 20)  # Debug info (safe partial key display)
+    if api_key == "sk-or-v1-your-openrouter-key-here":
+        raise ValueError("Please replace the placeholder API key in your .env file with your actual OpenRouter API key from https://openrouter.ai/keys")
 
-client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
-    api_key=OPENROUTER_API_KEY,
-)
+    if not api_key.startswith("sk-or-v1-"):
+        raise ValueError("Invalid OpenRouter API key format. The key should start with 'sk-or-v1-'. Please check your .env file.")
+
+    print(f"OpenRouter API key loaded: {api_key[:20]}..." + "*" * 20)  # Debug info (safe partial key display)
+
+async def start_chatbot():
+    """
+    Startup hook for workers that serve the chatbot: checks the API key,
+    compiles the sentiment lexicon and, with CHATBOT_PRELOAD on, imports the
+    LLM and speech libraries off the event loop so the first chat request
+    does not pay for them.
+    """
+    check_api_key()
+    await start_sentiment()
+    if settings.CHATBOT_PRELOAD:
+        for name in HEAVY_MODULES:
+            await asyncio.to_thread(importlib.import_module, name)
+        get_llm_gateway()
 
 # System prompt
 SYSTEM_PROMPT = """
@@ -58,137 +84,393 @@ Also:
 Current date: {current_date}
 """
 
+SESSION_ID_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
+
+# Room for the multipart boundaries and session_id around the audio
+VOICE_FORM_OVERHEAD = 16 * 1024
+VOICE_FORM_SCHEMA = {
+    "type": "object",
+    "required": ["audio_file"],
+    "properties": {
+        "audio_file": {"type": "string", "format": "binary"},
+        "session_id": {"type": "string", "pattern": SESSION_ID_PATTERN},
+    },
+}
+
 class ChatRequest(BaseModel):
     message: str
+    # Continue a server-side conversation; omit to start a new one
+    session_id: Optional[str] = Field(None, pattern=SESSION_ID_PATTERN)
+    # Legacy: full client-side history, only used when no session_id is sent
     conversation_history: list = []
+    # Also embed the audio as base64; by default only audio_url is returned
+    inline_audio: bool = False
 
 class ChatResponse(BaseModel):
     response: str
+    session_id: Optional[str] = None
+    user_message: Optional[str] = None
+    audio_url: Optional[str] = None
     audio_base64: Optional[str] = None
     sentiment: str
 
 class ReWearBot:
-    def __init__(self):
-        self.conversation_history = []
-        self.initialize_conversation()
-
-    def initialize_conversation(self):
-        current_date = datetime.datetime.now().strftime("%B %d, %Y")
-        self.conversation_history = [
-            {"role": "system", "content": SYSTEM_PROMPT.format(current_date=current_date)}
-        ]
-
-    def get_response(self, user_input, conversation_history=None):
-        # Use provided conversation history or default
-        if conversation_history:
-            messages = [{"role": "system", "content": SYSTEM_PROMPT.format(current_date=datetime.datetime.now().strftime("%B %d, %Y"))}] + conversation_history
-        else:
-            messages = self.conversation_history + [{"role": "user", "content": user_input}]
-        
+    def __init__(self, gateway=None):
+        self._gateway = gateway
+        self._system_date = None
+        self._system_message = None
+
+    @property
+    def gateway(self):
+        return self._gateway or get_llm_gateway()
+
+    def system_message(self):
+        """The system prompt, rebuilt only when the date changes"""
+        current_date = datetime.date.today().strftime("%B %d, %Y")
+        if current_date != self._system_date:
+            self._system_message = {"role": "system", "content": SYSTEM_PROMPT.format(current_date=current_date)}
+            self._system_date = current_date
+        return self._system_message
+
+    @property
+    def response_cache(self):
+        return get_response_cache() if settings.RESPONSE_CACHE_MAX_ENTRIES > 0 else None
+
+    @property
+    def cache_namespace(self):
+        # Cached answers are dropped whenever the prompt or model changes
+        return fingerprint(SYSTEM_PROMPT, self.gateway.model)
+
+    def build_messages(self, user_input, conversation_history=None):
+        history = list(conversation_history or [])
+        return [self.system_message()] + history + [{"role": "user", "content": user_input}]
+
+    @traced("chatbot.get_response")
+    async def get_response(self, user_input, conversation_history=None):
+        cache = self.response_cache
+        if cache is not None:
+            cached = cache.get(user_input, conversation_history, self.cache_namespace)
+            if cached is not None:
+                return cached
+        messages = self.build_messages(user_input, conversation_history)
         try:
-            response = client.chat.completions.create(
-                model="google/gemini-2.5-flash-preview-04-17",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=1024,
-            )
-            ai_message = response.choices[0].message.content
+            ai_message = await self.gateway.complete(messages, temperature=0.7, max_tokens=1024)
+            if ai_message and cache is not None:
+                cache.set(user_input, conversation_history, self.cache_namespace, ai_message)
             return ai_message if ai_message else "Sorry, I couldn't generate a response."
+        except LLMGatewayBusy:
+            raise
         except Exception as e:
             return f"Sorry, I'm having trouble connecting right now. Error: {str(e)}"
 
-def get_sentiment(text):
-    blob = TextBlob(text)
-    sentiment = blob.sentiment.polarity
-    if sentiment > 0.1:
-        return "positive"
-    elif sentiment < -0.1:
-        return "negative"
-    else:
-        return "neutral"
+    async def stream_response(self, user_input, conversation_history=None):
+        """Yield the reply text in chunks as the model produces them"""
+        cache = self.response_cache
+        if cache is not None:
+            cached = cache.get(user_input, conversation_history, self.cache_namespace)
+            if cached is not None:
+                yield cached
+                return
+        messages = self.build_messages(user_input, conversation_history)
+        chunks = []
+        async for text in self.gateway.stream(messages, temperature=0.7, max_tokens=1024):
+            chunks.append(text)
+            yield text
+        if chunks and cache is not None:
+            cache.set(user_input, conversation_history, self.cache_namespace, "".join(chunks))
 
-def text_to_audio_base64(text, lang="en"):
-    """Convert text to audio and return as base64 string"""
+# One shared bot for all requests; outbound calls are pooled and limited by the LLM gateway
+bot = ReWearBot()
+
+def get_sentiment(text, session_id=None):
+    """
+    Label a message positive, negative or neutral (memoised, a few
+    microseconds), queueing it for the sentiment log when that is on.
+    """
+    polarity, label = get_sentiment_analyzer().score(text)
+    log = get_sentiment_log()
+    if log is not None:
+        log.record(session_id, polarity, label)
+    return label
+
+@traced("chatbot.text_to_audio")
+def text_to_audio(text, lang="en"):
+    """Convert text to audio, reusing cached audio; returns (audio_hash, mp3 bytes)"""
     try:
-        tts = gTTS(text=text, lang=lang)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-            tts.save(temp_file.name)
-            with open(temp_file.name, "rb") as f:
-                audio_data = f.read()
-            os.unlink(temp_file.name)
-        return base64.b64encode(audio_data).decode('utf-8')
+        return get_tts_cache().get_or_create(text, lang=lang)
     except Exception as e:
         print(f"Audio generation failed: {e}")
+        return None, None
+
+def audio_fields(http_request, audio_hash, audio_data, inline_audio):
+    """Response fields pointing at the cached audio, optionally with it inlined"""
+    if audio_hash is None:
+        return {"audio_url": None, "audio_base64": None}
+    return {
+        "audio_url": str(http_request.url_for("get_chatbot_audio", audio_hash=audio_hash)),
+        "audio_base64": base64.b64encode(audio_data).decode('utf-8') if inline_audio else None,
+    }
+
+class RangeNotSatisfiable(Exception):
+    """A well-formed byte range that lies entirely past the end of the content"""
+
+def parse_byte_range(range_header, size):
+    """
+    Parse a single `bytes=start-end` range; returns inclusive (start, end), or
+    None when the header should be ignored and the whole body served (it is
+    malformed, or asks for several ranges). Raises RangeNotSatisfiable when
+    no byte of the range exists (RFC 7233 4.4).
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start == "":
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(start)
+    if end and int(end) < start:
         return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    end = min(int(end), size - 1) if end else size - 1
+    return start, end
 
-def speech_to_text(audio_file):
-    """Convert speech to text using speech recognition"""
+@traced("chatbot.speech_to_text")
+async def speech_to_text(audio_file):
+    """Convert speech to text in the bounded speech worker pool"""
     try:
-        recognizer = sr.Recognizer()
-        
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-            temp_file.write(audio_file.file.read())
-            temp_file_path = temp_file.name
-        
-        with sr.AudioFile(temp_file_path) as source:
-            audio = recognizer.record(source)
-            text = recognizer.recognize_google(audio)
-        
-        os.unlink(temp_file_path)
-        return text
-    except Exception as e:
+        return await get_speech_pipeline().transcribe_upload(audio_file)
+    except AudioTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except SpeechBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except SpeechRecognitionFailed as e:
         raise HTTPException(status_code=400, detail=f"Speech recognition failed: {str(e)}")
 
+async def read_voice_form(request: Request):
+    """
+    Read the voice-chat form with a running byte count before parsing it, so
+    an oversized upload is refused before it is spooled. Returns the audio
+    upload and the session id, if any.
+    """
+    try:
+        body = await get_speech_pipeline().read_stream(
+            request.stream(), request.headers.get("content-length"), overhead=VOICE_FORM_OVERHEAD
+        )
+    except AudioTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    form = await Request(request.scope, receive).form(max_files=1, max_fields=4)
+    audio_file, session_id = form.get("audio_file"), form.get("session_id") or None
+    if not isinstance(audio_file, UploadFile):
+        raise HTTPException(status_code=422, detail="audio_file is required")
+    if session_id is not None and not (isinstance(session_id, str) and re.fullmatch(SESSION_ID_PATTERN, session_id)):
+        raise HTTPException(status_code=422, detail="session_id is not a valid session id")
+    return audio_file, session_id
+
+async def load_history(session_id, conversation_history=None):
+    """
+    Resolve the conversation for a request. Returns the session id (a new one
+    if none was sent) and the stored history trimmed to the token budget.
+    """
+    store = get_conversation_store()
+    if session_id is None:
+        session_id = new_session_id()
+        history = list(conversation_history or [])
+        if history:
+            await store.append(session_id, history)
+    else:
+        history = await store.load(session_id)
+    return session_id, compact_history(history, settings.CONVERSATION_TOKEN_BUDGET)
+
+async def save_turn(session_id, user_message, response):
+    await get_conversation_store().append(session_id, [
+        {"role": "user", "content": user_message},
+        {"role": "assistant", "content": response},
+    ])
+
+def busy_error(exc):
+    """Turn gateway back-pressure into a fast 429/503 response"""
+    return HTTPException(
+        status_code=exc.status_code,
+        detail=exc.detail,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+def format_sse(event, data):
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @router.post("/chat", response_model=ChatResponse)
-async def chat_with_bot(request: ChatRequest):
+async def chat_with_bot(request: ChatRequest, http_request: Request):
     """Handle text-based chat requests"""
     try:
-        bot = ReWearBot()
-        
-        # Get sentiment
-        sentiment = get_sentiment(request.message)
-        
         # Get bot response
-        response = bot.get_response(request.message, request.conversation_history)
+        session_id, history = await load_history(request.session_id, request.conversation_history)
+        sentiment = get_sentiment(request.message, session_id)
+        response = await bot.get_response(request.message, history)
+        await save_turn(session_id, request.message, response)
         
         # Generate audio
-        audio_base64 = text_to_audio_base64(response)
+        audio_hash, audio_data = await run_in_threadpool(text_to_audio, response)
         
         return ChatResponse(
             response=response,
-            audio_base64=audio_base64,
-            sentiment=sentiment
+            session_id=session_id,
+            sentiment=sentiment,
+            **audio_fields(http_request, audio_hash, audio_data, request.inline_audio)
         )
+    except LLMGatewayBusy as e:
+        raise busy_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
 
-@router.post("/voice-chat", response_model=ChatResponse)
-async def voice_chat_with_bot(audio_file: UploadFile = File(...)):
-    """Handle voice-based chat requests"""
+@router.post("/chat/stream")
+async def stream_chat_with_bot(request: ChatRequest, http_request: Request, audio: bool = True):
+    """
+    Stream the reply as Server-Sent Events.
+    Emits `token` events as text arrives, then an optional `audio` event and
+    a final `done` event carrying the full response, session id and sentiment.
+    """
+    session_id, history = await load_history(request.session_id, request.conversation_history)
+    sentiment = get_sentiment(request.message, session_id)
+    tokens = bot.stream_response(request.message, history)
+
+    # Wait for the first chunk before sending headers, so an overloaded
+    # gateway or unreachable provider still gets a proper error status
+    try:
+        first_chunk = await tokens.__anext__()
+    except StopAsyncIteration:
+        first_chunk = ""
+    except LLMGatewayBusy as e:
+        raise busy_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
+
+    async def events():
+        chunks = [first_chunk]
+        try:
+            if first_chunk:
+                yield format_sse("token", {"text": first_chunk})
+            async for text in tokens:
+                chunks.append(text)
+                yield format_sse("token", {"text": text})
+            response = "".join(chunks) or "Sorry, I couldn't generate a response."
+            await save_turn(session_id, request.message, response)
+            if audio:
+                audio_hash, audio_data = await run_in_threadpool(text_to_audio, response)
+                yield format_sse("audio", audio_fields(http_request, audio_hash, audio_data, request.inline_audio))
+            yield format_sse("done", {"response": response, "session_id": session_id, "sentiment": sentiment})
+        except Exception as e:
+            yield format_sse("error", {"detail": f"Chat processing failed: {str(e)}"})
+        finally:
+            # Release the gateway slot even if the client disconnected mid-stream
+            await tokens.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post(
+    "/voice-chat",
+    response_model=ChatResponse,
+    openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": VOICE_FORM_SCHEMA}}}},
+)
+async def voice_chat_with_bot(http_request: Request, inline_audio: bool = False):
+    """
+    Handle voice-based chat requests: a multipart form with 'audio_file'
+    and optionally 'session_id'
+    """
+    audio_file, session_id = await read_voice_form(http_request)
     try:
         # Convert speech to text
-        user_message = speech_to_text(audio_file)
-        
-        # Get sentiment
-        sentiment = get_sentiment(user_message)
+        user_message = await speech_to_text(audio_file)
         
         # Get bot response
-        bot = ReWearBot()
-        response = bot.get_response(user_message)
+        session_id, history = await load_history(session_id)
+        sentiment = get_sentiment(user_message, session_id)
+        response = await bot.get_response(user_message, history)
+        await save_turn(session_id, user_message, response)
         
         # Generate audio response
-        audio_base64 = text_to_audio_base64(response)
+        audio_hash, audio_data = await run_in_threadpool(text_to_audio, response)
         
         return ChatResponse(
             response=response,
-            audio_base64=audio_base64,
-            sentiment=sentiment
+            session_id=session_id,
+            user_message=user_message,
+            sentiment=sentiment,
+            **audio_fields(http_request, audio_hash, audio_data, inline_audio)
         )
+    except HTTPException:
+        raise
+    except LLMGatewayBusy as e:
+        raise busy_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Voice chat processing failed: {str(e)}")
+    finally:
+        await audio_file.close()
+
+@router.delete("/sessions/{session_id}", status_code=204)
+async def delete_chat_session(session_id: str):
+    """Forget a server-side conversation"""
+    await get_conversation_store().delete(session_id)
+    return Response(status_code=204)
+
+@router.get("/audio/{audio_hash}", name="get_chatbot_audio")
+async def get_chatbot_audio(audio_hash: str, request: Request):
+    """
+    Serve synthesised reply audio by its content hash.
+    Audio never changes for a hash, so it is cacheable forever; supports
+    conditional requests (ETag) and single byte ranges for seeking; other
+    Range headers are ignored and the whole clip is served.
+    """
+    if not re.fullmatch(r"[0-9a-f]{64}", audio_hash):
+        raise HTTPException(status_code=404, detail="Audio not found")
+    audio_data = await run_in_threadpool(get_tts_cache().get, audio_hash)
+    if audio_data is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    etag = f'"{audio_hash}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Weak comparison, as If-None-Match requires
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    try:
+        byte_range = parse_byte_range(range_header, len(audio_data)) if range_header else None
+    except RangeNotSatisfiable:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{len(audio_data)}"})
+    if byte_range is not None:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(audio_data)}"
+        return Response(audio_data[start:end + 1], status_code=206, media_type="audio/mpeg", headers=headers)
+    return Response(audio_data, media_type="audio/mpeg", headers=headers)
 
 @router.get("/health")
 async def chatbot_health():
     """Health check endpoint for the chatbot"""
-    return {"status": "healthy", "service": "ReWearBot"} 
\ No newline at end of file
+    return {
+        "status": "healthy",
+        "service": "ReWearBot",
+        "llm_gateway": bot.gateway.metrics.snapshot(),
+        "tts_cache": {"hits": get_tts_cache().hits, "misses": get_tts_cache().misses},
+        "response_cache": bot.response_cache.stats() if bot.response_cache else None,
+    } 
\ No newline at end of file
@@ -0,0 +1,80 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app import schemas
+from app.api.endpoints.auth import get_admin_principal, get_token_principal
+from app.core.config import settings
+from app.services.exports import EXPORTS, FORMATS, stream_export
+
+router = APIRouter()
+
+def _export_response(name: str, request: Request, format: str, since: Optional[datetime], after_id: Optional[int]):
+    compress = "gzip" in request.headers.get("accept-encoding", "")
+    headers = {
+        "Content-Disposition": f'attachment; filename="{name}.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        stream_export(
+            EXPORTS[name], fmt=format, compress=compress, since=since, after_id=after_id,
+            batch_size=settings.EXPORT_BATCH_SIZE,
+        ),
+        media_type=FORMATS[format],
+        headers=headers,
+    )
+
+FORMAT_QUERY = Query("ndjson", pattern="^(ndjson|csv)$")
+SINCE_QUERY = Query(None, description="Only rows changed at or after this time")
+AFTER_ID_QUERY = Query(None, description="Resume after this row; pass with the last row's 'updated_at' as 'since'")
+
+@router.get("/items", summary="Stream all items")
+async def export_items(
+    request: Request,
+    format: str = FORMAT_QUERY,
+    since: Optional[datetime] = SINCE_QUERY,
+    after_id: Optional[int] = AFTER_ID_QUERY,
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    """
+    Stream every item as NDJSON or CSV, ordered by 'updated_at' then 'id'.
+    - Requires authentication.
+    - Gzip-compressed when the client sends 'Accept-Encoding: gzip'.
+    - For incremental syncs pass the largest 'updated_at' seen last time as
+      'since'. After a dropped connection, pass the last complete row's
+      'updated_at' and 'id' as 'since' and 'after_id' to continue.
+    """
+    return _export_response("items", request, format, since, after_id)
+
+@router.get("/users", summary="Stream all users")
+async def export_users(
+    request: Request,
+    format: str = FORMAT_QUERY,
+    since: Optional[datetime] = SINCE_QUERY,
+    after_id: Optional[int] = AFTER_ID_QUERY,
+    current_user: schemas.Principal = Depends(get_admin_principal)
+):
+    """
+    Stream every user (without password hashes), like /exports/items.
+    - Admin only.
+    """
+    return _export_response("users", request, format, since, after_id)
+
+@router.get("/swaps", summary="Stream the swap history")
+async def export_swaps(
+    request: Request,
+    format: str = FORMAT_QUERY,
+    since: Optional[datetime] = Query(None, description="Only swaps made at or after this time"),
+    after_id: Optional[int] = Query(None, description="Resume after this swap ID"),
+    current_user: schemas.Principal = Depends(get_admin_principal)
+):
+    """
+    Stream every swap, oldest first. Swaps never change, so incremental
+    syncs and resumes only need the last swap's 'id' as 'after_id'.
+    - Admin only.
+    - In CSV, 'offered_item_ids' is a ';'-separated list.
+    """
+    return _export_response("swaps", request, format, since, after_id)
@@ -0,0 +1,137 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+from app.crud import crud_feed, crud_item
+from app.api.endpoints.auth import get_async_db, get_token_principal
+from app.models.feed import Post
+from app.models.user import User
+
+router = APIRouter()
+
+CURSOR_QUERY = Query(None, description="Pass the previous page's 'X-Next-Cursor' header")
+
+def _set_cursor(response: Response, next_cursor: Optional[int]):
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+
+async def _require(db: AsyncSession, model, row_id: int, detail: str):
+    if await db.get(model, row_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+
+@router.get("/", response_model=List[schemas.Post], summary="My home timeline")
+async def read_home_timeline(
+    response: Response,
+    cursor: Optional[int] = CURSOR_QUERY,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    """
+    Posts by me and the people I follow, newest first.
+    - Paginate by passing the 'X-Next-Cursor' response header back as 'cursor'.
+    - Goes back FEED_TIMELINE_MAX posts; older ones are on each author's page.
+    """
+    posts, next_cursor = await crud_feed.get_home_timeline_async(db, current_user.id, cursor=cursor, limit=limit)
+    _set_cursor(response, next_cursor)
+    return posts
+
+@router.post("/posts", response_model=schemas.Post, status_code=status.HTTP_201_CREATED, summary="Create a post")
+async def create_post(
+    post: schemas.PostCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    if post.item_id is not None and await crud_item.get_item_async(db, post.item_id, owner_loading=None) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+    return await crud_feed.create_post_async(db, post, author_id=current_user.id)
+
+@router.get("/posts/{post_id}", response_model=schemas.Post, summary="Get a single post")
+async def read_post(post_id: int, db: AsyncSession = Depends(get_async_db)):
+    post = await crud_feed.get_post_async(db, post_id)
+    if post is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+    return post
+
+@router.get("/users/{user_id}/posts", response_model=List[schemas.Post], summary="A user's posts")
+async def read_user_posts(
+    user_id: int,
+    response: Response,
+    cursor: Optional[int] = CURSOR_QUERY,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Newest first, as far back as they go. Public.
+    """
+    posts, next_cursor = await crud_feed.get_user_posts_async(db, user_id, cursor=cursor, limit=limit)
+    _set_cursor(response, next_cursor)
+    return posts
+
+@router.put("/posts/{post_id}/like", status_code=status.HTTP_204_NO_CONTENT, summary="Like a post")
+async def like_post(
+    post_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    """
+    Idempotent. The post's like_count catches up within FEED_COUNTER_FLUSH_SECONDS.
+    """
+    await _require(db, Post, post_id, "Post not found")
+    await crud_feed.like_post_async(db, post_id, current_user.id)
+
+@router.delete("/posts/{post_id}/like", status_code=status.HTTP_204_NO_CONTENT, summary="Unlike a post")
+async def unlike_post(
+    post_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    await crud_feed.unlike_post_async(db, post_id, current_user.id)
+
+@router.get("/posts/{post_id}/comments", response_model=List[schemas.Comment], summary="A post's comments")
+async def read_comments(
+    post_id: int,
+    response: Response,
+    cursor: Optional[int] = CURSOR_QUERY,
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Oldest first.
+    """
+    comments, next_cursor = await crud_feed.get_comments_async(db, post_id, cursor=cursor, limit=limit)
+    _set_cursor(response, next_cursor)
+    return comments
+
+@router.post("/posts/{post_id}/comments", response_model=schemas.Comment, status_code=status.HTTP_201_CREATED, summary="Comment on a post")
+async def create_comment(
+    post_id: int,
+    comment: schemas.CommentCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    await _require(db, Post, post_id, "Post not found")
+    return await crud_feed.create_comment_async(db, post_id, comment, author_id=current_user.id)
+
+@router.put("/users/{user_id}/follow", status_code=status.HTTP_204_NO_CONTENT, summary="Follow a user")
+async def follow_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    """
+    Idempotent. Their recent posts appear on my home timeline straight away.
+    """
+    if user_id == current_user.id:
+        raise HTTPException(status_code=422, detail="You cannot follow yourself")
+    await _require(db, User, user_id, "User not found")
+    await crud_feed.follow_async(db, current_user.id, user_id)
+
+@router.delete("/users/{user_id}/follow", status_code=status.HTTP_204_NO_CONTENT, summary="Unfollow a user")
+async def unfollow_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    await crud_feed.unfollow_async(db, current_user.id, user_id)
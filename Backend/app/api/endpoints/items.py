@@ -1,53 +1,250 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import asyncio
+import io
+import tempfile
+from urllib.parse import urlencode
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app import models, schemas
+from app import schemas
+from app.models.item import ItemStatus
 from app.crud import crud_item
-from app.api.endpoints.auth import get_db, get_current_user
+from app.api.endpoints.auth import get_async_db, get_current_user, get_token_principal
+from app.core.config import settings
+from app.services import item_events
+from app.services.catalogue_cache import get_catalogue_cache
+from app.services.item_import import FORMATS, import_items
 
 router = APIRouter()
 
+_ITEM = TypeAdapter(schemas.Item)
+_ITEM_LIST = TypeAdapter(List[schemas.Item])
+
+def _to_json(adapter: TypeAdapter, value) -> bytes:
+    """Validates ORM objects against the response schema, as response_model would, and serialises them"""
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+async def catalogue_response(
+    request: Request,
+    db: AsyncSession,
+    params: Dict[str, Any],
+    render: Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]],
+    exists: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> Response:
+    """
+    Serves a public catalogue read through the catalogue cache: 304 when the
+    client's copy is current, else the cached JSON for this path and
+    `params` (the endpoint's validated query parameters), else the JSON and
+    extra headers returned by render(), which is then cached.
+    The ETag covers the whole catalogue, so routes for a single resource
+    pass exists(), checked before answering 304.
+    """
+    cache = get_catalogue_cache()
+    version = await cache.version(db)
+    headers = {
+        "ETag": version.etag,
+        "Last-Modified": version.last_modified,
+        "Cache-Control": f"public, max-age={settings.CATALOGUE_MAX_AGE}",
+    }
+    if version.not_modified(request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        if exists is not None and not await exists():
+            raise HTTPException(status_code=404, detail="Item not found")
+        cache.not_modified += 1
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    # Keyed on the validated values, re-encoded, so neither encoded
+    # separators nor unknown parameters can alias or multiply entries
+    key = request.url.path + "?" + urlencode(sorted((k, str(v)) for k, v in params.items() if v is not None))
+    entry = cache.get(key)
+    headers["X-Cache"] = "HIT" if entry is not None else "MISS"
+    if entry is None:
+        entry = cache.put(key, *await render())
+    return Response(entry.body, media_type="application/json", headers={**headers, **entry.headers})
+
+def item_filters(
+    category: Optional[str] = None,
+    size: Optional[str] = None,
+    condition: Optional[str] = None,
+    status: Optional[ItemStatus] = None,
+    owner_id: Optional[int] = None,
+    q: Optional[str] = Query(None, min_length=1, description="Free-text search on title and description"),
+) -> dict:
+    """
+    Collects the catalogue filter query parameters shared by the listing endpoints.
+    """
+    return {
+        "category": category,
+        "size": size,
+        "condition": condition,
+        "status": status,
+        "owner_id": owner_id,
+        "q": q,
+    }
+
 @router.post("/", response_model=schemas.Item, status_code=status.HTTP_201_CREATED, summary="Create a new item")
-def create_item(
+async def create_item(
     item: schemas.ItemCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
 ):
     """
     Create a new item listing.
     - Requires authentication.
     - The item will be automatically associated with the logged-in user.
     """
-    return crud_item.create_user_item(db=db, item=item, user_id=current_user.id)
+    return await crud_item.create_user_item_async(db=db, item=item, user_id=current_user.id)
+
+@router.post("/import", response_model=schemas.ItemImportResult, summary="Bulk import items")
+async def bulk_import_items(
+    request: Request,
+    format: Optional[str] = Query(None, description="'ndjson' or 'csv'; defaults to the Content-Type"),
+    # The stored user, not the token's claims: admin rights decide whose
+    # items these become, and must not outlive a demotion
+    current_user: schemas.Principal = Depends(get_current_user)
+):
+    """
+    Create many items from an NDJSON or CSV request body.
+    - Requires authentication. Items belong to the logged-in user; admins
+      may give each row its own 'owner_id'.
+    - Rows that fail validation are reported by line number and skipped;
+      the rest are imported.
+    """
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    # Spool the body (to disk past 1 MB) so the import reads it as a stream
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as body:
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > settings.IMPORT_MAX_BYTES:
+                raise HTTPException(status_code=413, detail=f"Imports are limited to {settings.IMPORT_MAX_BYTES} bytes")
+            body.write(chunk)
+        body.seek(0)
+        lines = io.TextIOWrapper(body, encoding="utf-8-sig", newline="")
+        try:
+            return await asyncio.to_thread(
+                import_items, lines, format, owner_id=current_user.id, allow_owner_column=current_user.is_admin
+            )
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="Import files must be UTF-8")
+        finally:
+            lines.detach()
 
 @router.get("/", response_model=List[schemas.Item], summary="Get all listed items")
-def read_items(
-    skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db)
+async def read_items(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, description="Page size; values over 100 are treated as 100"),
+    cursor: Optional[int] = Query(None, description="Return items with an ID greater than this cursor"),
+    filters: dict = Depends(item_filters),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Retrieve a list of all items. 
+    Retrieve a list of items, optionally filtered.
     - This is a public endpoint and does not require authentication.
-    - Supports pagination with 'skip' and 'limit' query parameters.
+    - Filter with 'category', 'size', 'condition', 'status', 'owner_id' and 'q'.
+    - Paginate by passing the 'X-Next-Cursor' response header back as 'cursor'.
+      The legacy 'skip' parameter is still honoured when no cursor is given.
+    - Cacheable: send 'If-None-Match' with the last 'ETag' to get a 304.
+    """
+    # Clamped rather than rejected: clients written before the cap may ask for more
+    limit = min(limit, 100)
+
+    async def render():
+        items, next_cursor = await crud_item.search_items_async(
+            db, cursor=cursor, skip=skip, limit=limit, owner_loading="slim", **filters
+        )
+        headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else {}
+        return _to_json(_ITEM_LIST, items), headers
+
+    return await catalogue_response(request, db, {**filters, "skip": skip, "limit": limit, "cursor": cursor}, render)
+
+@router.get("/search", response_model=List[schemas.Item], summary="Full-text search over items")
+async def search_items(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Search terms; the last term matches as a prefix"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Search item titles and descriptions, ranked by relevance.
+    - This is a public endpoint.
+    - Title matches rank above description matches.
     """
-    items = crud_item.get_items(db, skip=skip, limit=limit)
-    return items
+    async def render():
+        items = await crud_item.full_text_search_items_async(db, q=q, limit=limit, offset=skip, owner_loading="slim")
+        return _to_json(_ITEM_LIST, items), {}
+
+    return await catalogue_response(request, db, {"q": q, "skip": skip, "limit": limit}, render)
+
+@router.get("/facets", response_model=schemas.ItemFacets, summary="Count items per category and condition")
+async def read_item_facets(request: Request, filters: dict = Depends(item_filters), db: AsyncSession = Depends(get_async_db)):
+    """
+    Retrieve item counts per category and condition for the given filters.
+    - Each facet is counted without its own filter, so every category (or
+      condition) can still be chosen after one is selected.
+    - This is a public endpoint.
+    """
+    async def render():
+        facets = schemas.ItemFacets(**await crud_item.get_item_facets_async(db, **filters))
+        return facets.model_dump_json().encode(), {}
+
+    return await catalogue_response(request, db, filters, render)
 
 @router.get("/{item_id}", response_model=schemas.Item, summary="Get a single item by ID")
-def read_item(item_id: int, db: Session = Depends(get_db)):
+async def read_item(request: Request, item_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Retrieve the details of a single item by its ID.
     - This is a public endpoint.
     """
-    db_item = crud_item.get_item(db, item_id=item_id)
+    async def render():
+        db_item = await crud_item.get_item_async(db, item_id=item_id)
+        if db_item is None:
+            raise HTTPException(status_code=404, detail="Item not found")
+        return _to_json(_ITEM, db_item), {}
+
+    async def exists():
+        return await crud_item.item_exists_async(db, item_id)
+
+    return await catalogue_response(request, db, {}, render, exists=exists)
+
+@router.get("/{item_id}/similar", response_model=List[schemas.Item], summary="Get items similar to this one")
+async def read_similar_items(
+    item_id: int,
+    limit: int = Query(4, ge=1, le=20),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Retrieve available items most like this one, by category, size,
+    condition and wording of the title and description.
+    - This is a public endpoint.
+    """
+    db_item = await crud_item.get_item_async(db, item_id=item_id, owner_loading=None)
     if db_item is None:
         raise HTTPException(status_code=404, detail="Item not found")
-    return db_item
+
+    def lookup():
+        # Imported here so numpy loads with the first lookup, not with the app
+        from app.services.recommendations import get_similar_items_index
+
+        return get_similar_items_index().similar(
+            item_id,
+            limit=limit,
+            category=db_item.category,
+            size=db_item.size,
+            condition=db_item.condition,
+            text=f"{db_item.title} {db_item.description or ''}",
+        )
+
+    # The index loads from the database on first use, so stay off the event loop
+    similar_ids = await asyncio.to_thread(lookup)
+    return await crud_item.get_items_by_ids_async(db, similar_ids, owner_loading="slim")
 
 @router.post("/seed", summary="Seed sample data")
-def seed_items(db: Session = Depends(get_db)):
+async def seed_items(db: AsyncSession = Depends(get_async_db)):
     """
     Create sample items for testing.
     - This endpoint creates sample data for demonstration purposes.
@@ -103,10 +300,9 @@ def seed_items(db: Session = Depends(get_db)):
         }
     ]
     
-    created_items = []
-    for item_data in sample_items:
-        item = schemas.ItemCreate(**item_data)
-        created_item = crud_item.create_user_item(db=db, item=item, user_id=item_data["owner_id"])
-        created_items.append(created_item)
-    
+    item_ids = await crud_item.bulk_insert_items_async(db, sample_items)
+    await db.commit()
+    created_items = await crud_item.get_items_by_ids_async(db, item_ids)
+    item_events.items_available(created_items)
+
     return {"message": f"Created {len(created_items)} sample items", "items": created_items}
\ No newline at end of file
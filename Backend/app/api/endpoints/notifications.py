@@ -0,0 +1,41 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+from app.crud import crud_notification
+from app.api.endpoints.auth import get_async_db, get_token_principal
+
+router = APIRouter()
+
+@router.get("/", response_model=List[schemas.Notification], summary="List my notifications")
+async def read_notifications(
+    unread_only: bool = False,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    """
+    Newest first. New listings matching the user's wishlist arrive as
+    periodic digests rather than one notification per item.
+    """
+    return await crud_notification.get_notifications_async(
+        db, current_user.id, unread_only=unread_only, skip=skip, limit=limit
+    )
+
+@router.post("/read", status_code=status.HTTP_204_NO_CONTENT, summary="Mark all my notifications as read")
+async def mark_all_read(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    await crud_notification.mark_read_async(db, current_user.id)
+
+@router.post("/{notification_id}/read", status_code=status.HTTP_204_NO_CONTENT, summary="Mark a notification as read")
+async def mark_read(
+    notification_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    if not await crud_notification.mark_read_async(db, current_user.id, notification_id):
+        raise HTTPException(status_code=404, detail="Unread notification not found")
@@ -0,0 +1,59 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+from app.crud import crud_swap
+from app.api.endpoints.auth import get_async_db, get_token_principal
+
+router = APIRouter()
+
+@router.post("/", response_model=schemas.Swap, status_code=status.HTTP_201_CREATED, summary="Swap or redeem an item")
+async def create_swap(
+    swap: schemas.SwapCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=128),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    """
+    Swap the offered items (or redeem with points only) for an item.
+    - Requires authentication.
+    - The points difference is settled between both users' balances in the
+      same transaction that marks the items as swapped.
+    - Send an 'Idempotency-Key' header to make retries safe: repeating a
+      request with the same key returns the original swap with status 200.
+    """
+    try:
+        db_swap, created = await crud_swap.create_swap_async(
+            db, request=swap, requester_id=current_user.id, idempotency_key=idempotency_key
+        )
+    except crud_swap.SwapRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    return db_swap
+
+@router.get("/", response_model=List[schemas.Swap], summary="List my swaps")
+async def read_swaps(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    """
+    Swaps the current user requested or received, newest first.
+    """
+    return await crud_swap.get_swaps_for_user_async(db, current_user.id, skip=skip, limit=limit)
+
+@router.get("/ledger", response_model=List[schemas.LedgerEntry], summary="List my points movements")
+async def read_ledger(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    """
+    Points ledger entries for the current user, newest first.
+    """
+    return await crud_swap.get_ledger_async(db, current_user.id, skip=skip, limit=limit)
@@ -0,0 +1,71 @@
+import asyncio
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import schemas
+from app.crud import crud_wishlist
+from app.api.endpoints.auth import get_async_db, get_token_principal
+
+router = APIRouter()
+
+@router.get("/", response_model=List[schemas.WishlistEntry], summary="List my wishlist")
+async def read_wishlist(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    return await crud_wishlist.get_wishlist_async(db, current_user.id)
+
+@router.post("/", response_model=schemas.WishlistEntry, status_code=status.HTTP_201_CREATED, summary="Add to my wishlist")
+async def create_wishlist_entry(
+    entry: schemas.WishlistEntryCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    """
+    Add either a specific 'item_id', or a 'category' optionally narrowed by
+    'size', 'min_condition' and space-separated 'keywords'.
+    """
+    return await crud_wishlist.create_wishlist_entry_async(db, entry, current_user.id)
+
+@router.delete("/{entry_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Remove from my wishlist")
+async def delete_wishlist_entry(
+    entry_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    if await crud_wishlist.delete_wishlist_entry_async(db, entry_id, current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Wishlist entry not found")
+
+@router.get("/matches", response_model=List[schemas.SwapCycle], summary="Find swap cycles I can join")
+async def read_matches(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    """
+    Live multi-party swaps (A gets from B, B from C, C from A) that would
+    give the current user something on their wishlist, best first.
+    """
+    def search():
+        # Imported here so numpy loads with the first search, not with the app
+        from app.services.matching import get_swap_graph
+
+        return get_swap_graph().find_cycles(user_ids=[current_user.id], limit=limit)
+
+    # Loading the graph and the bounded search are CPU work, kept off the event loop
+    cycles = await asyncio.to_thread(search)
+    return [
+        schemas.SwapCycle(
+            score=cycle.score,
+            legs=[schemas.SwapLeg(receiver_id=r, giver_id=g, item_id=i) for r, g, i in cycle.legs],
+        )
+        for cycle in cycles
+    ]
+
+@router.get("/suggestions", response_model=List[schemas.SwapCycle], summary="Nightly swap suggestions for me")
+async def read_suggestions(
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_token_principal)
+):
+    return await crud_wishlist.get_suggestions_for_user_async(db, current_user.id, limit=limit)
@@ -5,6 +5,142 @@ class Settings:
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Authenticated users are cached briefly so each request does not reload them
+    PRINCIPAL_CACHE_TTL: float = float(os.getenv("PRINCIPAL_CACHE_TTL", "30"))
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+    # bcrypt cost factor; stored hashes with a different cost are upgraded on login
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Dedicated pool for password hashing, and how many jobs may wait before rejecting
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./rewear.db")
+    # Same database through an asyncio driver; derived from DATABASE_URL when unset
+    ASYNC_DATABASE_URL: Optional[str] = os.getenv("ASYNC_DATABASE_URL")
+    # Connection pool sizing, applied to both the sync and async engines
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Fail any request that runs more queries than this (0 disables the check)
+    QUERY_BUDGET_PER_REQUEST: int = int(os.getenv("QUERY_BUDGET_PER_REQUEST", "0"))
+    # Chatbot LLM provider (any OpenAI-compatible API) and outbound call limits
+    LLM_BASE_URL: str = os.getenv("LLM_BASE_URL", "https://openrouter.ai/api/v1")
+    LLM_MODEL: str = os.getenv("LLM_MODEL", "google/gemini-2.5-flash-preview-04-17")
+    LLM_MAX_IN_FLIGHT: int = int(os.getenv("LLM_MAX_IN_FLIGHT", "16"))
+    LLM_MAX_QUEUE: int = int(os.getenv("LLM_MAX_QUEUE", "64"))
+    LLM_QUEUE_TIMEOUT: float = float(os.getenv("LLM_QUEUE_TIMEOUT", "2"))
+    LLM_REQUEST_TIMEOUT: float = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+    # Text-to-speech backend: "gtts" or the offline "stub", which waits TTS_STUB_LATENCY seconds
+    TTS_BACKEND: str = os.getenv("TTS_BACKEND", "gtts")
+    TTS_STUB_LATENCY: float = float(os.getenv("TTS_STUB_LATENCY", "0"))
+    # Synthesised reply audio: in-process LRU plus a size-capped disk tier ("" disables disk)
+    TTS_CACHE_DIR: str = os.getenv("TTS_CACHE_DIR", "./tts_cache")
+    TTS_CACHE_MAX_BYTES: int = int(os.getenv("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    TTS_MEMORY_CACHE_ITEMS: int = int(os.getenv("TTS_MEMORY_CACHE_ITEMS", "256"))
+    # Chatbot answer cache (0 entries disables it); similarity 0 keeps lookups exact-match only
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+    RESPONSE_CACHE_TTL: float = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+    RESPONSE_CACHE_SIMILARITY: float = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0"))
+    RESPONSE_CACHE_HISTORY_TURNS: int = int(os.getenv("RESPONSE_CACHE_HISTORY_TURNS", "2"))
+    # Server-side chat history: "memory", "sqlite:///path.db" or "redis://host:port/db"
+    CONVERSATION_STORE: str = os.getenv("CONVERSATION_STORE", "memory")
+    CONVERSATION_TOKEN_BUDGET: int = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "2000"))
+    CONVERSATION_TTL: float = float(os.getenv("CONVERSATION_TTL", "86400"))
+    CONVERSATION_MAX_SESSIONS: int = int(os.getenv("CONVERSATION_MAX_SESSIONS", "10000"))
+    CONVERSATION_MAX_MESSAGES: int = int(os.getenv("CONVERSATION_MAX_MESSAGES", "50"))
+    # Voice chat speech-to-text: backend ("google", "sphinx" or the offline "stub") and limits
+    STT_BACKEND: str = os.getenv("STT_BACKEND", "google")
+    STT_LANGUAGE: str = os.getenv("STT_LANGUAGE", "en-US")
+    STT_STUB_TEXT: str = os.getenv("STT_STUB_TEXT", "How do points work?")
+    STT_STUB_LATENCY: float = float(os.getenv("STT_STUB_LATENCY", "0"))
+    STT_MAX_UPLOAD_BYTES: int = int(os.getenv("STT_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+    STT_CHUNK_SIZE: int = int(os.getenv("STT_CHUNK_SIZE", str(64 * 1024)))
+    STT_MAX_WORKERS: int = int(os.getenv("STT_MAX_WORKERS", "4"))
+    STT_MAX_PENDING: int = int(os.getenv("STT_MAX_PENDING", "16"))
+
+    # Swap cycle matching: longest cycle searched, DFS steps per start user,
+    # and how old the in-process graph may get before it is reloaded
+    MATCHING_MAX_CYCLE_LENGTH: int = int(os.getenv("MATCHING_MAX_CYCLE_LENGTH", "4"))
+    MATCHING_SEARCH_BUDGET: int = int(os.getenv("MATCHING_SEARCH_BUDGET", "20000"))
+    MATCHING_REBUILD_SECONDS: float = float(os.getenv("MATCHING_REBUILD_SECONDS", "900"))
+
+    # Similar items index: hashed TF-IDF width, cached neighbour lists, and how
+    # old the in-process index may get before it is reloaded
+    SIMILAR_TEXT_DIMS: int = int(os.getenv("SIMILAR_TEXT_DIMS", "128"))
+    SIMILAR_CACHE_ITEMS: int = int(os.getenv("SIMILAR_CACHE_ITEMS", "10000"))
+    SIMILAR_REBUILD_SECONDS: float = float(os.getenv("SIMILAR_REBUILD_SECONDS", "3600"))
+
+    # Wishlist notifications: how often digests are written, how many item ids
+    # one digest lists, how many users may wait before matches are dropped,
+    # how many failed writes in a row a batch survives, and how often saved
+    # searches are reloaded from the database
+    NOTIFY_FLUSH_SECONDS: float = float(os.getenv("NOTIFY_FLUSH_SECONDS", "30"))
+    NOTIFY_MAX_ITEMS_PER_DIGEST: int = int(os.getenv("NOTIFY_MAX_ITEMS_PER_DIGEST", "20"))
+    NOTIFY_MAX_PENDING_USERS: int = int(os.getenv("NOTIFY_MAX_PENDING_USERS", "10000"))
+    NOTIFY_MAX_RETRIES: int = int(os.getenv("NOTIFY_MAX_RETRIES", "3"))
+    NOTIFY_RELOAD_SECONDS: float = float(os.getenv("NOTIFY_RELOAD_SECONDS", "900"))
+
+    # Bulk item import: rows validated and inserted per transaction, largest
+    # accepted upload, and how many row errors are reported back
+    IMPORT_CHUNK_SIZE: int = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+    IMPORT_MAX_BYTES: int = int(os.getenv("IMPORT_MAX_BYTES", str(50 * 1024 * 1024)))
+    IMPORT_MAX_ERRORS: int = int(os.getenv("IMPORT_MAX_ERRORS", "100"))
+
+    # Rows fetched per round trip (and encoded per chunk) by the export endpoints
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+    # Public catalogue reads: rendered responses kept in-process, how often the
+    # catalogue version is re-read (bounds staleness across workers), and the
+    # max-age browsers and CDNs may reuse a response for without revalidating
+    CATALOGUE_CACHE_MAX_ENTRIES: int = int(os.getenv("CATALOGUE_CACHE_MAX_ENTRIES", "2048"))
+    CATALOGUE_VERSION_TTL: float = float(os.getenv("CATALOGUE_VERSION_TTL", "1"))
+    CATALOGUE_MAX_AGE: int = int(os.getenv("CATALOGUE_MAX_AGE", "10"))
+
+    # Request timing, SQL hooks and /metrics; off removes all of it. Requests
+    # slower than SLOW_REQUEST_SECONDS are logged with their query breakdown
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "1") == "1"
+    SLOW_REQUEST_SECONDS: float = float(os.getenv("SLOW_REQUEST_SECONDS", "1"))
+
+    # Routers this worker mounts, e.g. FEATURES=auth,items,users for a
+    # catalogue-only worker. Unlisted features are never imported.
+    FEATURES: frozenset = frozenset(
+        name.strip()
+        for name in os.getenv("FEATURES", "auth,items,users,swaps,wishlist,notifications,exports,activity,feed,chatbot").split(",")
+        if name.strip()
+    )
+    # Create tables and add missing columns when the app starts. Turn off in
+    # production and run `python -m app.db.migrate` as a deploy step instead
+    AUTO_MIGRATE: bool = os.getenv("AUTO_MIGRATE", "1") == "1"
+    # Import the chatbot's LLM and speech libraries at startup instead of on
+    # the first chat request; slower to become ready, no slow first request
+    CHATBOT_PRELOAD: bool = os.getenv("CHATBOT_PRELOAD", "0") == "1"
+
+    # Chat sentiment: texts memoised per worker, and with SENTIMENT_PERSIST on
+    # one chat_sentiments row per message, written in batches for analytics
+    SENTIMENT_CACHE_ENTRIES: int = int(os.getenv("SENTIMENT_CACHE_ENTRIES", "10000"))
+    SENTIMENT_PERSIST: bool = os.getenv("SENTIMENT_PERSIST", "0") == "1"
+    SENTIMENT_FLUSH_SECONDS: float = float(os.getenv("SENTIMENT_FLUSH_SECONDS", "10"))
+
+    # The site-wide activity counters are split over this many rows, summed
+    # on read, so concurrent item and swap writes rarely wait on one another
+    ACTIVITY_COMMUNITY_SHARDS: int = int(os.getenv("ACTIVITY_COMMUNITY_SHARDS", "16"))
+
+    # Community feed: posts by accounts with up to FEED_FANOUT_MAX_FOLLOWERS
+    # followers are pushed into follower timelines on write, others are
+    # pulled on read. Timelines keep the newest FEED_TIMELINE_MAX entries
+    # (trimmed by `python -m app.services.feed --trim`), a new follow copies
+    # in up to FEED_FOLLOW_BACKFILL recent posts, and like, comment and
+    # follower counts are written every FEED_COUNTER_FLUSH_SECONDS
+    FEED_FANOUT_MAX_FOLLOWERS: int = int(os.getenv("FEED_FANOUT_MAX_FOLLOWERS", "1000"))
+    FEED_TIMELINE_MAX: int = int(os.getenv("FEED_TIMELINE_MAX", "1000"))
+    FEED_FOLLOW_BACKFILL: int = int(os.getenv("FEED_FOLLOW_BACKFILL", "50"))
+    FEED_COUNTER_FLUSH_SECONDS: float = float(os.getenv("FEED_COUNTER_FLUSH_SECONDS", "2"))
+
+    @property
+    def OPENROUTER_API_KEY(self) -> Optional[str]:
+        # Read on access: the chatbot loads .env after settings are created
+        return os.getenv("OPENROUTER_API_KEY")
 
 settings = Settings()
\ No newline at end of file
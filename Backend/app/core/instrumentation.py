@@ -0,0 +1,283 @@
+import asyncio
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Request-level performance instrumentation, exposed in Prometheus text
+# format at /metrics:
+# - InstrumentationMiddleware times every request per route template
+# - SQLAlchemy hooks (install_sql_hooks) time every statement and attribute
+#   it to the current request
+# - span()/traced() time named sections such as the LLM call
+# - services register their own counters with register_stats()
+# Requests slower than SLOW_REQUEST_SECONDS are logged with their query and
+# span breakdown. With METRICS_ENABLED off none of this is installed, and
+# span() and traced() are no-ops.
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    """Prometheus histogram with fixed buckets, one series per label tuple"""
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{float(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        lines.extend(f"{self.name}{_labels(self.labels, labels)} {value}" for labels, value in values)
+        return lines
+
+REQUEST_SECONDS = Histogram("rewear_http_request_duration_seconds", "Request latency by route", ("method", "route"))
+REQUESTS = Counter("rewear_http_requests_total", "Requests by route and status", ("method", "route", "status"))
+REQUEST_QUERIES = Histogram("rewear_http_request_db_queries", "SQL statements per request", ("method", "route"), COUNT_BUCKETS)
+REQUEST_QUERY_SECONDS = Counter("rewear_http_request_db_seconds_total", "Time in SQL per route", ("method", "route"))
+QUERY_SECONDS = Histogram("rewear_db_query_duration_seconds", "SQL statement latency")
+SPAN_SECONDS = Histogram("rewear_span_duration_seconds", "Latency of instrumented sections", ("span",))
+
+class RequestStats:
+    __slots__ = ("queries", "query_seconds", "statements", "spans")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        # statement text -> [count, seconds]
+        self.statements: Dict[str, list] = {}
+        self.spans: Dict[str, float] = {}
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+@contextmanager
+def _timed_span(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        SPAN_SECONDS.observe((name,), elapsed)
+        stats = _current.get()
+        if stats is not None:
+            stats.spans[name] = stats.spans.get(name, 0.0) + elapsed
+
+_NOOP = nullcontext()
+
+def span(name: str):
+    """Times a block: `with span("llm"): ...` (also around awaits)"""
+    if not settings.METRICS_ENABLED:
+        return _NOOP
+    return _timed_span(name)
+
+def traced(name: str) -> Callable:
+    """Decorator form of span() for sync and async functions"""
+    def decorate(function):
+        if not settings.METRICS_ENABLED:
+            return function
+        if asyncio.iscoroutinefunction(function):
+            @wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with _timed_span(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with _timed_span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    QUERY_SECONDS.observe((), elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+        entry = stats.statements.get(statement)
+        if entry is None:
+            stats.statements[statement] = [1, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # time so it does not stay on the pooled connection
+    conn = context.connection
+    if conn is not None and context.execution_context is not None:
+        started = conn.info.get("query_started")
+        if started:
+            started.pop()
+
+def install_sql_hooks():
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if not event.contains(Engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+
+def _log_slow_request(method: str, path: str, status: int, elapsed: float, stats: RequestStats):
+    top = sorted(stats.statements.items(), key=lambda item: item[1][1], reverse=True)[:5]
+    logger.warning(
+        "Slow request %s %s -> %s in %.3fs: %d queries in %.3fs%s%s",
+        method,
+        path,
+        status,
+        elapsed,
+        stats.queries,
+        stats.query_seconds,
+        "".join(f"\n  span {name}: {seconds:.3f}s" for name, seconds in stats.spans.items()),
+        "".join(
+            f"\n  {count}x {seconds:.3f}s {' '.join(statement.split())[:200]}"
+            for statement, (count, seconds) in top
+        ),
+    )
+
+# id(route) -> full path template, e.g. "/api/v1/items/{item_id}"
+_templates: Dict[int, str] = {}
+
+def _route_template(scope) -> str:
+    """
+    Labels requests by route template so the label set stays small;
+    unmatched paths share one label. Routes from included routers may carry
+    only their own path, so the prefix is recovered from the request path.
+    """
+    route = scope.get("route")
+    if route is None or not hasattr(route, "path_regex"):
+        return "unmatched"
+    template = _templates.get(id(route))
+    if template is None:
+        path = scope["path"]
+        template = route.path
+        for start in (i for i, char in enumerate(path) if char == "/"):
+            if route.path_regex.match(path[start:]):
+                template = path[:start] + route.path
+                break
+        _templates[id(route)] = template
+    return template
+
+class InstrumentationMiddleware:
+    """
+    Pure ASGI middleware (unlike BaseHTTPMiddleware it does not buffer
+    streaming responses). Latency is measured until the response is sent.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            path = _route_template(scope)
+            method = scope["method"]
+            REQUEST_SECONDS.observe((method, path), elapsed)
+            REQUESTS.inc((method, path, status))
+            REQUEST_QUERIES.observe((method, path), stats.queries)
+            REQUEST_QUERY_SECONDS.inc((method, path), stats.query_seconds)
+            if elapsed >= settings.SLOW_REQUEST_SECONDS:
+                _log_slow_request(method, scope["path"], status, elapsed, stats)
+
+_stats: Dict[str, Callable[[], Optional[dict]]] = {}
+
+def register_stats(name: str, collect: Callable[[], Optional[dict]]):
+    """
+    Exposes a service's numeric stats as rewear_<name>_<key> gauges.
+    `collect` returns None while the service has not been created.
+    """
+    _stats[name] = collect
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in (REQUEST_SECONDS, REQUESTS, REQUEST_QUERIES, REQUEST_QUERY_SECONDS, QUERY_SECONDS, SPAN_SECONDS):
+        lines.extend(metric.render())
+    for name, collect in _stats.items():
+        try:
+            values = collect()
+        except Exception:
+            logger.exception("Collecting %s stats failed", name)
+            continue
+        for key, value in (values or {}).items():
+            if isinstance(value, (bool, int, float)):
+                lines.append(f"# TYPE rewear_{name}_{key} gauge")
+                lines.append(f"rewear_{name}_{key} {float(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.instrumentation import register_stats
+from app.models.user import User
+from app.schemas.token import Principal
+
+class PrincipalCache:
+    """
+    Short-lived LRU of authenticated users, keyed by token subject and an
+    in-process user version. Bumping the version (invalidate) makes existing
+    entries unreachable, and also stops a lookup that started before the
+    change from caching the stale row it read.
+    Versions are kept for the `max_entries` most recently invalidated
+    subjects. When older ones are forgotten, every subject without a kept
+    version moves to a new, never used version, so forgetting cannot hand
+    an in-flight lookup's version back.
+    """
+    def __init__(self, max_entries: int = 10000, ttl: float = 30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.hit_seconds = 0.0
+        self.miss_seconds = 0.0
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[Principal, float]]" = OrderedDict()
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        self._floor = 0
+        self._next_version = 1
+        self._lock = threading.Lock()
+
+    def version(self, subject: str) -> int:
+        return self._versions.get(subject, self._floor)
+
+    def get(self, subject: str) -> Optional[Principal]:
+        key = (subject, self.version(subject))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return principal
+
+    def set(self, subject: str, version: int, principal: Principal):
+        with self._lock:
+            if version != self.version(subject):
+                return
+            self._entries[(subject, version)] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end((subject, version))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, subject: str):
+        with self._lock:
+            self._entries.pop((subject, self.version(subject)), None)
+            self._versions[subject] = self._next_version
+            self._versions.move_to_end(subject)
+            self._next_version += 1
+            if len(self._versions) > self.max_entries:
+                # Forget the older half at once, so the floor (and with it
+                # every entry cached under it) moves rarely
+                for _ in range(len(self._versions) // 2):
+                    self._versions.popitem(last=False)
+                self._floor = self._next_version
+                self._next_version += 1
+
+    def record(self, hit: bool, seconds: float):
+        if hit:
+            self.hits += 1
+            self.hit_seconds += seconds
+        else:
+            self.misses += 1
+            self.miss_seconds += seconds
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "avg_hit_ms": 1000 * self.hit_seconds / self.hits if self.hits else 0.0,
+            "avg_miss_ms": 1000 * self.miss_seconds / self.misses if self.misses else 0.0,
+        }
+
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+)
+
+# Any ORM write to a user drops its cached principal in this process. Other
+# workers pick up the change when their entry expires after PRINCIPAL_CACHE_TTL.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target):
+    principal_cache.invalidate(target.username)
+
+register_stats("principal_cache", principal_cache.stats)
@@ -1,14 +1,31 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from .config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    # Checked when the user does not exist, so a failed login costs the same either way.
+    # Hashed on first use rather than at import, which would add a full bcrypt round to startup.
+    return pwd_context.hash("rewear-dummy-password")
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password, hashed_password):
+    """
+    Returns (valid, new_hash); `new_hash` is not None when the stored hash
+    should be replaced because its cost differs from BCRYPT_ROUNDS.
+    """
+    if hashed_password is None:
+        pwd_context.verify(plain_password, _dummy_hash())
+        return False, None
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password):
     return pwd_context.hash(password)
 
@@ -0,0 +1,48 @@
+from datetime import date
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.models.activity import ActivityRollup, ActivityTotals
+from app.services.activity import COMMUNITY, METRICS
+
+async def get_totals_async(db: AsyncSession, user_id: int) -> Optional[ActivityTotals]:
+    """
+    A user's counters, or the community's for user_id 0; None before any activity.
+    """
+    if user_id != COMMUNITY:
+        return await db.get(ActivityTotals, user_id)
+    # The community's counters are spread over shard rows (user_id <= 0)
+    statement = select(*(func.sum(getattr(ActivityTotals, metric)).label(metric) for metric in METRICS)).where(
+        ActivityTotals.user_id <= COMMUNITY
+    )
+    row = (await db.execute(statement)).one()
+    if row.items_listed is None:
+        return None
+    return ActivityTotals(user_id=COMMUNITY, **row._asdict())
+
+async def get_rollups_async(
+    db: AsyncSession, user_id: int, period: str, since: Optional[date] = None, limit: int = 30
+) -> List[ActivityRollup]:
+    """
+    The newest `limit` buckets with activity, newest first. Buckets without
+    any activity have no row.
+    """
+    if user_id != COMMUNITY:
+        statement = select(ActivityRollup).where(ActivityRollup.period == period, ActivityRollup.user_id == user_id)
+        if since is not None:
+            statement = statement.where(ActivityRollup.bucket >= since)
+        statement = statement.order_by(ActivityRollup.bucket.desc()).limit(limit)
+        return list(await db.scalars(statement))
+    statement = (
+        select(ActivityRollup.bucket, *(func.sum(getattr(ActivityRollup, metric)).label(metric) for metric in METRICS))
+        .where(ActivityRollup.period == period, ActivityRollup.user_id <= COMMUNITY)
+        .group_by(ActivityRollup.bucket)
+    )
+    if since is not None:
+        statement = statement.where(ActivityRollup.bucket >= since)
+    statement = statement.order_by(ActivityRollup.bucket.desc()).limit(limit)
+    return [
+        ActivityRollup(period=period, user_id=COMMUNITY, **row._asdict())
+        for row in await db.execute(statement)
+    ]
@@ -0,0 +1,240 @@
+from datetime import datetime
+from sqlalchemy import ColumnElement, delete, insert, literal, select, union, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.sql import Select
+from typing import List, Optional, Tuple, Union
+
+from app.core.config import settings
+from app.models.feed import Comment, Follow, Post, PostLike, TimelineEntry
+from app.models.user import User
+from app.schemas.feed import CommentCreate, PostCreate
+from app.services import feed
+
+# Home timelines are hybrid: posts by authors with at most
+# FEED_FANOUT_MAX_FOLLOWERS followers are copied into each follower's
+# timeline_entries when written (push), while posts by bigger accounts are
+# stored once and merged in when a timeline is read (pull). A page is one
+# query: newest pushed entries UNION newest pulled posts, joined to posts.
+
+def _dialect(db: Union[Session, AsyncSession]) -> str:
+    return db.get_bind().dialect.name
+
+def _insert_ignore(dialect: str, model):
+    """INSERT that skips rows whose primary key already exists"""
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        return dialect_insert(model).on_conflict_do_nothing()
+    return insert(model).prefix_with("IGNORE")
+
+def _page_statement(post_ids: Select, viewer_id: Optional[int], limit: int) -> Select:
+    """Posts with the given ids, newest first, with author, item and the viewer's like"""
+    page = post_ids.subquery()
+    liked = (
+        select(PostLike.user_id).where(PostLike.post_id == Post.id, PostLike.user_id == viewer_id).exists()
+        if viewer_id is not None else literal(False)
+    )
+    return (
+        select(Post, liked.label("liked"))
+        .join(page, Post.id == page.c.post_id)
+        .options(joinedload(Post.author), joinedload(Post.item))
+        .order_by(Post.id.desc())
+        .limit(limit + 1)
+    )
+
+def _next_page(rows, limit: int) -> Tuple[List[Post], Optional[int]]:
+    posts = []
+    for post, liked in rows[:limit]:
+        post.liked = bool(liked)
+        posts.append(post)
+    return posts, (posts[-1].id if len(rows) > limit else None)
+
+def _before(column: ColumnElement, cursor: Optional[int]):
+    return column < cursor if cursor is not None else literal(True)
+
+def _home_post_ids(user_id: int, cursor: Optional[int], limit: int) -> Select:
+    pushed = (
+        select(TimelineEntry.post_id.label("post_id"))
+        .where(TimelineEntry.user_id == user_id, _before(TimelineEntry.post_id, cursor))
+        .order_by(TimelineEntry.post_id.desc())
+        .limit(limit + 1)
+        .subquery()
+    )
+    followees = select(Follow.followee_id).where(Follow.follower_id == user_id)
+    pulled = (
+        select(Post.id.label("post_id"))
+        .where(Post.fanned_out.is_(False), Post.author_id.in_(followees), _before(Post.id, cursor))
+        .order_by(Post.id.desc())
+        .limit(limit + 1)
+        .subquery()
+    )
+    # UNION, not UNION ALL: an author who crossed the threshold can have a
+    # post on both sides
+    return union(select(pushed.c.post_id), select(pulled.c.post_id))
+
+async def get_home_timeline_async(
+    db: AsyncSession, user_id: int, cursor: Optional[int] = None, limit: int = 20
+) -> Tuple[List[Post], Optional[int]]:
+    """
+    Posts by the user and the accounts they follow, newest first, and the
+    cursor for the next page (None on the last page).
+    """
+    statement = _page_statement(_home_post_ids(user_id, cursor, limit), user_id, limit)
+    return _next_page((await db.execute(statement)).all(), limit)
+
+async def get_user_posts_async(
+    db: AsyncSession, author_id: int, viewer_id: Optional[int] = None, cursor: Optional[int] = None, limit: int = 20
+) -> Tuple[List[Post], Optional[int]]:
+    post_ids = (
+        select(Post.id.label("post_id"))
+        .where(Post.author_id == author_id, _before(Post.id, cursor))
+        .order_by(Post.id.desc())
+        .limit(limit + 1)
+    )
+    return _next_page((await db.execute(_page_statement(post_ids, viewer_id, limit))).all(), limit)
+
+async def get_post_async(db: AsyncSession, post_id: int, viewer_id: Optional[int] = None) -> Optional[Post]:
+    post_ids = select(Post.id.label("post_id")).where(Post.id == post_id)
+    posts, _ = _next_page((await db.execute(_page_statement(post_ids, viewer_id, 1))).all(), 1)
+    return posts[0] if posts else None
+
+async def _commit_counting(db: AsyncSession, model, column: str, row_id: int, delta: int):
+    """
+    Commits, then queues the counter change in the worker's buffer. Without
+    a running buffer (scripts, workers without the feed) the change is made
+    in the transaction instead.
+    """
+    counters = feed.get_feed_counters()
+    if delta and counters is None:
+        await db.execute(feed.counter_statement(model, column), {"row_id": row_id, "delta": delta})
+    await db.commit()
+    if delta and counters is not None:
+        counters.add(model, column, row_id, delta)
+
+async def create_post_async(db: AsyncSession, post: PostCreate, author_id: int) -> Post:
+    """
+    Creates the post and, for authors below the fan-out threshold, pushes it
+    into every follower's timeline in the same transaction.
+    """
+    followers = await db.scalar(select(User.follower_count).where(User.id == author_id)) or 0
+    db_post = Post(
+        **post.model_dump(),
+        author_id=author_id,
+        fanned_out=followers <= settings.FEED_FANOUT_MAX_FOLLOWERS,
+        created_at=datetime.utcnow(),
+    )
+    db.add(db_post)
+    await db.flush()
+    # Authors always see their own posts, whichever way they are delivered
+    recipients = select(literal(author_id).label("user_id"))
+    if db_post.fanned_out:
+        recipients = union_all(recipients, select(Follow.follower_id).where(Follow.followee_id == author_id))
+    recipients = recipients.subquery()
+    await db.execute(
+        insert(TimelineEntry).from_select(["user_id", "post_id"], select(recipients.c.user_id, literal(db_post.id)))
+    )
+    await db.commit()
+    await db.refresh(db_post, attribute_names=["author", "item"])
+    db_post.liked = False
+    return db_post
+
+def bulk_insert_posts(db: Session, rows: List[dict]) -> List[int]:
+    """
+    Inserts many posts and fans them out as create_post_async would; returns
+    their IDs in row order. The caller commits.
+    """
+    now = datetime.utcnow()
+    authors = {row["author_id"] for row in rows}
+    followers = dict(db.execute(select(User.id, User.follower_count).where(User.id.in_(authors))).all())
+    for row in rows:
+        row.setdefault("created_at", now)
+        row["fanned_out"] = (followers.get(row["author_id"]) or 0) <= settings.FEED_FANOUT_MAX_FOLLOWERS
+    post_ids = list(db.scalars(insert(Post).returning(Post.id, sort_by_parameter_order=True), rows))
+    recipients = union_all(
+        select(Post.author_id, Post.id).where(Post.id.in_(post_ids)),
+        select(Follow.follower_id, Post.id)
+        .join(Follow, Follow.followee_id == Post.author_id)
+        .where(Post.id.in_(post_ids), Post.fanned_out.is_(True)),
+    )
+    db.execute(insert(TimelineEntry).from_select(["user_id", "post_id"], recipients))
+    return post_ids
+
+async def like_post_async(db: AsyncSession, post_id: int, user_id: int) -> bool:
+    """
+    Likes the post; returns False if the user already liked it.
+    """
+    result = await db.execute(
+        _insert_ignore(_dialect(db), PostLike).values(post_id=post_id, user_id=user_id, created_at=datetime.utcnow())
+    )
+    liked = result.rowcount == 1
+    await _commit_counting(db, Post, "like_count", post_id, 1 if liked else 0)
+    return liked
+
+async def unlike_post_async(db: AsyncSession, post_id: int, user_id: int) -> bool:
+    result = await db.execute(delete(PostLike).where(PostLike.post_id == post_id, PostLike.user_id == user_id))
+    unliked = result.rowcount == 1
+    await _commit_counting(db, Post, "like_count", post_id, -1 if unliked else 0)
+    return unliked
+
+async def create_comment_async(db: AsyncSession, post_id: int, comment: CommentCreate, author_id: int) -> Comment:
+    db_comment = Comment(**comment.model_dump(), post_id=post_id, author_id=author_id, created_at=datetime.utcnow())
+    db.add(db_comment)
+    await db.flush()
+    await _commit_counting(db, Post, "comment_count", post_id, 1)
+    await db.refresh(db_comment, attribute_names=["author"])
+    return db_comment
+
+async def get_comments_async(
+    db: AsyncSession, post_id: int, cursor: Optional[int] = None, limit: int = 50
+) -> Tuple[List[Comment], Optional[int]]:
+    """
+    Oldest first; the cursor is the last comment ID of the previous page.
+    """
+    statement = (
+        select(Comment)
+        .where(Comment.post_id == post_id, Comment.id > cursor if cursor is not None else literal(True))
+        .options(joinedload(Comment.author))
+        .order_by(Comment.id)
+        .limit(limit + 1)
+    )
+    comments = list(await db.scalars(statement))
+    return comments[:limit], (comments[limit - 1].id if len(comments) > limit else None)
+
+async def follow_async(db: AsyncSession, follower_id: int, followee_id: int) -> bool:
+    """
+    Follows the user and copies their most recent pushed posts into the
+    follower's timeline; their pulled posts are merged in on read anyway.
+    Returns False if already following.
+    """
+    result = await db.execute(
+        _insert_ignore(_dialect(db), Follow).values(
+            follower_id=follower_id, followee_id=followee_id, created_at=datetime.utcnow()
+        )
+    )
+    followed = result.rowcount == 1
+    if followed:
+        recent = (
+            select(literal(follower_id), Post.id)
+            .where(Post.author_id == followee_id, Post.fanned_out.is_(True))
+            .order_by(Post.id.desc())
+            .limit(settings.FEED_FOLLOW_BACKFILL)
+        )
+        await db.execute(_insert_ignore(_dialect(db), TimelineEntry).from_select(["user_id", "post_id"], recent))
+    await _commit_counting(db, User, "follower_count", followee_id, 1 if followed else 0)
+    return followed
+
+async def unfollow_async(db: AsyncSession, follower_id: int, followee_id: int) -> bool:
+    result = await db.execute(delete(Follow).where(Follow.follower_id == follower_id, Follow.followee_id == followee_id))
+    unfollowed = result.rowcount == 1
+    if unfollowed:
+        await db.execute(
+            delete(TimelineEntry).where(
+                TimelineEntry.user_id == follower_id,
+                TimelineEntry.post_id.in_(select(Post.id).where(Post.author_id == followee_id)),
+            )
+        )
+    await _commit_counting(db, User, "follower_count", followee_id, -1 if unfollowed else 0)
+    return unfollowed
@@ -1,28 +1,319 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import func, insert, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.sql import Select
+from typing import Dict, List, Optional, Tuple, Union
 
-from app.models.item import Item
+from app.db import search
+from app.models.item import Item, ItemStatus
+from app.models.user import User
 from app.schemas.item import ItemCreate
+from app.services import activity, item_events
+from app.services.catalogue_cache import bump_statement
 
-def get_item(db: Session, item_id: int) -> Optional[Item]:
+# How to load Item.owner for results that will be serialised with their owner.
+# "joined" and "selectin" load the full User; "slim" joins in only the columns
+# exposed by schemas.User. Pass None to keep the lazy per-owner SELECT.
+OWNER_LOADERS = {
+    "joined": lambda: joinedload(Item.owner),
+    "selectin": lambda: selectinload(Item.owner),
+    "slim": lambda: joinedload(Item.owner).load_only(
+        User.id, User.email, User.username, User.points_balance
+    ),
+}
+
+# The statement builders below are shared by the sync functions (used by
+# scripts and sync routes) and their *_async counterparts (used by async routes).
+
+def _dialect(db: Union[Session, AsyncSession]) -> str:
+    return db.get_bind().dialect.name
+
+def _with_owner(statement: Select, owner_loading: Optional[str]) -> Select:
+    if owner_loading is None:
+        return statement
+    return statement.options(OWNER_LOADERS[owner_loading]())
+
+def _filter_items(
+    statement: Select,
+    dialect: str,
+    category: Optional[str] = None,
+    size: Optional[str] = None,
+    condition: Optional[str] = None,
+    status: Optional[ItemStatus] = None,
+    owner_id: Optional[int] = None,
+    q: Optional[str] = None,
+) -> Select:
+    """
+    Applies the catalogue filters shared by listing and facet queries.
+    """
+    if category is not None:
+        statement = statement.where(Item.category == category)
+    if size is not None:
+        statement = statement.where(Item.size == size)
+    if condition is not None:
+        statement = statement.where(Item.condition == condition)
+    if status is not None:
+        statement = statement.where(Item.status == status)
+    if owner_id is not None:
+        statement = statement.where(Item.owner_id == owner_id)
+    if q:
+        matching_ids = search.matching_ids_clause(q, dialect)
+        if matching_ids is not None:
+            statement = statement.where(Item.id.in_(matching_ids))
+        else:
+            statement = statement.where(
+                Item.title.icontains(q, autoescape=True)
+                | Item.description.icontains(q, autoescape=True)
+            )
+    return statement
+
+def _get_item_statement(item_id: int, owner_loading: Optional[str]) -> Select:
+    return _with_owner(select(Item), owner_loading).where(Item.id == item_id)
+
+def _get_items_statement(skip: int, limit: int, owner_loading: Optional[str]) -> Select:
+    return _with_owner(select(Item), owner_loading).order_by(Item.id).offset(skip).limit(limit)
+
+def _search_items_statement(
+    dialect: str,
+    cursor: Optional[int],
+    skip: int,
+    limit: int,
+    owner_loading: Optional[str],
+    **filters,
+) -> Select:
+    statement = _filter_items(_with_owner(select(Item), owner_loading), dialect, **filters).order_by(Item.id)
+    if cursor is not None:
+        statement = statement.where(Item.id > cursor)
+    elif skip:
+        statement = statement.offset(skip)
+    # Fetch one extra row to know whether another page exists
+    return statement.limit(limit + 1)
+
+def _next_page(items: List[Item], limit: int) -> Tuple[List[Item], Optional[int]]:
+    if len(items) > limit:
+        items = items[:limit]
+        return items, items[-1].id
+    return items, None
+
+def _facets_statement(dialect: str, **filters) -> Select:
+    # Disjunctive faceting: each facet is counted with every filter except
+    # its own, so choosing a category still shows the counts for the others
+    by_category = _filter_items(
+        select(literal("category").label("facet"), Item.category.label("value"), func.count(Item.id)),
+        dialect,
+        **{**filters, "category": None},
+    ).group_by(Item.category)
+    by_condition = _filter_items(
+        select(literal("condition").label("facet"), Item.condition.label("value"), func.count(Item.id)),
+        dialect,
+        **{**filters, "condition": None},
+    ).group_by(Item.condition)
+    return union_all(by_category, by_condition)
+
+def _collect_facets(rows) -> Dict[str, Dict[str, int]]:
+    facets: Dict[str, Dict[str, int]] = {"category": {}, "condition": {}}
+    for facet, value, count in rows:
+        if value is not None:
+            facets[facet][value] = count
+    return facets
+
+def _listed(rows: List[dict]) -> activity.ActivityDeltas:
+    # Stamps created_at on the rows so the counters bucket them on the same day
+    now = datetime.utcnow()
+    listed = Counter()
+    for row in rows:
+        created_at = row.setdefault("created_at", now)
+        listed[row.get("owner_id"), created_at.date()] += 1
+    deltas = activity.ActivityDeltas()
+    for (owner_id, day), count in listed.items():
+        deltas.item_listed(owner_id, day, count)
+    return deltas
+
+def _in_rank_order(items: List[Item], ranked_ids: List[int]) -> List[Item]:
+    by_id = {item.id: item for item in items}
+    return [by_id[item_id] for item_id in ranked_ids if item_id in by_id]
+
+def get_item(db: Session, item_id: int, owner_loading: Optional[str] = "joined") -> Optional[Item]:
     """
     Retrieves a single item by its ID.
     """
-    return db.query(Item).filter(Item.id == item_id).first()
+    return db.scalars(_get_item_statement(item_id, owner_loading)).first()
 
-def get_items(db: Session, skip: int = 0, limit: int = 100) -> List[Item]:
+def get_items(db: Session, skip: int = 0, limit: int = 100, owner_loading: Optional[str] = "joined") -> List[Item]:
     """
     Retrieves a list of items with pagination.
     """
-    return db.query(Item).offset(skip).limit(limit).all()
+    return list(db.scalars(_get_items_statement(skip, limit, owner_loading)))
+
+def search_items(
+    db: Session,
+    cursor: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    owner_loading: Optional[str] = "joined",
+    **filters,
+) -> Tuple[List[Item], Optional[int]]:
+    """
+    Retrieves a filtered page of items using keyset pagination on Item.id.
+    Returns the page and the cursor for the next page (None on the last page).
+    'skip' is only applied when no cursor is given, for legacy offset callers.
+    """
+    statement = _search_items_statement(_dialect(db), cursor, skip, limit, owner_loading, **filters)
+    return _next_page(list(db.scalars(statement)), limit)
+
+def full_text_search_items(
+    db: Session, q: str, limit: int = 20, offset: int = 0, owner_loading: Optional[str] = "joined"
+) -> List[Item]:
+    """
+    Retrieves items matching a full-text query, best match first.
+    """
+    ranked_ids = [item_id for item_id, _ in search.search_item_ids(db, q, limit=limit, offset=offset)]
+    if not ranked_ids:
+        return []
+    statement = _with_owner(select(Item), owner_loading).where(Item.id.in_(ranked_ids))
+    return _in_rank_order(list(db.scalars(statement)), ranked_ids)
+
+def get_item_facets(db: Session, **filters) -> Dict[str, Dict[str, int]]:
+    """
+    Counts the filtered items per category and per condition in a single
+    query; each facet ignores its own filter so the other values stay visible.
+    """
+    return _collect_facets(db.execute(_facets_statement(_dialect(db), **filters)))
 
 def create_user_item(db: Session, item: ItemCreate, user_id: int) -> Item:
     """
     Creates a new item in the database and associates it with a user.
     """
     # The **item.model_dump() unpacks the Pydantic model into a dictionary
-    db_item = Item(**item.model_dump(), owner_id=user_id)
+    db_item = Item(**item.model_dump(), owner_id=user_id, created_at=datetime.utcnow())
     db.add(db_item)
+    deltas = activity.ActivityDeltas()
+    deltas.item_listed(user_id, db_item.created_at)
+    activity.apply(db, deltas)
+    db.execute(bump_statement())
     db.commit()
     db.refresh(db_item)
-    return db_item
\ No newline at end of file
+    item_events.item_available(db_item)
+    return db_item
+
+def bulk_insert_items(db: Session, rows: List[dict]) -> List[int]:
+    """
+    Inserts many items as one batched INSERT and returns their IDs in row
+    order. Does not commit or fire item events; the caller does both once
+    the transaction is done. The activity counters and the catalogue
+    version are updated in the same transaction.
+    """
+    activity.apply(db, _listed(rows))
+    db.execute(bump_statement())
+    statement = insert(Item).returning(Item.id, sort_by_parameter_order=True)
+    if _dialect(db) != "sqlite":
+        return list(db.scalars(statement, rows))
+    # SQLite (3.35+) returns the ids too; the full-text index is filled
+    # afterwards for the id range when the triggers were dropped
+    bulk = len(rows) >= search.SQLITE_BULK_INSERT_MIN_ROWS
+    for begin in search.sqlite_bulk_insert_begin() if bulk else []:
+        db.execute(begin)
+    item_ids = list(db.scalars(statement, rows))
+    for end in search.sqlite_bulk_insert_end(min(item_ids), max(item_ids)) if bulk else []:
+        db.execute(end)
+    return item_ids
+
+async def get_item_async(
+    db: AsyncSession, item_id: int, owner_loading: Optional[str] = "joined"
+) -> Optional[Item]:
+    """
+    Async version of get_item.
+    """
+    return (await db.scalars(_get_item_statement(item_id, owner_loading))).first()
+
+async def item_exists_async(db: AsyncSession, item_id: int) -> bool:
+    return await db.scalar(select(Item.id).where(Item.id == item_id)) is not None
+
+async def get_items_by_ids_async(
+    db: AsyncSession, item_ids: List[int], owner_loading: Optional[str] = "joined"
+) -> List[Item]:
+    """
+    Loads the given items, returned in the order of `item_ids`.
+    """
+    if not item_ids:
+        return []
+    statement = _with_owner(select(Item), owner_loading).where(Item.id.in_(item_ids))
+    return _in_rank_order(list(await db.scalars(statement)), item_ids)
+
+async def get_items_async(
+    db: AsyncSession, skip: int = 0, limit: int = 100, owner_loading: Optional[str] = "joined"
+) -> List[Item]:
+    """
+    Async version of get_items.
+    """
+    return list(await db.scalars(_get_items_statement(skip, limit, owner_loading)))
+
+async def search_items_async(
+    db: AsyncSession,
+    cursor: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    owner_loading: Optional[str] = "joined",
+    **filters,
+) -> Tuple[List[Item], Optional[int]]:
+    """
+    Async version of search_items.
+    """
+    statement = _search_items_statement(_dialect(db), cursor, skip, limit, owner_loading, **filters)
+    return _next_page(list(await db.scalars(statement)), limit)
+
+async def full_text_search_items_async(
+    db: AsyncSession, q: str, limit: int = 20, offset: int = 0, owner_loading: Optional[str] = "joined"
+) -> List[Item]:
+    """
+    Async version of full_text_search_items.
+    """
+    ranked = search.ranked_ids_statement(q, _dialect(db), limit=limit, offset=offset)
+    if ranked is None:
+        return []
+    ranked_ids = [row[0] for row in await db.execute(ranked)]
+    if not ranked_ids:
+        return []
+    statement = _with_owner(select(Item), owner_loading).where(Item.id.in_(ranked_ids))
+    return _in_rank_order(list(await db.scalars(statement)), ranked_ids)
+
+async def get_item_facets_async(db: AsyncSession, **filters) -> Dict[str, Dict[str, int]]:
+    """
+    Async version of get_item_facets.
+    """
+    return _collect_facets(await db.execute(_facets_statement(_dialect(db), **filters)))
+
+async def create_user_item_async(db: AsyncSession, item: ItemCreate, user_id: int) -> Item:
+    """
+    Async version of create_user_item. The owner is loaded as well, since the
+    API serialises it and async sessions cannot lazy-load.
+    """
+    db_item = Item(**item.model_dump(), owner_id=user_id, created_at=datetime.utcnow())
+    db.add(db_item)
+    deltas = activity.ActivityDeltas()
+    deltas.item_listed(user_id, db_item.created_at)
+    await activity.apply_async(db, deltas)
+    await db.execute(bump_statement())
+    await db.commit()
+    await db.refresh(db_item, attribute_names=["owner"])
+    item_events.item_available(db_item)
+    return db_item
+
+async def bulk_insert_items_async(db: AsyncSession, rows: List[dict]) -> List[int]:
+    """
+    Async version of bulk_insert_items.
+    """
+    await activity.apply_async(db, _listed(rows))
+    await db.execute(bump_statement())
+    statement = insert(Item).returning(Item.id, sort_by_parameter_order=True)
+    if _dialect(db) != "sqlite":
+        return list(await db.scalars(statement, rows))
+    bulk = len(rows) >= search.SQLITE_BULK_INSERT_MIN_ROWS
+    for begin in search.sqlite_bulk_insert_begin() if bulk else []:
+        await db.execute(begin)
+    item_ids = list(await db.scalars(statement, rows))
+    for end in search.sqlite_bulk_insert_end(min(item_ids), max(item_ids)) if bulk else []:
+        await db.execute(end)
+    return item_ids
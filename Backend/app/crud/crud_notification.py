@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.models.notification import Notification
+
+async def get_notifications_async(
+    db: AsyncSession, user_id: int, unread_only: bool = False, skip: int = 0, limit: int = 50
+) -> List[Notification]:
+    statement = select(Notification).where(Notification.user_id == user_id)
+    if unread_only:
+        statement = statement.where(Notification.read_at.is_(None))
+    statement = statement.order_by(Notification.id.desc()).offset(skip).limit(limit)
+    return list(await db.scalars(statement))
+
+async def mark_read_async(db: AsyncSession, user_id: int, notification_id: Optional[int] = None) -> int:
+    """
+    Marks one notification, or all of the user's unread ones, as read.
+    Returns how many were updated.
+    """
+    statement = update(Notification).where(
+        Notification.user_id == user_id, Notification.read_at.is_(None)
+    ).values(read_at=datetime.utcnow())
+    if notification_id is not None:
+        statement = statement.where(Notification.id == notification_id)
+    result = await db.execute(statement)
+    await db.commit()
+    return result.rowcount
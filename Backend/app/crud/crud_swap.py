@@ -0,0 +1,181 @@
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+
+from app.core.principal_cache import principal_cache
+from app.models.item import Item, ItemStatus
+from app.models.swap import PointsLedgerEntry, Swap, SwapOfferedItem
+from app.models.user import User
+from app.schemas.swap import SwapCreate
+from app.services import activity, item_events
+from app.services.catalogue_cache import bump_statement
+from app.services.points import item_points
+
+class SwapRejected(Exception):
+    """
+    The swap cannot happen as requested; nothing was changed.
+    """
+    def __init__(self, detail: str, status_code: int = 409):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+async def get_swap_by_key_async(db: AsyncSession, requester_id: int, idempotency_key: str):
+    return (await db.scalars(
+        select(Swap).where(Swap.requester_id == requester_id, Swap.idempotency_key == idempotency_key)
+    )).first()
+
+async def get_swaps_for_user_async(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 50):
+    statement = (
+        select(Swap)
+        .where((Swap.requester_id == user_id) | (Swap.owner_id == user_id))
+        .order_by(Swap.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return (await db.scalars(statement)).all()
+
+async def get_ledger_async(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 50):
+    statement = (
+        select(PointsLedgerEntry)
+        .where(PointsLedgerEntry.user_id == user_id)
+        .order_by(PointsLedgerEntry.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return (await db.scalars(statement)).all()
+
+def _check_replay(swap: Swap, request: SwapCreate):
+    if swap.item_id != request.item_id or sorted(swap.offered_item_ids) != sorted(request.offered_item_ids):
+        raise SwapRejected("Idempotency key was already used for a different swap", status_code=422)
+
+def _transfer(user: User, delta: int, swap: Swap, reason: str) -> PointsLedgerEntry:
+    user.points_balance = (user.points_balance or 0) + delta
+    return PointsLedgerEntry(
+        user_id=user.id, swap_id=swap.id, delta=delta, balance_after=user.points_balance, reason=reason,
+        created_at=swap.created_at,
+    )
+
+async def _lock(db: AsyncSession, model, ids: List[int]) -> dict:
+    # Rows are locked in primary key order so overlapping swaps cannot
+    # deadlock. SQLite has no row locks; there the swap row inserted first
+    # already holds the database write lock, which serialises swaps.
+    statement = (
+        select(model)
+        .where(model.id.in_(ids))
+        .order_by(model.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return {row.id: row for row in (await db.scalars(statement)).all()}
+
+async def create_swap_async(
+    db: AsyncSession, request: SwapCreate, requester_id: int, idempotency_key: Optional[str] = None
+) -> Tuple[Swap, bool]:
+    """
+    Performs the swap in a single transaction and returns (swap, created).
+    Retrying with the same `idempotency_key` returns the original swap with
+    created=False instead of swapping again.
+    Raises SwapRejected if any item is unavailable or a balance is too low.
+    """
+    if idempotency_key:
+        existing = await get_swap_by_key_async(db, requester_id, idempotency_key)
+        if existing is not None:
+            _check_replay(existing, request)
+            return existing, False
+
+    offered_ids = sorted(set(request.offered_item_ids))
+    if request.item_id in offered_ids:
+        raise SwapRejected("An item cannot be offered for itself", status_code=422)
+    target = await db.get(Item, request.item_id)
+    if target is None:
+        raise SwapRejected("Item not found", status_code=404)
+    if target.owner_id is None:
+        # Legacy rows can lack an owner; there is nobody to swap with
+        raise SwapRejected("This item has no owner to swap with")
+    if target.owner_id == requester_id:
+        raise SwapRejected("You cannot swap for your own item", status_code=422)
+
+    swap = Swap(
+        requester_id=requester_id,
+        owner_id=target.owner_id,
+        item_id=target.id,
+        points=0,
+        idempotency_key=idempotency_key or None,
+        offered=[SwapOfferedItem(item_id=item_id) for item_id in offered_ids],
+    )
+    try:
+        db.add(swap)
+        try:
+            # Written first so a concurrent retry with the same key fails here
+            await db.flush()
+        except IntegrityError:
+            await db.rollback()
+            existing = await get_swap_by_key_async(db, requester_id, idempotency_key)
+            if existing is None:
+                raise
+            _check_replay(existing, request)
+            return existing, False
+
+        items = await _lock(db, Item, [target.id] + offered_ids)
+        if len(items) != len(offered_ids) + 1:
+            raise SwapRejected("Offered item not found", status_code=404)
+        target = items[target.id]
+        if target.status != ItemStatus.AVAILABLE:
+            raise SwapRejected("Item is no longer available")
+        for item_id in offered_ids:
+            offered = items[item_id]
+            if offered.owner_id != requester_id:
+                raise SwapRejected("You can only offer your own items", status_code=422)
+            if offered.status != ItemStatus.AVAILABLE:
+                raise SwapRejected(f"Offered item {item_id} is no longer available")
+
+        points = item_points(target.condition, target.category) - sum(
+            item_points(items[item_id].condition, items[item_id].category) for item_id in offered_ids
+        )
+        swap.points = points
+
+        users = await _lock(db, User, [requester_id, target.owner_id])
+        requester, owner = users[requester_id], users[target.owner_id]
+        payer = requester if points > 0 else owner
+        if (payer.points_balance or 0) < abs(points):
+            if payer is requester:
+                raise SwapRejected(f"You need {abs(points) - (payer.points_balance or 0)} more points for this swap")
+            raise SwapRejected("The item owner cannot cover the points difference for this swap")
+
+        # Compare-and-set on status as well, in case a row lock was not available
+        result = await db.execute(
+            update(Item)
+            .where(Item.id.in_(list(items)), Item.status == ItemStatus.AVAILABLE)
+            .values(status=ItemStatus.SWAPPED)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(items):
+            raise SwapRejected("Item is no longer available")
+
+        deltas = activity.ActivityDeltas()
+        deltas.swap_completed(
+            requester_id, target.owner_id, target.category,
+            [items[item_id].category for item_id in offered_ids], swap.created_at,
+        )
+        if points:
+            entries = [
+                _transfer(requester, -points, swap, "swap_paid" if points > 0 else "swap_received"),
+                _transfer(owner, points, swap, "swap_received" if points > 0 else "swap_paid"),
+            ]
+            db.add_all(entries)
+            for entry in entries:
+                deltas.points_moved(entry.user_id, entry.delta, swap.created_at)
+        await activity.apply_async(db, deltas)
+        await db.execute(bump_statement())
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+
+    # Balances changed: drop cached principals in this process
+    principal_cache.invalidate(requester.username)
+    principal_cache.invalidate(owner.username)
+    item_events.items_unavailable(items)
+    return swap, True
@@ -1,3 +1,6 @@
+from typing import List
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate
@@ -19,4 +22,34 @@ def create_user(db: Session, user: UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    return db_user
+
+def bulk_insert_users(db: Session, rows: List[dict]) -> List[int]:
+    """
+    Inserts many users (rows carry an already hashed password) as one
+    batched INSERT and returns their IDs in row order. Does not commit.
+    """
+    statement = insert(User).returning(User.id, sort_by_parameter_order=True)
+    return list(db.scalars(statement, rows))
+
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    return (await db.scalars(select(User).where(User.email == email))).first()
+
+async def get_user_by_username_async(db: AsyncSession, username: str):
+    return (await db.scalars(select(User).where(User.username == username))).first()
+
+async def create_user_async(db: AsyncSession, user: UserCreate, hashed_password: str):
+    """Hashing is left to the caller so it can run off the event loop"""
+    db_user = User(
+        email=user.email,
+        username=user.username,
+        hashed_password=hashed_password,
+    )
+    db.add(db_user)
+    await db.commit()
+    return db_user
+
+async def update_password_hash_async(db: AsyncSession, user: User, hashed_password: str):
+    user.hashed_password = hashed_password
+    await db.commit()
+    return user
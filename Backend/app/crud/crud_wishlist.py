@@ -0,0 +1,48 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.models.match import SwapSuggestion, SwapSuggestionLeg
+from app.models.wishlist import WishlistEntry
+from app.schemas.wishlist import WishlistEntryCreate
+from app.services import notifications
+
+async def get_wishlist_async(db: AsyncSession, user_id: int) -> List[WishlistEntry]:
+    statement = select(WishlistEntry).where(WishlistEntry.user_id == user_id).order_by(WishlistEntry.id)
+    return list(await db.scalars(statement))
+
+async def create_wishlist_entry_async(db: AsyncSession, entry: WishlistEntryCreate, user_id: int) -> WishlistEntry:
+    db_entry = WishlistEntry(**entry.model_dump(), user_id=user_id)
+    db.add(db_entry)
+    await db.commit()
+    # The swap graph (and numpy) load on first use, not with the app
+    from app.services import matching
+
+    matching.want_added(db_entry)
+    notifications.search_added(db_entry)
+    return db_entry
+
+async def delete_wishlist_entry_async(db: AsyncSession, entry_id: int, user_id: int) -> Optional[WishlistEntry]:
+    db_entry = await db.get(WishlistEntry, entry_id)
+    if db_entry is None or db_entry.user_id != user_id:
+        return None
+    await db.delete(db_entry)
+    await db.commit()
+    from app.services import matching
+
+    matching.want_removed(entry_id)
+    notifications.search_removed(entry_id)
+    return db_entry
+
+async def get_suggestions_for_user_async(db: AsyncSession, user_id: int, limit: int = 20) -> List[SwapSuggestion]:
+    """
+    Suggestions from the latest nightly run that the user takes part in.
+    """
+    statement = (
+        select(SwapSuggestion)
+        .join(SwapSuggestionLeg)
+        .where(SwapSuggestionLeg.receiver_id == user_id)
+        .order_by(SwapSuggestion.batch.desc(), SwapSuggestion.score.desc())
+        .limit(limit)
+    )
+    return list(await db.scalars(statement))
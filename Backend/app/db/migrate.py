@@ -0,0 +1,126 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+# create_all only creates missing tables, so columns added to existing tables
+# are listed here and added with ALTER TABLE, then indexed. Timestamps are
+# backfilled with the current time; other types carry a DEFAULT.
+# (table, column, SQL type, indexed)
+ADDED_COLUMNS = [
+    ("items", "updated_at", "TIMESTAMP", True),
+    ("users", "updated_at", "TIMESTAMP", True),
+    ("items", "created_at", "TIMESTAMP", False),
+    ("users", "follower_count", "INTEGER NOT NULL DEFAULT 0", False),
+]
+
+# Tables that were renamed: (old name, new name). Renamed before create_all
+# runs, so it does not create an empty table under the new name.
+RENAMED_TABLES = [
+    ("swapsuggestions", "swap_suggestions"),
+]
+
+# Indexes added to columns that already existed; create_all only indexes
+# tables it creates. (table, column), named as SQLAlchemy names index=True.
+ADDED_INDEXES = [
+    ("items", "category"),
+    ("items", "condition"),
+    ("items", "status"),
+    ("items", "owner_id"),
+]
+
+def rename_tables(bind: Engine) -> None:
+    """
+    Renames any table in RENAMED_TABLES that still has its old name.
+    Safe to call on every startup.
+    """
+    with bind.begin() as conn:
+        tables = set(inspect(conn).get_table_names())
+        for old, new in RENAMED_TABLES:
+            if old in tables and new not in tables:
+                conn.execute(text(f"ALTER TABLE {old} RENAME TO {new}"))
+
+def add_missing_columns(bind: Engine) -> None:
+    """
+    Adds any column in ADDED_COLUMNS that an existing table lacks.
+    Safe to call on every startup.
+    """
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        tables = set(inspector.get_table_names())
+        for table, column, sql_type, indexed in ADDED_COLUMNS:
+            if table not in tables:
+                continue
+            if column in {existing["name"] for existing in inspector.get_columns(table)}:
+                continue
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}"))
+            if sql_type == "TIMESTAMP":
+                conn.execute(text(f"UPDATE {table} SET {column} = :now"), {"now": datetime.utcnow()})
+            if indexed:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})"))
+
+def add_missing_indexes(bind: Engine) -> None:
+    """
+    Creates any index in ADDED_INDEXES on an existing table.
+    Safe to call on every startup.
+    """
+    with bind.begin() as conn:
+        tables = set(inspect(conn).get_table_names())
+        for table, column in ADDED_INDEXES:
+            if table in tables:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})"))
+
+def add_catalogue_state(bind: Engine) -> None:
+    """
+    Creates the catalogue change counter row if it is missing.
+    Safe to call on every startup.
+    """
+    from sqlalchemy import insert, select
+    from app.models.item import CatalogueState
+
+    with bind.begin() as conn:
+        if conn.scalar(select(CatalogueState.id).where(CatalogueState.id == 1)) is None:
+            conn.execute(insert(CatalogueState).values(id=1, version=0, changed_at=datetime.utcnow()))
+
+def migrate(bind: Optional[Engine] = None) -> None:
+    """
+    Brings the schema up to date: renames tables, creates missing ones, adds
+    missing columns and indexes, the catalogue change counter and the
+    full-text index, and fills newly created activity counters. Every step
+    is idempotent.
+    """
+    import app.models  # noqa: F401  registers the tables
+    from app.db.base import Base
+    from app.db.search import create_search_index
+
+    if bind is None:
+        from app.db.session import engine as bind
+    rename_tables(bind)
+    existing = set(inspect(bind).get_table_names())
+    Base.metadata.create_all(bind=bind)
+    add_missing_columns(bind)
+    add_missing_indexes(bind)
+    add_catalogue_state(bind)
+    create_search_index(bind)
+    if "activity_totals" not in existing:
+        # First run with the activity counters: fill them from existing data
+        from sqlalchemy.orm import Session
+        from app.services.activity import rebuild
+        with Session(bind) as db:
+            rebuild(db)
+
+def main():
+    """
+    Deploy step: python -m app.db.migrate
+    Run before starting workers that have AUTO_MIGRATE=0.
+    """
+    import time
+    from app.db.session import engine
+
+    started = time.perf_counter()
+    migrate(engine)
+    print(f"schema up to date on {engine.url.render_as_string(hide_password=True)} in {time.perf_counter() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+class QueryCounter:
+    """
+    Collects the SQL statements executed while it is active.
+    """
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+_current_counter: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.statements.append(statement)
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """
+    Counts the queries issued in the current context, including sync endpoints
+    that FastAPI runs in its threadpool (they inherit the caller's context).
+
+        with count_queries() as counter:
+            crud_item.get_items(db, limit=100)
+        assert counter.count == 1
+
+    TestClient runs the app in another thread, so to guard whole requests set
+    QUERY_BUDGET_PER_REQUEST, which wraps every request in assert_max_queries.
+    """
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryCounter]:
+    """
+    Like count_queries, but raises QueryBudgetExceeded when more than
+    `limit` queries ran, listing them so N+1 patterns are easy to spot.
+    """
+    with count_queries() as counter:
+        yield counter
+    if counter.count > limit:
+        statements = "\n".join(counter.statements)
+        raise QueryBudgetExceeded(
+            f"Expected at most {limit} queries, {counter.count} were executed:\n{statements}"
+        )
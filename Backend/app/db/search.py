@@ -0,0 +1,174 @@
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import literal, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Executable
+from sqlalchemy.sql.elements import TextClause
+
+# Full-text index over items.title and items.description.
+# SQLite uses an external-content FTS5 table kept in sync by triggers, so every
+# write to `items` (including crud_item.create_user_item) updates the index in
+# the same transaction. Postgres uses a generated, GIN-indexed tsvector column.
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+        title, description,
+        content='items', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE OF title, description ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO items_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+_POSTGRES_DDL = [
+    """
+    ALTER TABLE items ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_items_search_vector ON items USING GIN (search_vector)",
+]
+
+def create_search_index(bind: Engine) -> None:
+    """
+    Creates the full-text index for the current database and backfills it.
+    Safe to call on every startup.
+    """
+    with bind.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = 'items_fts'")
+            ).first()
+            for statement in _SQLITE_DDL:
+                conn.execute(text(statement))
+            if not exists:
+                # Index rows that were written before the FTS table existed
+                conn.execute(text("INSERT INTO items_fts(items_fts) VALUES ('rebuild')"))
+        elif conn.dialect.name == "postgresql":
+            for statement in _POSTGRES_DDL:
+                conn.execute(text(statement))
+
+# Indexing row by row through the insert trigger costs far more than the
+# insert itself, so bulk inserts on SQLite drop the trigger, insert, index the
+# new rows in one INSERT ... SELECT and recreate the trigger. SQLite DDL is
+# transactional and the transaction holds the write lock, so other
+# connections never see the table without its trigger.
+SQLITE_BULK_INSERT_MIN_ROWS = 100
+
+def sqlite_bulk_insert_begin() -> List[TextClause]:
+    return [text("DROP TRIGGER IF EXISTS items_fts_ai")]
+
+def sqlite_bulk_insert_end(first_id: int, last_id: int) -> List[TextClause]:
+    return [
+        text(
+            "INSERT INTO items_fts(rowid, title, description) "
+            "SELECT id, title, description FROM items WHERE id BETWEEN :first_id AND :last_id"
+        ).bindparams(first_id=first_id, last_id=last_id),
+        text(_SQLITE_DDL[1]),
+    ]
+
+def _tokens(q: str) -> List[str]:
+    return [token.lower() for token in _TOKEN_RE.findall(q)]
+
+def build_match_query(q: str, dialect: str) -> Optional[str]:
+    """
+    Turns free text into a backend query string where every term must match.
+    The last term is matched as a prefix so partially typed words still hit.
+    Returns None when the text contains no searchable terms.
+    """
+    tokens = _tokens(q)
+    if not tokens:
+        return None
+    if dialect == "postgresql":
+        terms = tokens[:-1] + [tokens[-1] + ":*"]
+        return " & ".join(terms)
+    terms = [f'"{token}"' for token in tokens[:-1]] + [f'"{tokens[-1]}"*']
+    return " ".join(terms)
+
+def matching_ids_clause(q: str, dialect: str) -> Optional[TextClause]:
+    """
+    Returns a SELECT of matching item IDs, for use with Item.id.in_(...).
+    """
+    match = build_match_query(q, dialect)
+    if match is None:
+        return None
+    if dialect == "sqlite":
+        return text("SELECT rowid FROM items_fts WHERE items_fts MATCH :fts_match").bindparams(fts_match=match)
+    if dialect == "postgresql":
+        return text(
+            "SELECT id FROM items WHERE search_vector @@ to_tsquery('english', :fts_match)"
+        ).bindparams(fts_match=match)
+    return None
+
+def ranked_ids_statement(q: str, dialect: str, limit: int = 20, offset: int = 0) -> Optional[Executable]:
+    """
+    Returns a statement selecting (item_id, score) pairs ordered best match first,
+    or None when the text contains no searchable terms.
+    SQLite ranks with BM25 (title weighted above description); Postgres ranks
+    with ts_rank_cd over the weighted tsvector. Other databases have no index,
+    so they get the catalogue's substring match, unranked, in ID order.
+    """
+    match = build_match_query(q, dialect)
+    if match is None:
+        return None
+    if dialect == "sqlite":
+        # bm25() is lower-is-better, so negate it into a conventional score
+        statement = text(
+            "SELECT rowid, -bm25(items_fts, 10.0, 1.0) AS score FROM items_fts "
+            "WHERE items_fts MATCH :match ORDER BY bm25(items_fts, 10.0, 1.0) "
+            "LIMIT :limit OFFSET :offset"
+        )
+    elif dialect == "postgresql":
+        statement = text(
+            "SELECT id, ts_rank_cd(search_vector, query) AS score "
+            "FROM items, to_tsquery('english', :match) AS query "
+            "WHERE search_vector @@ query ORDER BY score DESC, id "
+            "LIMIT :limit OFFSET :offset"
+        )
+    else:
+        from app.models.item import Item
+
+        return (
+            select(Item.id, literal(0.0).label("score"))
+            .where(Item.title.icontains(q, autoescape=True) | Item.description.icontains(q, autoescape=True))
+            .order_by(Item.id)
+            .limit(limit)
+            .offset(offset)
+        )
+    return statement.bindparams(match=match, limit=limit, offset=offset)
+
+def search_item_ids(db: Session, q: str, limit: int = 20, offset: int = 0) -> List[Tuple[int, float]]:
+    """
+    Returns (item_id, score) pairs ordered best match first.
+    """
+    statement = ranked_ids_statement(q, db.get_bind().dialect.name, limit=limit, offset=offset)
+    if statement is None:
+        return []
+    return [(row[0], float(row[1])) for row in db.execute(statement)]
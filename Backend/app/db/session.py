@@ -1,6 +1,51 @@
+from typing import Optional
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.instrumentation import register_stats
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+# Drivers used by the async engine when ASYNC_DATABASE_URL is not set
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def async_url(url: str) -> str:
+    """
+    Maps a sync database URL onto the matching asyncio driver.
+    """
+    scheme, _, rest = url.partition("://")
+    driver = _ASYNC_DRIVERS.get(scheme.split("+")[0], scheme)
+    return f"{driver}://{rest}"
+
+def pool_options(url: str) -> dict:
+    # In-memory SQLite uses a single shared connection, so sizing does not apply
+    if url.startswith("sqlite") and ":memory:" in url:
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+# Sync engine: used by scripts and by routes that still run in the threadpool
+engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, **pool_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine: used by async routes so queries never block the event loop
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or async_url(settings.DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True, **pool_options(ASYNC_DATABASE_URL))
+# expire_on_commit=False so returned objects stay readable after commit without another await
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def pool_stats() -> Optional[dict]:
+    # Pools without sizing (in-memory SQLite) have nothing to report
+    pool = engine.pool
+    if not hasattr(pool, "checkedout"):
+        return None
+    return {"size": pool.size(), "checked_out": pool.checkedout(), "overflow": pool.overflow()}
+
+register_stats("db_pool", pool_stats)
@@ -1,14 +1,42 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from starlette.middleware.cors import CORSMiddleware
 from app.api.api_router import api_router
-from app.db.base import Base
+from app.core.config import settings
+from app.core.instrumentation import InstrumentationMiddleware, install_sql_hooks, render_metrics
+from app.db.migrate import migrate
+from app.db.query_counter import assert_max_queries
 from app.db.session import engine
+from app.services.feed import start_feed, stop_feed
+from app.services.llm_gateway import close_llm_gateway
+from app.services.notifications import start_notifications, stop_notifications
+from app.services.password_hasher import shutdown_password_hasher
+from app.services.sentiment import stop_sentiment
+from app.services.speech import shutdown_speech_pipeline
 
-# Create all tables
-# In a production app, you would use Alembic for migrations
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.AUTO_MIGRATE:
+        # Convenient in development; production runs `python -m app.db.migrate` once per deploy
+        await asyncio.to_thread(migrate, engine)
+    if "notifications" in settings.FEATURES:
+        await start_notifications()
+    if "feed" in settings.FEATURES:
+        await start_feed()
+    if "chatbot" in settings.FEATURES:
+        from app.api.endpoints.chatbot import start_chatbot
+        await start_chatbot()
+    yield
+    await stop_notifications()
+    await stop_feed()
+    await stop_sentiment()
+    await close_llm_gateway()
+    shutdown_speech_pipeline()
+    shutdown_password_hasher()
 
-app = FastAPI(title="ReWear API")
+app = FastAPI(title="ReWear API", lifespan=lifespan)
 
 # Set all CORS enabled origins
 app.add_middleware(
@@ -17,8 +45,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+if settings.QUERY_BUDGET_PER_REQUEST:
+    # Used in CI so N+1 query regressions fail loudly instead of silently slowing pages
+    @app.middleware("http")
+    async def enforce_query_budget(request, call_next):
+        with assert_max_queries(settings.QUERY_BUDGET_PER_REQUEST):
+            return await call_next(request)
+
+if settings.METRICS_ENABLED:
+    # Added last so it wraps everything else and times the whole request
+    install_sql_hooks()
+    app.add_middleware(InstrumentationMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/")
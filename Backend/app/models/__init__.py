@@ -1,2 +1,9 @@
 from .user import User
-from .item import Item
+from .item import Item, CatalogueState
+from .swap import Swap, SwapOfferedItem, PointsLedgerEntry
+from .wishlist import WishlistEntry
+from .match import SwapSuggestion, SwapSuggestionLeg
+from .notification import Notification
+from .chat_sentiment import ChatSentiment
+from .activity import ActivityTotals, ActivityRollup
+from .feed import Follow, Post, TimelineEntry, PostLike, Comment
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, Float, Date
+from app.db.base import Base
+
+class ActivityTotals(Base):
+    """
+    Running activity and impact counters for one user, or one shard of the
+    whole community's when `user_id` is 0 or negative. Maintained in the same transaction as the
+    writes they count (see app.services.activity), so a dashboard is a
+    primary key lookup.
+    """
+    __tablename__ = "activity_totals"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    items_listed = Column(Integer, nullable=False, default=0)
+    items_available = Column(Integer, nullable=False, default=0)
+    swaps_completed = Column(Integer, nullable=False, default=0)
+    points_earned = Column(Integer, nullable=False, default=0)
+    co2_saved_kg = Column(Float, nullable=False, default=0.0)
+    water_saved_l = Column(Float, nullable=False, default=0.0)
+
+class ActivityRollup(Base):
+    """
+    The same counters as ActivityTotals, counted per day or per week (the
+    bucket is the Monday starting it) for charts.
+    """
+    __tablename__ = "activity_rollups"
+
+    period = Column(String, primary_key=True)
+    bucket = Column(Date, primary_key=True)
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    items_listed = Column(Integer, nullable=False, default=0)
+    items_available = Column(Integer, nullable=False, default=0)
+    swaps_completed = Column(Integer, nullable=False, default=0)
+    points_earned = Column(Integer, nullable=False, default=0)
+    co2_saved_kg = Column(Float, nullable=False, default=0.0)
+    water_saved_l = Column(Float, nullable=False, default=0.0)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from datetime import datetime
+from app.db.base import Base
+
+class ChatSentiment(Base):
+    """
+    Sentiment of one chat or voice message, recorded when SENTIMENT_PERSIST
+    is on. Group by `session_id` for per-conversation figures.
+    """
+    __tablename__ = "chat_sentiments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(String, nullable=True, index=True)
+    polarity = Column(Float, nullable=False)
+    label = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
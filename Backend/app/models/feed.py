@@ -0,0 +1,76 @@
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.db.base import Base
+
+class Follow(Base):
+    """
+    `follower_id` sees `followee_id`'s posts on their home timeline.
+    `User.follower_count` is the materialised count of these rows.
+    """
+    __tablename__ = "follows"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    follower_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    followee_id = Column(Integer, ForeignKey("users.id"), primary_key=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class Post(Base):
+    """
+    A community post, optionally about an item. `fanned_out` is whether it
+    was pushed into followers' timelines when written; posts by accounts
+    with more than FEED_FANOUT_MAX_FOLLOWERS followers are not, and home
+    timelines pull them instead. The counts are denormalised and updated in
+    batches, so they can lag by a few seconds.
+    """
+    __table_args__ = (
+        Index("ix_posts_author_id_id", "author_id", "id"),
+        # Only pulled posts; keeps the pull side of a home timeline small
+        Index(
+            "ix_posts_pulled", "author_id", "id",
+            sqlite_where=Column("fanned_out").is_(False), postgresql_where=Column("fanned_out").is_(False),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    item_id = Column(Integer, ForeignKey("items.id"), nullable=True, index=True)
+    body = Column(String, nullable=False)
+    fanned_out = Column(Boolean, nullable=False, default=True)
+    like_count = Column(Integer, nullable=False, default=0)
+    comment_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    author = relationship("User")
+    item = relationship("Item")
+
+class TimelineEntry(Base):
+    """
+    A post pushed into a user's home timeline. Two integers per row, keyed
+    for newest-first range scans; post ids double as the pagination cursor.
+    Trimmed to the newest FEED_TIMELINE_MAX entries per user.
+    """
+    __tablename__ = "timeline_entries"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    post_id = Column(Integer, primary_key=True, autoincrement=False)
+
+class PostLike(Base):
+    __tablename__ = "post_likes"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    post_id = Column(Integer, ForeignKey("posts.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class Comment(Base):
+    __table_args__ = (Index("ix_comments_post_id_id", "post_id", "id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    body = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    author = relationship("User")
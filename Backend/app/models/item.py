@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, DateTime
 from sqlalchemy.orm import relationship
+from datetime import datetime
 from app.db.base import Base
 import enum
 
@@ -12,10 +13,27 @@ class Item(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True, nullable=False)
     description = Column(String)
-    category = Column(String)
+    category = Column(String, index=True)
     size = Column(String)
-    condition = Column(String)
-    status = Column(Enum(ItemStatus), default=ItemStatus.AVAILABLE, nullable=False)
-    owner_id = Column(Integer, ForeignKey("users.id"))
+    condition = Column(String, index=True)
+    status = Column(Enum(ItemStatus), default=ItemStatus.AVAILABLE, nullable=False, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
+    # Bumped on every write; exports use it for "changed since" syncs
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
 
-    owner = relationship("User", back_populates="items")
\ No newline at end of file
+    owner = relationship("User", back_populates="items")
+
+class CatalogueState(Base):
+    """
+    One row (id 1) counting catalogue changes. Every item write bumps
+    `version` in its own transaction, so the count cannot miss a write the
+    way comparing timestamps from different workers' clocks can. The public
+    catalogue's ETag is derived from it (see app.services.catalogue_cache).
+    """
+    __tablename__ = "catalogue_state"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(Integer, nullable=False, default=0)
+    # Never moves backwards, even when a worker's clock is behind
+    changed_at = Column(DateTime, nullable=False)
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.db.base import Base
+
+class SwapSuggestion(Base):
+    """
+    A swap cycle found by the nightly matching run. All suggestions from
+    one run share `batch`.
+    """
+    __tablename__ = "swap_suggestions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    batch = Column(Integer, nullable=False, index=True)
+    score = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    legs = relationship(
+        "SwapSuggestionLeg", lazy="selectin", cascade="all, delete-orphan", order_by="SwapSuggestionLeg.position"
+    )
+
+class SwapSuggestionLeg(Base):
+    """`receiver_id` gets `item_id` from `giver_id`"""
+    __tablename__ = "swap_suggestion_legs"
+
+    suggestion_id = Column(Integer, ForeignKey("swap_suggestions.id"), primary_key=True)
+    position = Column(Integer, primary_key=True)
+    receiver_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    giver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    item_id = Column(Integer, ForeignKey("items.id"), nullable=False)
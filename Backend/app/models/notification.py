@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from datetime import datetime
+from app.db.base import Base
+
+class Notification(Base):
+    """
+    A digest for one user, e.g. several new listings matching their wishlist.
+    `item_ids` is a comma-separated list of at most NOTIFY_MAX_ITEMS_PER_DIGEST
+    ids; `total` counts every match, including ones not listed.
+    """
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    kind = Column(String, nullable=False)
+    message = Column(String, nullable=False)
+    item_ids = Column(String, nullable=False, default="")
+    total = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    read_at = Column(DateTime, nullable=True)
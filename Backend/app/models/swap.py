@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.db.base import Base
+
+class Swap(Base):
+    """
+    A completed swap or redemption of `item_id`. The requester gives up the
+    offered items (none for a plain redemption) and pays `points`, the target
+    item's value minus the offered items' value, to the owner; a negative
+    amount is paid by the owner instead.
+    """
+    __table_args__ = (UniqueConstraint("requester_id", "idempotency_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    requester_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    item_id = Column(Integer, ForeignKey("items.id"), nullable=False, index=True)
+    points = Column(Integer, nullable=False)
+    idempotency_key = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    offered = relationship("SwapOfferedItem", lazy="selectin", cascade="all, delete-orphan")
+
+    @property
+    def offered_item_ids(self):
+        return [offered.item_id for offered in self.offered]
+
+class SwapOfferedItem(Base):
+    __tablename__ = "swap_offered_items"
+
+    swap_id = Column(Integer, ForeignKey("swaps.id"), primary_key=True)
+    item_id = Column(Integer, ForeignKey("items.id"), primary_key=True)
+
+class PointsLedgerEntry(Base):
+    """
+    Append-only record of every points movement. `User.points_balance` is
+    the materialised balance; `balance_after` is its value right after this
+    entry, so the two can be reconciled.
+    """
+    __tablename__ = "points_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    swap_id = Column(Integer, ForeignKey("swaps.id"), nullable=True, index=True)
+    delta = Column(Integer, nullable=False)
+    balance_after = Column(Integer, nullable=False)
+    reason = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
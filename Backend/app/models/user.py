@@ -9,7 +9,11 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     points_balance = Column(Integer, default=10) # Start with some points
+    # Materialised count of Follow rows; updated in batches by the feed
+    follower_count = Column(Integer, nullable=False, default=0)
     is_admin = Column(Boolean(), default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped on every write; exports use it for "changed since" syncs
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     items = relationship("Item", back_populates="owner")
\ No newline at end of file
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from datetime import datetime
+from app.db.base import Base
+
+class WishlistEntry(Base):
+    """
+    Something a user would like to receive: either one specific item, or any
+    item in `category`, optionally narrowed by size, minimum condition and
+    keywords that must all appear in the title or description.
+    """
+    __tablename__ = "wishlist_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    item_id = Column(Integer, ForeignKey("items.id"), nullable=True, index=True)
+    category = Column(String, nullable=True, index=True)
+    size = Column(String, nullable=True)
+    min_condition = Column(String, nullable=True)
+    keywords = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,3 +1,9 @@
 from .user import User, UserCreate, UserBase
-from .item import Item, ItemCreate, ItemBase
-from .token import Token, TokenData
+from .item import Item, ItemCreate, ItemBase, ItemFacets, ItemImportError, ItemImportResult
+from .token import Token, TokenData, Principal
+from .swap import Swap, SwapCreate, LedgerEntry
+from .wishlist import WishlistEntry, WishlistEntryCreate
+from .match import SwapCycle, SwapLeg
+from .notification import Notification
+from .activity import ActivityTotals, ActivityBucket
+from .feed import Post, PostCreate, Comment, CommentCreate, FeedUser, FeedItem
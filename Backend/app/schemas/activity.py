@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from datetime import date
+
+class ActivityTotals(BaseModel):
+    items_listed: int = 0
+    # Listed and not yet swapped away
+    items_available: int = 0
+    swaps_completed: int = 0
+    points_earned: int = 0
+    # Estimated savings from reusing the items received in swaps
+    co2_saved_kg: float = 0.0
+    water_saved_l: float = 0.0
+
+    class Config:
+        from_attributes = True
+
+class ActivityBucket(ActivityTotals):
+    period: str
+    # The day, or the Monday starting the week
+    bucket: date
@@ -0,0 +1,54 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from app.models.item import ItemStatus
+
+class PostCreate(BaseModel):
+    body: str = Field(..., min_length=1, max_length=2000)
+    # Share one of the catalogue's items with the post
+    item_id: Optional[int] = None
+
+class FeedUser(BaseModel):
+    id: int
+    username: str
+
+    class Config:
+        from_attributes = True
+
+class FeedItem(BaseModel):
+    id: int
+    title: str
+    category: Optional[str] = None
+    condition: Optional[str] = None
+    status: ItemStatus
+
+    class Config:
+        from_attributes = True
+
+class Post(BaseModel):
+    id: int
+    author: FeedUser
+    item: Optional[FeedItem] = None
+    body: str
+    # Updated in batches, so a new like can take a few seconds to show
+    like_count: int
+    comment_count: int
+    # Whether the requesting user liked it
+    liked: bool = False
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class CommentCreate(BaseModel):
+    body: str = Field(..., min_length=1, max_length=1000)
+
+class Comment(BaseModel):
+    id: int
+    post_id: int
+    author: FeedUser
+    body: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
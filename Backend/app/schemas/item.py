@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, List, Optional
 from .user import User # Import User schema to nest it
 from app.models.item import ItemStatus
 
@@ -15,9 +15,23 @@ class ItemCreate(ItemBase):
 
 class Item(ItemBase):
     id: int
-    owner_id: int
+    owner_id: Optional[int] = None # None on legacy rows; items.owner_id is nullable
     status: ItemStatus
-    owner: User # Nested user information
+    owner: Optional[User] = None # Nested user information
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ItemFacets(BaseModel):
+    category: Dict[str, int]
+    condition: Dict[str, int]
+
+class ItemImportError(BaseModel):
+    line: int
+    error: str
+
+class ItemImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ItemImportError] # First IMPORT_MAX_ERRORS failures
+    errors_truncated: bool = False
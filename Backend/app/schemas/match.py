@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import List
+
+class SwapLeg(BaseModel):
+    receiver_id: int
+    giver_id: int
+    item_id: int
+
+    class Config:
+        from_attributes = True
+
+class SwapCycle(BaseModel):
+    score: float
+    legs: List[SwapLeg]
+
+    class Config:
+        from_attributes = True
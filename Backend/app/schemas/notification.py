@@ -0,0 +1,22 @@
+from pydantic import BaseModel, field_validator
+from typing import List, Optional
+from datetime import datetime
+
+class Notification(BaseModel):
+    id: int
+    kind: str
+    message: str
+    item_ids: List[int]
+    total: int
+    created_at: datetime
+    read_at: Optional[datetime] = None
+
+    @field_validator("item_ids", mode="before")
+    @classmethod
+    def split_ids(cls, value):
+        if isinstance(value, str):
+            return [int(item_id) for item_id in value.split(",") if item_id]
+        return value
+
+    class Config:
+        from_attributes = True
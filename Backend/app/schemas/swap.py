@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class SwapCreate(BaseModel):
+    item_id: int
+    # Leave empty to redeem the item with points only
+    offered_item_ids: List[int] = []
+
+class Swap(BaseModel):
+    id: int
+    requester_id: int
+    owner_id: int
+    item_id: int
+    offered_item_ids: List[int]
+    points: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class LedgerEntry(BaseModel):
+    id: int
+    swap_id: Optional[int] = None
+    delta: int
+    balance_after: int
+    reason: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
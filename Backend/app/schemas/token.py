@@ -6,4 +6,16 @@ class Token(BaseModel):
     token_type: str
 
 class TokenData(BaseModel):
-    username: Optional[str] = None
\ No newline at end of file
+    username: Optional[str] = None
+
+# Authenticated user as seen by route handlers. Built from the database on a
+# principal cache miss, or straight from token claims on the fast path.
+class Principal(BaseModel):
+    id: int
+    username: str
+    email: Optional[str] = None
+    is_admin: bool = False
+    points_balance: int = 0
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,25 @@
+from pydantic import BaseModel, model_validator
+from typing import Optional
+from datetime import datetime
+
+class WishlistEntryBase(BaseModel):
+    item_id: Optional[int] = None
+    category: Optional[str] = None
+    size: Optional[str] = None
+    min_condition: Optional[str] = None
+    keywords: Optional[str] = None
+
+class WishlistEntryCreate(WishlistEntryBase):
+    @model_validator(mode="after")
+    def check_target(self):
+        if self.item_id is None and not self.category:
+            raise ValueError("Either item_id or category is required")
+        return self
+
+class WishlistEntry(WishlistEntryBase):
+    id: int
+    user_id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,312 @@
+import random
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import bindparam, delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Executable
+
+from app.core.config import settings
+from app.models.activity import ActivityRollup, ActivityTotals
+
+# Materialised activity and impact counters for the sustainability tracker.
+#
+# Every write that changes a counted figure (listing items, completing a
+# swap, moving points) collects its changes in an ActivityDeltas and applies
+# them with apply()/apply_async() before it commits, so the counters commit
+# or roll back with the rows they count. Each change is an upsert that adds
+# to the stored value, so concurrent writers never overwrite one another.
+#
+# rebuild() recomputes everything from items, swaps and the points ledger;
+# verify() does the same without writing and reports any drift.
+#
+# Every write also counts towards the community figures, so those are split
+# over ACTIVITY_COMMUNITY_SHARDS rows: user ids 0, -1, -2, ... Each
+# transaction adds to one shard picked at random and reads sum them, so
+# concurrent writers seldom update the same row.
+
+COMMUNITY = 0
+PERIODS = ("day", "week")
+METRICS = ("items_listed", "items_available", "swaps_completed", "points_earned", "co2_saved_kg", "water_saved_l")
+
+# Rough savings from reusing one item instead of making a new one:
+# (kg CO2e, litres of water). Estimates for display, not an audit.
+IMPACT_PER_ITEM = {
+    "Clothes": (8.0, 2700.0),
+    "Footwear": (14.0, 8000.0),
+    "Accessories": (3.0, 500.0),
+}
+DEFAULT_IMPACT = (6.0, 2000.0)
+
+def item_impact(category: Optional[str]) -> Tuple[float, float]:
+    return IMPACT_PER_ITEM.get(category, DEFAULT_IMPACT)
+
+def is_community(user_id: int) -> bool:
+    """
+    True for any of the community's shard rows.
+    """
+    return user_id <= COMMUNITY
+
+def community_shard() -> int:
+    """
+    A random community shard for one transaction's deltas.
+    """
+    return -random.randrange(max(settings.ACTIVITY_COMMUNITY_SHARDS, 1))
+
+def bucket_start(period: str, day: date) -> date:
+    """The day itself, or the Monday starting its week"""
+    return day if period == "day" else day - timedelta(days=day.weekday())
+
+class ActivityDeltas:
+    """
+    Counter changes made by one transaction, by user (COMMUNITY for the
+    site-wide figures) and by day and week bucket.
+    """
+    def __init__(self):
+        self.totals: Dict[int, Counter] = defaultdict(Counter)
+        self.rollups: Dict[Tuple[str, date, int], Counter] = defaultdict(Counter)
+
+    def add(self, user_id: Optional[int], at: Union[date, datetime], **metrics):
+        if user_id is None:
+            return
+        day = at.date() if isinstance(at, datetime) else at
+        self.totals[user_id].update(metrics)
+        for period in PERIODS:
+            self.rollups[(period, bucket_start(period, day), user_id)].update(metrics)
+
+    def item_listed(self, owner_id: Optional[int], at: Union[date, datetime], count: int = 1):
+        for user_id in (owner_id, COMMUNITY):
+            self.add(user_id, at, items_listed=count, items_available=count)
+
+    def swap_completed(
+        self, requester_id: int, owner_id: int, target_category: Optional[str],
+        offered_categories: Iterable[Optional[str]], at: datetime,
+    ):
+        """
+        The requester receives the target item and the owner receives the
+        offered ones; each user is credited with the impact of what they
+        received, and the community with every item once.
+        """
+        for user_id in (requester_id, owner_id, COMMUNITY):
+            self.add(user_id, at, swaps_completed=1)
+        self._item_changed_hands(target_category, owner_id, requester_id, at)
+        for category in offered_categories:
+            self._item_changed_hands(category, requester_id, owner_id, at)
+
+    def _item_changed_hands(self, category: Optional[str], giver_id: int, receiver_id: int, at: datetime):
+        co2, water = item_impact(category)
+        self.add(giver_id, at, items_available=-1)
+        self.add(receiver_id, at, co2_saved_kg=co2, water_saved_l=water)
+        self.add(COMMUNITY, at, items_available=-1, co2_saved_kg=co2, water_saved_l=water)
+
+    def points_moved(self, user_id: int, delta: int, at: datetime):
+        """Only credits count as earned; spending is not subtracted"""
+        if delta > 0:
+            for key in (user_id, COMMUNITY):
+                self.add(key, at, points_earned=delta)
+
+    def rows(self, community: int = COMMUNITY) -> List[Tuple[type, List[dict]]]:
+        """
+        Rows to add, with the community figures under the shard `community`.
+        """
+        def key(user_id: int) -> int:
+            return community if user_id == COMMUNITY else user_id
+
+        # Sorted so concurrent transactions lock counter rows in the same order
+        totals = sorted(
+            ({"user_id": key(user_id), **_values(counts)} for user_id, counts in self.totals.items() if any(counts.values())),
+            key=lambda row: row["user_id"],
+        )
+        rollups = sorted(
+            (
+                {"period": period, "bucket": bucket, "user_id": key(user_id), **_values(counts)}
+                for (period, bucket, user_id), counts in self.rollups.items() if any(counts.values())
+            ),
+            key=lambda row: (row["period"], row["bucket"], row["user_id"]),
+        )
+        return [(ActivityTotals, totals), (ActivityRollup, rollups)]
+
+def _values(counts: Counter) -> dict:
+    return {metric: counts.get(metric, 0) for metric in METRICS}
+
+@lru_cache
+def _increment_statements(dialect: str, model) -> Tuple[Executable, ...]:
+    """
+    Statements that add each row's values to the stored row, creating it if
+    missing; each is executed with all the rows.
+    """
+    table = model.__table__
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(table)
+        return (statement.on_conflict_do_update(
+            index_elements=[column.name for column in table.primary_key],
+            set_={metric: table.c[metric] + statement.excluded[metric] for metric in METRICS},
+        ),)
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        statement = dialect_insert(table)
+        return (statement.on_duplicate_key_update(
+            {metric: table.c[metric] + statement.inserted[metric] for metric in METRICS}
+        ),)
+    # No upsert: add to the row if it exists, then insert it if it does not.
+    # Two transactions creating the same row at once can still collide on
+    # the primary key; the loser fails and rolls back like any other write.
+    columns = [column.name for column in table.c]
+    key = " AND ".join(f"{column.name} = :{column.name}" for column in table.primary_key)
+    typed = [bindparam(column.name, type_=column.type) for column in table.c]
+    add = text(
+        f"UPDATE {table.name} SET {', '.join(f'{metric} = {metric} + :{metric}' for metric in METRICS)} WHERE {key}"
+    ).bindparams(*typed)
+    create = text(
+        f"INSERT INTO {table.name} ({', '.join(columns)}) SELECT {', '.join(':' + name for name in columns)} "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {table.name} WHERE {key})"
+    ).bindparams(*typed)
+    return (add, create)
+
+def apply(db: Session, deltas: ActivityDeltas) -> None:
+    """
+    Adds `deltas` to the stored counters inside the caller's transaction;
+    the caller commits.
+    """
+    dialect = db.get_bind().dialect.name
+    for model, rows in deltas.rows(community_shard()):
+        if rows:
+            for statement in _increment_statements(dialect, model):
+                db.execute(statement, rows)
+
+async def apply_async(db: AsyncSession, deltas: ActivityDeltas) -> None:
+    """
+    Async version of apply.
+    """
+    dialect = db.get_bind().dialect.name
+    for model, rows in deltas.rows(community_shard()):
+        if rows:
+            for statement in _increment_statements(dialect, model):
+                await db.execute(statement, rows)
+
+def compute(db: Session) -> ActivityDeltas:
+    """
+    Recomputes every counter from items, swaps and the points ledger.
+    """
+    from app.models.item import Item
+    from app.models.swap import PointsLedgerEntry, Swap, SwapOfferedItem
+
+    deltas = ActivityDeltas()
+    listed = Counter(
+        (owner_id, created_at.date())
+        for owner_id, created_at in db.execute(
+            select(Item.owner_id, Item.created_at).execution_options(yield_per=5000)
+        )
+    )
+    for (owner_id, day), count in listed.items():
+        deltas.item_listed(owner_id, day, count)
+
+    offered = defaultdict(list)
+    for swap_id, category in db.execute(
+        select(SwapOfferedItem.swap_id, Item.category).join(Item, Item.id == SwapOfferedItem.item_id)
+    ):
+        offered[swap_id].append(category)
+    for swap_id, requester_id, owner_id, created_at, category in db.execute(
+        select(Swap.id, Swap.requester_id, Swap.owner_id, Swap.created_at, Item.category)
+        .join(Item, Item.id == Swap.item_id)
+        .execution_options(yield_per=5000)
+    ):
+        deltas.swap_completed(requester_id, owner_id, category, offered.get(swap_id, ()), created_at)
+
+    for user_id, delta, created_at in db.execute(
+        select(PointsLedgerEntry.user_id, PointsLedgerEntry.delta, PointsLedgerEntry.created_at)
+        .where(PointsLedgerEntry.delta > 0)
+        .execution_options(yield_per=5000)
+    ):
+        deltas.points_moved(user_id, delta, created_at)
+    return deltas
+
+def rebuild(db: Session) -> ActivityDeltas:
+    """
+    Replaces the stored counters with freshly computed ones in one
+    transaction. Writers that count activity wait until it commits, so no
+    increment is lost or counted twice.
+    """
+    try:
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("LOCK TABLE activity_totals, activity_rollups IN EXCLUSIVE MODE"))
+        # Deleting first also takes SQLite's write lock before reading
+        db.execute(delete(ActivityTotals))
+        db.execute(delete(ActivityRollup))
+        deltas = compute(db)
+        apply(db, deltas)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    return deltas
+
+def verify(db: Session) -> List[str]:
+    """
+    Compares the stored counters with freshly computed ones without
+    writing; returns one line per difference.
+    """
+    expected = {}
+    for model, rows in compute(db).rows():
+        keys = [column.name for column in model.__table__.primary_key]
+        expected.update({(model.__tablename__, *(row[key] for key in keys)): row for row in rows})
+    stored = defaultdict(Counter)
+    for model in (ActivityTotals, ActivityRollup):
+        keys = [column.name for column in model.__table__.primary_key]
+        for row in db.scalars(select(model).execution_options(yield_per=5000)):
+            # The community's shards are compared as their sum
+            key = tuple(
+                COMMUNITY if name == "user_id" and is_community(row.user_id) else getattr(row, name) for name in keys
+            )
+            stored[(model.__tablename__, *key)].update({metric: getattr(row, metric) for metric in METRICS})
+    differences = []
+    for key in sorted(expected.keys() | stored.keys(), key=str):
+        want, have = expected.get(key, {}), stored.get(key, {})
+        for metric in METRICS:
+            if abs(want.get(metric, 0) - have.get(metric, 0)) > 1e-6:
+                differences.append(f"{' '.join(map(str, key))} {metric}: stored {have.get(metric, 0)}, expected {want.get(metric, 0)}")
+    return differences
+
+def main():
+    """
+    python -m app.services.activity [--verify]
+    Rebuilds the counters from scratch, or with --verify only reports drift
+    and exits with status 1 if there is any.
+    """
+    import argparse
+    import sys
+    import time
+    from app.db.migrate import migrate
+    from app.db.session import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Rebuild or verify the materialised activity counters")
+    parser.add_argument("--verify", action="store_true", help="Only compare the stored counters with recomputed ones")
+    args = parser.parse_args()
+
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        if args.verify:
+            differences = verify(db)
+            for line in differences[:50]:
+                print(line)
+            print(f"{len(differences)} differences in {time.perf_counter() - started:.2f}s")
+            sys.exit(1 if differences else 0)
+        deltas = rebuild(db)
+    finally:
+        db.close()
+    print(
+        f"rebuilt {len(deltas.totals)} totals and {len(deltas.rollups)} rollups "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.instrumentation import register_stats
+from app.services import item_events
+
+# HTTP caching for the public catalogue reads (item listings, details,
+# facets and search). Every response is tagged with the catalogue version,
+# a change counter that every item write bumps in its own transaction
+# (bump_statement()):
+# - the version is the ETag and Last-Modified, so a revalidating browser or
+#   CDN gets a 304 without the page being rebuilt
+# - rendered JSON is kept in-process per URL and served while the version
+#   is unchanged
+# The version is re-read from the database at most every
+# CATALOGUE_VERSION_TTL seconds (one primary key lookup), and at once after
+# a write in this process, so repeat loads cost no database work.
+
+class _Entry:
+    __slots__ = ("body", "headers")
+
+    def __init__(self, body: bytes, headers: Dict[str, str]):
+        self.body = body
+        self.headers = headers
+
+def bump_statement():
+    """UPDATE counting one catalogue change; item writes run it just before committing"""
+    from sqlalchemy import case, update
+    from app.models.item import CatalogueState
+
+    now = datetime.utcnow()
+    return (
+        update(CatalogueState)
+        .where(CatalogueState.id == 1)
+        .values(
+            version=CatalogueState.version + 1,
+            changed_at=case((CatalogueState.changed_at > now, CatalogueState.changed_at), else_=now),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+class CatalogueVersion:
+    __slots__ = ("counter", "stamp", "etag", "last_modified")
+
+    def __init__(self, counter: Optional[int], stamp: Optional[datetime]):
+        self.counter = counter
+        self.stamp = stamp
+        # The timestamp keeps tags distinct across a database that was recreated
+        key = f"{counter}:{stamp.isoformat()}" if stamp else "empty"
+        self.etag = '"' + hashlib.sha1(key.encode("ascii")).hexdigest()[:20] + '"'
+        moment = (stamp or datetime(1970, 1, 1)).replace(tzinfo=timezone.utc)
+        self.last_modified = format_datetime(moment, usegmt=True)
+
+    def not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        """Evaluates a conditional GET; If-None-Match takes precedence"""
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or self.etag in tags
+        if if_modified_since is None or self.stamp is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have whole-second precision
+        return self.stamp.replace(microsecond=0, tzinfo=timezone.utc) <= since
+
+class CatalogueCache:
+    """
+    LRU of rendered responses for the current catalogue version. All
+    entries are dropped when the version changes.
+    Not thread-safe, except invalidate(): use it from the event loop.
+    """
+    def __init__(self, max_entries: int = 2048, version_ttl: float = 1.0):
+        self.max_entries = max_entries
+        self.version_ttl = version_ttl
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.version_reads = 0
+        self._version: Optional[CatalogueVersion] = None
+        self._checked_at = 0.0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    async def version(self, db) -> CatalogueVersion:
+        if self._version is not None and time.monotonic() - self._checked_at < self.version_ttl:
+            return self._version
+        from sqlalchemy import select
+        from app.models.item import CatalogueState
+
+        row = (await db.execute(
+            select(CatalogueState.version, CatalogueState.changed_at).where(CatalogueState.id == 1)
+        )).first()
+        counter, stamp = row if row is not None else (None, None)
+        self.version_reads += 1
+        self._checked_at = time.monotonic()
+        if self._version is None or counter != self._version.counter or stamp != self._version.stamp:
+            self._version = CatalogueVersion(counter, stamp)
+            self._entries.clear()
+        return self._version
+
+    def invalidate(self):
+        """Re-read the version on the next request (called after item writes)"""
+        self._checked_at = 0.0
+
+    def get(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, body: bytes, headers: Dict[str, str]) -> _Entry:
+        entry = self._entries[key] = _Entry(body, headers)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "version_reads": self.version_reads,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+_cache: Optional[CatalogueCache] = None
+
+def get_catalogue_cache() -> CatalogueCache:
+    global _cache
+    if _cache is None:
+        _cache = CatalogueCache(
+            max_entries=settings.CATALOGUE_CACHE_MAX_ENTRIES,
+            version_ttl=settings.CATALOGUE_VERSION_TTL,
+        )
+    return _cache
+
+def _invalidate(*_):
+    if _cache is not None:
+        _cache.invalidate()
+
+item_events.subscribe(available=_invalidate, unavailable=_invalidate, available_many=_invalidate)
+
+register_stats("catalogue_cache", lambda: _cache.stats() if _cache else None)
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Optional
+
+from app.core.config import settings
+
+# Conversation state kept on the server, so clients send only their new
+# message and a session id instead of the whole history on every turn.
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+def message_tokens(message: dict) -> int:
+    # Each message carries a few tokens of role/formatting overhead
+    return estimate_tokens(str(message.get("content", ""))) + 4
+
+def compact_history(history: List[dict], token_budget: int, summary_share: float = 0.2) -> List[dict]:
+    """
+    Returns the most recent messages that fit in `token_budget`. When older
+    turns have to be dropped, up to `summary_share` of the budget is spent on
+    a short note listing what the user asked earlier, so the model keeps the
+    gist of the conversation without its full text.
+    """
+    total = sum(message_tokens(message) for message in history)
+    if total <= token_budget:
+        return list(history)
+
+    summary_budget = int(token_budget * summary_share)
+    kept: List[dict] = []
+    used = 0
+    for message in reversed(history):
+        cost = message_tokens(message)
+        if used + cost > token_budget - summary_budget:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    # Never start on an assistant reply whose question was dropped
+    while kept and kept[0].get("role") == "assistant":
+        kept.pop(0)
+
+    dropped = history[:len(history) - len(kept)]
+    questions = [str(message.get("content", "")) for message in dropped if message.get("role") == "user"]
+    note = "Earlier in this conversation the user asked about: "
+    for question in reversed(questions):
+        snippet = question[:120]
+        if estimate_tokens(note + snippet) + 4 > summary_budget:
+            break
+        note += snippet + "; "
+    if questions and note.endswith("; "):
+        return [{"role": "system", "content": note[:-2]}] + kept
+    return kept
+
+class InMemoryConversationStore:
+    """
+    Per-process store: LRU over sessions with an idle timeout.
+    """
+    def __init__(self, max_sessions: int = 10000, ttl: float = 86400, max_messages: int = 50):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def load(self, session_id: str) -> List[dict]:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return []
+        messages, last_used = entry
+        if time.monotonic() - last_used > self.ttl:
+            del self._sessions[session_id]
+            return []
+        return list(messages)
+
+    async def append(self, session_id: str, messages: List[dict]):
+        stored = (await self.load(session_id)) + messages
+        self._sessions[session_id] = (stored[-self.max_messages:], time.monotonic())
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    async def delete(self, session_id: str):
+        self._sessions.pop(session_id, None)
+
+class SQLiteConversationStore:
+    """
+    Store shared by every worker on one host, backed by a SQLite file.
+    Queries run in a worker thread so they never block the event loop.
+    """
+    def __init__(self, path: str, ttl: float = 86400, max_messages: int = 50):
+        self.path = path
+        self.ttl = ttl
+        self.max_messages = max_messages
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS conversations ("
+                "session_id TEXT PRIMARY KEY, messages TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _load(self, session_id: str) -> List[dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT messages, updated_at FROM conversations WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return []
+        return json.loads(row[0])
+
+    def _append(self, session_id: str, messages: List[dict]):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT messages, updated_at FROM conversations WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            stored = json.loads(row[0]) if row and time.time() - row[1] <= self.ttl else []
+            stored = (stored + messages)[-self.max_messages:]
+            conn.execute(
+                "INSERT OR REPLACE INTO conversations (session_id, messages, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(stored), time.time()),
+            )
+            # Opportunistically drop idle sessions
+            conn.execute("DELETE FROM conversations WHERE updated_at < ?", (time.time() - self.ttl,))
+
+    def _delete(self, session_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM conversations WHERE session_id = ?", (session_id,))
+
+    async def load(self, session_id: str) -> List[dict]:
+        return await asyncio.to_thread(self._load, session_id)
+
+    async def append(self, session_id: str, messages: List[dict]):
+        await asyncio.to_thread(self._append, session_id, messages)
+
+    async def delete(self, session_id: str):
+        await asyncio.to_thread(self._delete, session_id)
+
+class RedisConversationStore:
+    """
+    Store shared across hosts, for Redis or any server speaking its protocol.
+    Requires the optional `redis` package.
+    """
+    def __init__(self, url: str, ttl: float = 86400, max_messages: int = 50):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("The redis package is required for a redis:// CONVERSATION_STORE") from e
+        self.ttl = int(ttl)
+        self.max_messages = max_messages
+        self._redis = redis.from_url(url)
+
+    def _key(self, session_id: str) -> str:
+        return f"rewear:conversation:{session_id}"
+
+    async def load(self, session_id: str) -> List[dict]:
+        raw = await self._redis.lrange(self._key(session_id), 0, -1)
+        return [json.loads(item) for item in raw]
+
+    async def append(self, session_id: str, messages: List[dict]):
+        key = self._key(session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, *(json.dumps(message) for message in messages))
+            pipe.ltrim(key, -self.max_messages, -1)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def delete(self, session_id: str):
+        await self._redis.delete(self._key(session_id))
+
+_store = None
+
+def get_conversation_store():
+    """
+    Returns the process-wide store selected by CONVERSATION_STORE:
+    "memory", "sqlite:///path/to/file.db" or "redis://host:port/db".
+    """
+    global _store
+    if _store is None:
+        backend = settings.CONVERSATION_STORE
+        options = {"ttl": settings.CONVERSATION_TTL, "max_messages": settings.CONVERSATION_MAX_MESSAGES}
+        if backend.startswith("sqlite:///"):
+            _store = SQLiteConversationStore(backend[len("sqlite:///"):], **options)
+        elif backend.startswith(("redis://", "rediss://")):
+            _store = RedisConversationStore(backend, **options)
+        elif backend == "memory":
+            _store = InMemoryConversationStore(max_sessions=settings.CONVERSATION_MAX_SESSIONS, **options)
+        else:
+            raise ValueError(f"Unsupported CONVERSATION_STORE: {backend}")
+    return _store
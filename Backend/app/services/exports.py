@@ -0,0 +1,144 @@
+import csv
+import enum
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Callable, List, Optional
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.sql import Select
+
+from app.models.item import Item
+from app.models.swap import Swap, SwapOfferedItem
+from app.models.user import User
+
+# Streaming exports. Rows are read through a server-side cursor
+# (AsyncSession.stream with yield_per) and encoded one batch at a time, so
+# memory stays flat however large the table is.
+#
+# Mutable tables (items, users) are ordered by (updated_at, id): `since`
+# returns rows changed at or after a time, and `since` plus `after_id` (the
+# last row received) resumes an interrupted export exactly where it stopped.
+# Append-only tables (swaps) are ordered by id and resume with `after_id`.
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+class ExportSpec:
+    def __init__(self, name: str, columns: list, changed_at=None, created_at=None,
+                 extend: Optional[Callable] = None, extra_fields: tuple = ()):
+        self.name = name
+        self.columns = columns
+        # Modification timestamp for "changed since" (mutable tables), or
+        # creation timestamp for append-only ones ordered by id alone
+        self.changed_at = changed_at
+        self.created_at = created_at
+        self.id_column = columns[0]
+        # Async callable adding fields to a batch of row dicts
+        self.extend = extend
+        self.fields = [column.key for column in columns] + list(extra_fields)
+
+    def statement(self, since: Optional[datetime], after_id: Optional[int]) -> Select:
+        statement = select(*self.columns)
+        if self.changed_at is None:
+            if since is not None:
+                statement = statement.where(self.created_at >= since)
+            if after_id is not None:
+                statement = statement.where(self.id_column > after_id)
+            return statement.order_by(self.id_column)
+        if since is not None and after_id is not None:
+            statement = statement.where(or_(
+                self.changed_at > since,
+                and_(self.changed_at == since, self.id_column > after_id),
+            ))
+        elif since is not None:
+            statement = statement.where(self.changed_at >= since)
+        return statement.order_by(self.changed_at, self.id_column)
+
+async def _add_offered_items(db, rows: List[dict]):
+    # One query per batch rather than one per swap
+    offered = {row["id"]: [] for row in rows}
+    statement = select(SwapOfferedItem.swap_id, SwapOfferedItem.item_id).where(
+        SwapOfferedItem.swap_id.in_(list(offered))
+    ).order_by(SwapOfferedItem.swap_id, SwapOfferedItem.item_id)
+    for swap_id, item_id in await db.execute(statement):
+        offered[swap_id].append(item_id)
+    for row in rows:
+        row["offered_item_ids"] = offered[row["id"]]
+
+EXPORTS = {
+    "items": ExportSpec(
+        "items",
+        [Item.id, Item.title, Item.description, Item.category, Item.size, Item.condition,
+         Item.status, Item.owner_id, Item.updated_at],
+        changed_at=Item.updated_at,
+    ),
+    "users": ExportSpec(
+        "users",
+        [User.id, User.username, User.email, User.points_balance, User.is_admin,
+         User.created_at, User.updated_at],
+        changed_at=User.updated_at,
+    ),
+    "swaps": ExportSpec(
+        "swaps",
+        [Swap.id, Swap.requester_id, Swap.owner_id, Swap.item_id, Swap.points, Swap.created_at],
+        created_at=Swap.created_at,
+        extend=_add_offered_items,
+        extra_fields=("offered_item_ids",),
+    ),
+}
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def _encode_ndjson(fields: List[str], rows: List[dict]) -> str:
+    return "".join(
+        json.dumps({field: _plain(row[field]) for field in fields}, separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+def _encode_csv(fields: List[str], rows: List[dict]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            ";".join(map(str, value)) if isinstance(value, list) else _plain(value)
+            for value in (row[field] for field in fields)
+        ])
+    return buffer.getvalue()
+
+async def stream_export(spec: ExportSpec, fmt: str = "ndjson", compress: bool = False,
+                        since: Optional[datetime] = None, after_id: Optional[int] = None,
+                        batch_size: int = 1000) -> AsyncIterator[bytes]:
+    """
+    Yields the encoded export, one chunk per batch of rows. Opens its own
+    session because the response outlives the request's dependencies.
+    """
+    from app.db.session import AsyncSessionLocal
+
+    encode = _encode_csv if fmt == "csv" else _encode_ndjson
+    # wbits=31 writes a gzip container, so Content-Encoding: gzip applies
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def output(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    if fmt == "csv":
+        yield output(_encode_csv(spec.fields, [{field: field for field in spec.fields}]))
+    async with AsyncSessionLocal() as db:
+        statement = spec.statement(since, after_id).execution_options(yield_per=batch_size)
+        result = await db.stream(statement)
+        async for partition in result.mappings().partitions():
+            rows = [dict(row) for row in partition]
+            if spec.extend is not None:
+                await spec.extend(db, rows)
+            chunk = output(encode(spec.fields, rows))
+            if chunk:
+                yield chunk
+    if compressor:
+        yield compressor.flush()
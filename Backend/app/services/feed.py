@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, func, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.instrumentation import register_stats
+
+# Community feed support: the batched counters behind like, comment and
+# follower counts, and the maintenance jobs for timelines and counts. The
+# reads and writes themselves are in app.crud.crud_feed.
+#
+# A like on a hot post would otherwise update the same posts row from every
+# request, and each of those updates holds the row lock until its
+# transaction commits. Instead each worker sums its changes per row and
+# applies them every FEED_COUNTER_FLUSH_SECONDS as one UPDATE per changed
+# row. Increments commute, so workers never overwrite each other; deltas
+# still buffered when a worker dies are lost, which `--recount` repairs.
+
+logger = logging.getLogger(__name__)
+
+CounterKey = Tuple[type, str, int]
+
+class CounterBuffer:
+    """
+    Sums counter changes by (model, column, row id) and writes them every
+    `flush_interval` seconds. add() is thread-safe. Deltas from a failed
+    write are put back and retried on the next flush.
+    """
+    def __init__(self, writer: Callable[[Dict[CounterKey, int]], None], flush_interval: float = 2):
+        self.writer = writer
+        self.flush_interval = flush_interval
+        self.added = 0
+        self.rows_written = 0
+        self._pending: Dict[CounterKey, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, model: type, column: str, row_id: int, delta: int = 1):
+        with self._lock:
+            self._pending[(model, column, row_id)] += delta
+            self.added += 1
+
+    async def flush(self):
+        with self._lock:
+            deltas, self._pending = self._pending, defaultdict(int)
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        try:
+            await asyncio.to_thread(self.writer, deltas)
+        except BaseException:
+            with self._lock:
+                for key, delta in deltas.items():
+                    self._pending[key] += delta
+            raise
+        self.rows_written += len(deltas)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Writing feed counters failed")
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), "added": self.added, "rows_written": self.rows_written}
+
+def counter_statement(model: type, column: str):
+    """UPDATE adding :delta to `column` of row :row_id; executemany-friendly"""
+    values = {column: getattr(model, column) + bindparam("delta")}
+    if "updated_at" in model.__table__.c:
+        # A count changing is not an edit of the row
+        values["updated_at"] = model.updated_at
+    return update(model).where(model.id == bindparam("row_id")).values(values).execution_options(synchronize_session=False)
+
+def write_counters(deltas: Dict[CounterKey, int]):
+    """Apply summed counter deltas in one transaction, rows in id order"""
+    from app.db.session import SessionLocal
+
+    by_column = defaultdict(list)
+    for (model, column, row_id), delta in sorted(deltas.items(), key=lambda item: (item[0][0].__name__, item[0][1], item[0][2])):
+        by_column[model, column].append({"row_id": row_id, "delta": delta})
+    db = SessionLocal()
+    try:
+        for (model, column), rows in by_column.items():
+            db.connection().execute(counter_statement(model, column), rows)
+        db.commit()
+    finally:
+        db.close()
+
+def trim_timelines(db: Session, keep: int) -> int:
+    """
+    Deletes all but each user's newest `keep` timeline entries; returns how
+    many were deleted. Pages past the cut-off are simply not served.
+    """
+    from app.models.feed import TimelineEntry
+
+    ranked = select(
+        TimelineEntry.user_id,
+        TimelineEntry.post_id,
+        func.row_number().over(partition_by=TimelineEntry.user_id, order_by=TimelineEntry.post_id.desc()).label("rank"),
+    ).subquery()
+    old = select(ranked.c.user_id, ranked.c.post_id).where(ranked.c.rank > keep)
+    result = db.execute(delete(TimelineEntry).where(tuple_(TimelineEntry.user_id, TimelineEntry.post_id).in_(old)))
+    db.commit()
+    return result.rowcount
+
+def recount(db: Session) -> Dict[str, int]:
+    """
+    Recomputes every like, comment and follower count from the rows they
+    count; returns how many rows were corrected per column. Deltas still
+    buffered in running workers land on top, so counts may be off by what
+    was in flight at the time.
+    """
+    from app.models.feed import Comment, Follow, Post, PostLike
+    from app.models.user import User
+
+    corrected = {}
+    for model, column, source, key in (
+        (Post, "like_count", PostLike, PostLike.post_id),
+        (Post, "comment_count", Comment, Comment.post_id),
+        (User, "follower_count", Follow, Follow.followee_id),
+    ):
+        actual = select(func.count()).select_from(source).where(key == model.id).scalar_subquery()
+        values = {column: actual}
+        if "updated_at" in model.__table__.c:
+            values["updated_at"] = model.updated_at
+        result = db.execute(
+            update(model).where(getattr(model, column) != actual).values(values).execution_options(synchronize_session=False)
+        )
+        corrected[column] = result.rowcount
+    db.commit()
+    return corrected
+
+_counters: Optional[CounterBuffer] = None
+
+def get_feed_counters() -> Optional[CounterBuffer]:
+    """The running counter buffer, or None outside a worker serving the feed"""
+    return _counters
+
+async def start_feed():
+    global _counters
+    if _counters is None:
+        _counters = CounterBuffer(write_counters, flush_interval=settings.FEED_COUNTER_FLUSH_SECONDS)
+        _counters.start()
+
+async def stop_feed():
+    """Write out buffered counts (app shutdown)"""
+    global _counters
+    if _counters is not None:
+        await _counters.stop()
+        _counters = None
+
+def main():
+    """
+    Maintenance, e.g. nightly:
+        python -m app.services.feed --trim --recount
+    """
+    import argparse
+    import time
+    from app.db.migrate import migrate
+    from app.db.session import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Trim home timelines and repair the feed's denormalised counts")
+    parser.add_argument("--trim", action="store_true", help="Keep only each user's newest --keep timeline entries")
+    parser.add_argument("--keep", type=int, default=settings.FEED_TIMELINE_MAX)
+    parser.add_argument("--recount", action="store_true", help="Recompute like, comment and follower counts")
+    args = parser.parse_args()
+    if not (args.trim or args.recount):
+        parser.error("nothing to do: pass --trim and/or --recount")
+
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        if args.trim:
+            started = time.perf_counter()
+            deleted = trim_timelines(db, args.keep)
+            print(f"trimmed {deleted} timeline entries in {time.perf_counter() - started:.2f}s")
+        if args.recount:
+            started = time.perf_counter()
+            corrected = recount(db)
+            print(f"corrected {corrected} in {time.perf_counter() - started:.2f}s")
+    finally:
+        db.close()
+
+register_stats("feed_counters", lambda: _counters.stats() if _counters else None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import logging
+from typing import Callable, Iterable, List, Optional, Tuple
+
+# Write-through notifications from the CRUD layer to in-process indexes and
+# caches. The CRUD functions fire these after their transaction commits;
+# subscribers register when their module is imported. Handlers must be
+# quick and must not block, since they run on the request path.
+
+logger = logging.getLogger(__name__)
+
+# (per-item handler, batch handler or None) for each subscriber
+_available: List[Tuple[Callable, Optional[Callable]]] = []
+_unavailable: List[Callable] = []
+
+def subscribe(available: Callable = None, unavailable: Callable = None, available_many: Callable = None):
+    """
+    `available(item)` is called for each item that was created or became
+    available; `unavailable(item_ids)` for items that were swapped away.
+    Subscribers with a cheaper bulk path can also pass
+    `available_many(items)`, used instead of `available` for imports.
+    """
+    if available is not None:
+        _available.append((available, available_many))
+    if unavailable is not None:
+        _unavailable.append(unavailable)
+
+def _dispatch(handlers: List[Callable], arg):
+    for handler in handlers:
+        try:
+            handler(arg)
+        except Exception:
+            # The write has already committed; a broken index must not fail it
+            logger.exception("Item event handler %r failed", handler)
+
+def item_available(item):
+    _dispatch([handler for handler, _ in _available], item)
+
+def items_available(items: List):
+    for handler, many in _available:
+        if many is not None:
+            _dispatch([many], items)
+        else:
+            for item in items:
+                _dispatch([handler], item)
+
+def items_unavailable(item_ids: Iterable[int]):
+    _dispatch(_unavailable, list(item_ids))
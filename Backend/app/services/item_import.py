@@ -0,0 +1,237 @@
+import csv
+import json
+import time
+from itertools import islice
+from types import SimpleNamespace
+from typing import Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.crud import crud_item
+from app.schemas.item import ItemCreate, ItemImportError, ItemImportResult
+from app.services import item_events
+
+# Bulk item import from NDJSON (one JSON object per line) or CSV (header row
+# with title, description, category, size, condition and optionally
+# owner_id). Rows are validated and inserted in chunks of IMPORT_CHUNK_SIZE,
+# each chunk one batched INSERT in its own transaction, so a bad row is
+# reported without aborting the rest of the import. Used by
+# POST /items/import and by the CLI at the bottom of this module.
+
+FORMATS = ("ndjson", "csv")
+
+def read_rows(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Union[dict, str]]]:
+    """
+    Yields (line number, row dict), or (line number, error message) for
+    rows that cannot be parsed at all.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            if None in row:
+                yield reader.line_num, "More values than header columns"
+            else:
+                yield reader.line_num, row
+        return
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, f"Invalid JSON: {e}"
+            continue
+        if isinstance(row, dict):
+            yield number, row
+        else:
+            yield number, "Expected a JSON object"
+
+def _clean(row: dict) -> dict:
+    # CSV gives "" for empty cells; treat blank values as missing
+    return {
+        key: (value.strip() or None) if isinstance(value, str) else value
+        for key, value in row.items()
+    }
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, detail['loc'])) or 'row'}: {detail['msg']}" for detail in error.errors()
+    )
+
+class ItemImporter:
+    """
+    Accumulates one import's results. Owners are checked once per import:
+    `owner_id` is used for rows without their own, and the owner_id column
+    is only honoured when `allow_owner_column` is set (admins and the CLI).
+    """
+    def __init__(self, db, owner_id: Optional[int] = None, allow_owner_column: bool = False,
+                 chunk_size: int = 1000, max_errors: int = 100):
+        self.db = db
+        self.owner_id = owner_id
+        self.allow_owner_column = allow_owner_column
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[ItemImportError] = []
+        self._owners: Set[int] = set()
+
+    def _error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(ItemImportError(line=line, error=message))
+
+    def _validate(self, line: int, row: Union[dict, str]) -> Optional[dict]:
+        if isinstance(row, str):
+            self._error(line, row)
+            return None
+        row = _clean(row)
+        owner_id = row.get("owner_id") if self.allow_owner_column else None
+        if owner_id is None:
+            owner_id = self.owner_id
+        try:
+            item = ItemCreate.model_validate(row)
+            owner_id = int(owner_id) if owner_id is not None else None
+        except ValidationError as e:
+            self._error(line, _describe(e))
+            return None
+        except (TypeError, ValueError):
+            self._error(line, "owner_id: must be an integer")
+            return None
+        if owner_id is None:
+            self._error(line, "owner_id: Field required")
+            return None
+        return {**item.model_dump(), "owner_id": owner_id}
+
+    def _check_owners(self, rows: List[Tuple[int, dict]]) -> List[Tuple[int, dict]]:
+        from app.models.user import User
+
+        unknown = {values["owner_id"] for _, values in rows} - self._owners
+        if unknown:
+            self._owners.update(self.db.scalars(select(User.id).where(User.id.in_(unknown))))
+        valid = []
+        for line, values in rows:
+            if values["owner_id"] in self._owners:
+                valid.append((line, values))
+            else:
+                self._error(line, f"owner_id: no user {values['owner_id']}")
+        return valid
+
+    def _insert(self, rows: List[Tuple[int, dict]]) -> List[int]:
+        values = [values for _, values in rows]
+        try:
+            item_ids = crud_item.bulk_insert_items(self.db, values)
+            self.db.commit()
+            return item_ids
+        except SQLAlchemyError:
+            self.db.rollback()
+        # Retry row by row so one rejected row does not fail its whole chunk
+        item_ids = []
+        for line, row in rows:
+            try:
+                item_ids.extend(crud_item.bulk_insert_items(self.db, [row]))
+                self.db.commit()
+            except SQLAlchemyError as e:
+                self.db.rollback()
+                item_ids.append(None)
+                self._error(line, f"Rejected by the database: {e.orig or e}")
+        return item_ids
+
+    def import_chunk(self, chunk: List[Tuple[int, Union[dict, str]]]):
+        rows = []
+        for line, row in chunk:
+            values = self._validate(line, row)
+            if values is not None:
+                rows.append((line, values))
+        if not rows:
+            return
+        rows = self._check_owners(rows)
+        if not rows:
+            return
+        item_ids = self._insert(rows)
+        items = [
+            SimpleNamespace(id=item_id, **values)
+            for item_id, (_, values) in zip(item_ids, rows)
+            if item_id is not None
+        ]
+        self.imported += len(items)
+        # Indexes and wishlist notifications; the notification queue caps
+        # how many users can be waiting, so a large import cannot flood it
+        item_events.items_available(items)
+
+    def run(self, rows: Iterable[Tuple[int, Union[dict, str]]]) -> ItemImportResult:
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+        return self.result()
+
+    def result(self) -> ItemImportResult:
+        return ItemImportResult(
+            imported=self.imported,
+            failed=self.failed,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+        )
+
+def import_items(lines: Iterable[str], fmt: str = "ndjson", owner_id: Optional[int] = None,
+                 allow_owner_column: bool = False, chunk_size: Optional[int] = None) -> ItemImportResult:
+    """
+    Imports items from text lines in its own session. Blocking: call it
+    from a worker thread in async code.
+    """
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        importer = ItemImporter(
+            db,
+            owner_id=owner_id,
+            allow_owner_column=allow_owner_column,
+            chunk_size=chunk_size or settings.IMPORT_CHUNK_SIZE,
+            max_errors=settings.IMPORT_MAX_ERRORS,
+        )
+        return importer.run(read_rows(lines, fmt))
+    finally:
+        db.close()
+
+def main():
+    """
+    Catalogue migration: python -m app.services.item_import FILE [--format csv] [--owner-id N]
+    """
+    import argparse
+    import sys
+    from app.db.migrate import migrate
+    from app.db.session import engine
+
+    parser = argparse.ArgumentParser(description="Import items from an NDJSON or CSV file ('-' for stdin)")
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension, else ndjson")
+    parser.add_argument("--owner-id", type=int, help="Owner for rows without an owner_id column")
+    parser.add_argument("--chunk-size", type=int, default=settings.IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    fmt = args.format or ("csv" if args.file.lower().endswith(".csv") else "ndjson")
+
+    migrate(engine)
+    source = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8-sig", newline="")
+    started = time.perf_counter()
+    try:
+        result = import_items(source, fmt, owner_id=args.owner_id, allow_owner_column=True, chunk_size=args.chunk_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    elapsed = time.perf_counter() - started
+    for error in result.errors:
+        print(f"line {error.line}: {error.error}", file=sys.stderr)
+    if result.errors_truncated:
+        print(f"... and {result.failed - len(result.errors)} more errors", file=sys.stderr)
+    print(f"imported {result.imported}, failed {result.failed} in {elapsed:.2f}s ({result.imported / elapsed:.0f} items/s)")
+    sys.exit(1 if result.failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.instrumentation import register_stats
+
+def retryable_errors() -> tuple:
+    """
+    Errors worth retrying: the provider was unreachable, slow, rate limited
+    us or failed internally. openai is imported here, not at module level,
+    so workers that never call the LLM do not pay for importing it.
+    """
+    import openai
+
+    return (
+        openai.APIConnectionError,
+        openai.APITimeoutError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+class LLMGatewayBusy(Exception):
+    """
+    Raised instead of queueing when the gateway cannot take more work.
+    `status_code` is 429 when the wait queue is full and 503 when a call
+    waited too long for a free slot.
+    """
+    def __init__(self, status_code: int, detail: str, retry_after: int = 1):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+class LLMGatewayMetrics:
+    """
+    Running counters for the gateway, exposed through snapshot().
+    """
+    def __init__(self):
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.rejected_queue_full = 0
+        self.rejected_wait_timeout = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.admitted = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_wait_timeout": self.rejected_wait_timeout,
+            "wait_seconds_avg": self.wait_seconds_total / self.admitted if self.admitted else 0.0,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+class LLMGateway:
+    """
+    Long-lived client for an OpenAI-compatible chat API.
+    - Reuses keep-alive connections from one HTTP pool.
+    - Runs at most `max_in_flight` calls at once; up to `max_queue` more wait
+      for at most `queue_timeout` seconds, anything beyond is rejected at once.
+    - Bounds each call by `request_timeout` seconds in total, retrying
+      transient provider errors with jittered exponential backoff.
+    """
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        model: str,
+        max_in_flight: int = 16,
+        max_queue: int = 64,
+        queue_timeout: float = 2.0,
+        request_timeout: float = 30.0,
+        max_retries: int = 2,
+        retry_base_delay: float = 0.5,
+    ):
+        self.model = model
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.metrics = LLMGatewayMetrics()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_in_flight,
+                max_keepalive_connections=max_in_flight,
+                keepalive_expiry=60,
+            ),
+            timeout=request_timeout,
+        )
+        from openai import AsyncOpenAI
+
+        self._retryable = retryable_errors()
+        # Retries are handled here so they share the per-call deadline
+        self._client = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            max_retries=0,
+            timeout=request_timeout,
+            http_client=self._http_client,
+        )
+
+    @asynccontextmanager
+    async def _slot(self):
+        if self.metrics.waiting >= self.max_queue and self._slots.locked():
+            self.metrics.rejected_queue_full += 1
+            raise LLMGatewayBusy(429, "The assistant is handling too many requests, please retry shortly.")
+        self.metrics.waiting += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.metrics.rejected_wait_timeout += 1
+            raise LLMGatewayBusy(503, "The assistant is busy, please retry shortly.")
+        finally:
+            self.metrics.waiting -= 1
+        waited = time.monotonic() - started
+        self.metrics.admitted += 1
+        self.metrics.wait_seconds_total += waited
+        self.metrics.wait_seconds_max = max(self.metrics.wait_seconds_max, waited)
+        self.metrics.in_flight += 1
+        try:
+            yield
+        finally:
+            self.metrics.in_flight -= 1
+            self._slots.release()
+
+    def _backoff(self, attempt: int, deadline: float) -> Optional[float]:
+        """Full-jitter delay before the next attempt, or None if the deadline does not allow one"""
+        delay = random.uniform(0, self.retry_base_delay * (2 ** attempt))
+        if time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    async def _create(self, deadline: float, **kwargs):
+        attempt = 0
+        while True:
+            remaining = max(deadline - time.monotonic(), 0.01)
+            try:
+                return await self._client.chat.completions.create(
+                    model=self.model, timeout=remaining, **kwargs
+                )
+            except self._retryable:
+                delay = self._backoff(attempt, deadline) if attempt < self.max_retries else None
+                if delay is None:
+                    raise
+                attempt += 1
+                self.metrics.retries += 1
+                await asyncio.sleep(delay)
+
+    async def complete(self, messages: list, **kwargs) -> Optional[str]:
+        """
+        Returns the assistant message for `messages`.
+        Raises LLMGatewayBusy when overloaded, or the provider error once retries are spent.
+        """
+        async with self._slot():
+            deadline = time.monotonic() + self.request_timeout
+            try:
+                response = await self._create(deadline, messages=messages, **kwargs)
+            except Exception:
+                self.metrics.failed += 1
+                raise
+            self.metrics.completed += 1
+            return response.choices[0].message.content
+
+    async def stream(self, messages: list, **kwargs) -> AsyncIterator[str]:
+        """
+        Yields the assistant message in chunks as they arrive. Only opening the
+        stream is retried; a stream that fails midway raises to the caller.
+        """
+        async with self._slot():
+            deadline = time.monotonic() + self.request_timeout
+            try:
+                stream = await self._create(deadline, messages=messages, stream=True, **kwargs)
+                # Closing returns the connection to the pool even when the
+                # consumer stops early, e.g. on a client disconnect
+                async with stream:
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+            except Exception:
+                self.metrics.failed += 1
+                raise
+            self.metrics.completed += 1
+
+    async def aclose(self):
+        await self._http_client.aclose()
+
+_gateway: Optional[LLMGateway] = None
+
+def get_llm_gateway() -> LLMGateway:
+    """
+    Returns the process-wide gateway, creating it from settings on first use.
+    """
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway(
+            base_url=settings.LLM_BASE_URL,
+            api_key=settings.OPENROUTER_API_KEY,
+            model=settings.LLM_MODEL,
+            max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+            max_queue=settings.LLM_MAX_QUEUE,
+            queue_timeout=settings.LLM_QUEUE_TIMEOUT,
+            request_timeout=settings.LLM_REQUEST_TIMEOUT,
+            max_retries=settings.LLM_MAX_RETRIES,
+            retry_base_delay=settings.LLM_RETRY_BASE_DELAY,
+        )
+    return _gateway
+
+async def close_llm_gateway():
+    global _gateway
+    if _gateway is not None:
+        await _gateway.aclose()
+        _gateway = None
+
+register_stats("llm_gateway", lambda: _gateway.metrics.snapshot() if _gateway else None)
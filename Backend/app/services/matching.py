@@ -0,0 +1,492 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.instrumentation import register_stats
+from app.services import item_events
+from app.services.percolator import SavedSearch, SavedSearchIndex, terms
+from app.services.points import condition_points, item_points
+
+# Multi-party swap matching. Users are nodes; there is an edge u -> v when u
+# wants at least one available item owned by v. A cycle u1 -> u2 -> ... -> u1
+# is a swap where everyone receives an item from the next user and gives one
+# to the previous one.
+#
+# Changes to items and wishlists are applied incrementally: each one only
+# touches the (want, item) pairs it takes part in, and the number of such
+# pairs per user pair is kept in `_pairs`. Searches run over a compact CSR
+# (offsets + flat neighbour arrays) snapshot of those pairs, rebuilt with
+# NumPy only when the set of edges has changed.
+
+class _Item:
+    __slots__ = ("owner_id", "category", "size", "condition", "value", "terms")
+
+    def __init__(self, owner_id, category, size, condition, text):
+        self.owner_id = owner_id
+        self.category = category
+        self.size = size
+        self.condition = condition_points(condition)
+        self.value = item_points(condition, category)
+        self.terms = terms(text)
+
+class SwapCycle:
+    """
+    `legs` are (receiver_id, giver_id, item_id) tuples, in cycle order.
+    """
+    __slots__ = ("legs", "score")
+
+    def __init__(self, legs: List[Tuple[int, int, int]], score: float):
+        self.legs = legs
+        self.score = score
+
+    def key(self) -> Tuple:
+        # Same cycle regardless of which user it was found from
+        start = min(range(len(self.legs)), key=lambda i: self.legs[i])
+        return tuple(self.legs[start:] + self.legs[:start])
+
+class SwapGraph:
+    """
+    Want/offer graph over available items and wishlist entries.
+    Mutations may come from any thread; they are queued and applied under
+    the graph lock before the next search, so callers never wait on one.
+    """
+    def __init__(self, max_cycle_length: int = 4, search_budget: int = 20000, cycles_per_start: int = 50):
+        self.max_cycle_length = max_cycle_length
+        self.search_budget = search_budget
+        self.cycles_per_start = cycles_per_start
+        self.items: Dict[int, _Item] = {}
+        self.wants = SavedSearchIndex()
+        self.dirty_users: Set[int] = set()
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._items_by_key: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
+        self._items_by_category: Dict[str, Set[int]] = defaultdict(set)
+        self._items_by_owner: Dict[int, Set[int]] = defaultdict(set)
+        # (receiver, giver) -> number of matching (want, item) pairs
+        self._pairs: Dict[Tuple[int, int], int] = {}
+        self._node_index: Dict[int, int] = {}
+        self._node_ids: List[int] = []
+        self._csr = None
+
+    # -- mutations -------------------------------------------------------
+
+    def add_item(self, item_id: int, owner_id: int, category: str, size: str, condition: str, text: str = ""):
+        """Queue an item that is (now) available"""
+        self._pending.append((self._add_item, (item_id, owner_id, category, size, condition, text)))
+
+    def remove_item(self, item_id: int):
+        """Queue an item that is no longer available"""
+        self._pending.append((self._remove_item, (item_id,)))
+
+    def add_want(self, want_id: int, user_id: int, item_id=None, category=None, size=None, min_condition=None, keywords=None):
+        self._pending.append((self._add_want, (want_id, user_id, item_id, category, size, min_condition, keywords)))
+
+    def remove_want(self, want_id: int):
+        self._pending.append((self._remove_want, (want_id,)))
+
+    def _apply_pending(self):
+        while self._pending:
+            fn, args = self._pending.popleft()
+            fn(*args)
+
+    def _fit(self, want: SavedSearch, item_id: int, item: _Item) -> float:
+        """How well the item answers the want, about 1.0 to 2.0"""
+        fit = 1.0
+        if want.item_id == item_id:
+            fit += 0.5
+        if want.size is not None:
+            fit += 0.25
+        return fit + 0.25 * (item.condition - want.min_condition) / 100
+
+    def _items_for_want(self, want: SavedSearch) -> Iterable[Tuple[int, _Item]]:
+        if want.item_id is not None:
+            candidates = {want.item_id} & self.items.keys()
+        elif want.size is not None:
+            candidates = self._items_by_key.get((want.category, want.size), ())
+        else:
+            candidates = self._items_by_category.get(want.category, ())
+        for item_id in candidates:
+            item = self.items[item_id]
+            if want.matches(item_id, item):
+                yield item_id, item
+
+    def _bump(self, receiver: int, giver: int, delta: int):
+        pair = (receiver, giver)
+        before = self._pairs.get(pair, 0)
+        after = before + delta
+        if after > 0:
+            self._pairs[pair] = after
+        else:
+            self._pairs.pop(pair, None)
+        if (before > 0) != (after > 0):
+            # Only an edge appearing or disappearing can change which cycles exist
+            self._csr = None
+            self.dirty_users.update(pair)
+
+    def _add_item(self, item_id, owner_id, category, size, condition, text):
+        if item_id in self.items:
+            self._remove_item(item_id)
+        item = _Item(owner_id, category, size, condition, text)
+        self.items[item_id] = item
+        self._items_by_key[(category, size)].add(item_id)
+        self._items_by_category[category].add(item_id)
+        self._items_by_owner[owner_id].add(item_id)
+        for _, want in self.wants.match(item_id, item):
+            self._bump(want.user_id, owner_id, 1)
+
+    def _remove_item(self, item_id):
+        item = self.items.get(item_id)
+        if item is None:
+            return
+        for _, want in self.wants.match(item_id, item):
+            self._bump(want.user_id, item.owner_id, -1)
+        del self.items[item_id]
+        self._items_by_key[(item.category, item.size)].discard(item_id)
+        self._items_by_category[item.category].discard(item_id)
+        self._items_by_owner[item.owner_id].discard(item_id)
+
+    def _add_want(self, want_id, user_id, item_id, category, size, min_condition, keywords):
+        self._remove_want(want_id)
+        want = SavedSearch(user_id, item_id, category, size, min_condition, keywords)
+        self.wants.add(want_id, want)
+        for _, item in self._items_for_want(want):
+            self._bump(user_id, item.owner_id, 1)
+
+    def _remove_want(self, want_id):
+        want = self.wants.remove(want_id)
+        if want is None:
+            return
+        for _, item in self._items_for_want(want):
+            self._bump(want.user_id, item.owner_id, -1)
+
+    # -- search ----------------------------------------------------------
+
+    def _node(self, user_id: int) -> int:
+        index = self._node_index.get(user_id)
+        if index is None:
+            index = self._node_index[user_id] = len(self._node_ids)
+            self._node_ids.append(user_id)
+        return index
+
+    def _build_csr(self):
+        """
+        Forward and reverse adjacency as CSR arrays. They are converted to
+        lists at the end because the search indexes them one element at a
+        time, which is much faster on lists than on NumPy arrays.
+        """
+        count = len(self._pairs)
+        src = np.fromiter((self._node(u) for u, _ in self._pairs), dtype=np.int64, count=count)
+        dst = np.fromiter((self._node(v) for _, v in self._pairs), dtype=np.int64, count=count)
+        nodes = len(self._node_ids)
+
+        def compress(rows, cols):
+            order = np.lexsort((cols, rows))
+            offsets = np.zeros(nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows, minlength=nodes), out=offsets[1:])
+            return offsets.tolist(), cols[order].tolist()
+
+        self._csr = compress(src, dst) + compress(dst, src)
+
+    def _cycles_from(self, start: int, canonical: bool, budget: int) -> Iterable[List[int]]:
+        """
+        Bounded DFS for simple cycles through `start` of at most
+        max_cycle_length users. With `canonical`, only nodes numbered above
+        `start` are visited, so a full sweep finds every cycle exactly once.
+        """
+        offsets, neighbours, r_offsets, r_neighbours = self._csr
+        max_length = self.max_cycle_length
+        # Exact hops back to start for nodes at most two hops away, to prune
+        # paths that cannot close in time; any other node is at least three
+        # away. Going deeper would touch most of a dense graph for every start.
+        depth = min(max_length - 1, 2)
+        distance = {start: 0}
+        frontier = [start]
+        for hops in range(1, depth + 1):
+            next_frontier = []
+            for node in frontier:
+                for previous in r_neighbours[r_offsets[node]:r_offsets[node + 1]]:
+                    if previous not in distance and (not canonical or previous > start):
+                        distance[previous] = hops
+                        next_frontier.append(previous)
+            frontier = next_frontier
+
+        path = [start]
+        on_path = {start}
+        stack = [iter(neighbours[offsets[start]:offsets[start + 1]])]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                on_path.discard(path.pop())
+                continue
+            budget -= 1
+            if budget < 0:
+                return
+            if node == start:
+                if len(path) >= 2:
+                    yield list(path)
+                continue
+            if node in on_path or (canonical and node < start):
+                continue
+            if len(path) + distance.get(node, depth + 1) > max_length:
+                continue
+            path.append(node)
+            on_path.add(node)
+            stack.append(iter(neighbours[offsets[node]:offsets[node + 1]]))
+
+    def _best_item(self, receiver: int, giver: int, memo: dict) -> Optional[Tuple[float, int, _Item]]:
+        pair = (receiver, giver)
+        if pair in memo:
+            return memo[pair]
+        best = None
+        for want_id in self.wants.by_user.get(receiver, ()):
+            want = self.wants.searches[want_id]
+            for item_id in self._items_by_owner.get(giver, ()):
+                item = self.items[item_id]
+                if want.matches(item_id, item):
+                    fit = self._fit(want, item_id, item)
+                    if best is None or fit > best[0]:
+                        best = (fit, item_id, item)
+        memo[pair] = best
+        return best
+
+    def _score(self, users: List[int], memo: dict) -> Optional[SwapCycle]:
+        """
+        Picks the best-fitting item for every leg and scores the cycle:
+        average fit, minus how far each user's received and given item
+        values are apart, minus a small penalty per extra participant.
+        """
+        legs, fits, received = [], [], []
+        for position, receiver in enumerate(users):
+            giver = users[(position + 1) % len(users)]
+            best = self._best_item(receiver, giver, memo)
+            if best is None:
+                return None
+            fit, item_id, item = best
+            legs.append((receiver, giver, item_id))
+            fits.append(fit)
+            received.append(item.value)
+        # users[i] receives received[i] and gives received[i - 1]
+        imbalance = sum(abs(received[i] - received[i - 1]) for i in range(len(users)))
+        score = sum(fits) / len(users) - imbalance / (100 * len(users)) - 0.1 * (len(users) - 2)
+        return SwapCycle(legs, round(score, 4))
+
+    def find_cycles(self, user_ids: Optional[Iterable[int]] = None, limit: int = 20) -> List[SwapCycle]:
+        """
+        Returns the `limit` best cycles, best first. With `user_ids`, only
+        cycles through those users are searched; otherwise the whole graph.
+        """
+        with self._lock:
+            self._apply_pending()
+            if self._csr is None:
+                self._build_csr()
+            if user_ids is None:
+                starts, canonical = range(len(self._node_ids)), True
+            else:
+                starts = [self._node_index[u] for u in user_ids if u in self._node_index]
+                canonical = False
+
+            best: List[Tuple[float, int, SwapCycle]] = []
+            seen = set()
+            memo = {}
+            for start in starts:
+                paths = self._cycles_from(start, canonical, self.search_budget)
+                # Scoring dominates on dense graphs, so only the first few cycles per start are scored
+                for path in itertools.islice(paths, self.cycles_per_start):
+                    cycle = self._score([self._node_ids[node] for node in path], memo)
+                    if cycle is None:
+                        continue
+                    key = cycle.key()
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    entry = (cycle.score, len(seen), cycle)
+                    if len(best) < limit:
+                        heapq.heappush(best, entry)
+                    elif entry > best[0]:
+                        heapq.heapreplace(best, entry)
+            return [cycle for _, _, cycle in sorted(best, reverse=True)]
+
+    def take_dirty_users(self, limit: Optional[int] = None) -> Set[int]:
+        """
+        Users whose edges changed since the last call, for periodic
+        incremental runs: pass them to find_cycles(). With `limit`, at most
+        that many are taken and the rest are left for the next run.
+        """
+        with self._lock:
+            self._apply_pending()
+            if limit is None or len(self.dirty_users) <= limit:
+                dirty, self.dirty_users = self.dirty_users, set()
+                return dirty
+            dirty = set(itertools.islice(self.dirty_users, limit))
+            self.dirty_users -= dirty
+            return dirty
+
+    def stats(self) -> dict:
+        return {
+            "items": len(self.items),
+            "wants": len(self.wants.searches),
+            "edges": len(self._pairs),
+            "pending": len(self._pending),
+            "age_seconds": round(time.monotonic() - self.built_at),
+        }
+
+def build_swap_graph(db) -> SwapGraph:
+    """
+    Loads available items and wishlist entries into a new graph.
+    """
+    from sqlalchemy import select
+    from app.models.item import Item, ItemStatus
+    from app.models.wishlist import WishlistEntry
+
+    graph = SwapGraph(
+        max_cycle_length=settings.MATCHING_MAX_CYCLE_LENGTH,
+        search_budget=settings.MATCHING_SEARCH_BUDGET,
+    )
+    for entry in db.scalars(select(WishlistEntry)):
+        graph.add_want(
+            entry.id, entry.user_id, entry.item_id, entry.category, entry.size, entry.min_condition, entry.keywords
+        )
+    statement = select(
+        Item.id, Item.owner_id, Item.category, Item.size, Item.condition, Item.title, Item.description
+    ).where(Item.status == ItemStatus.AVAILABLE).execution_options(yield_per=5000)
+    for row in db.execute(statement):
+        graph.add_item(row.id, row.owner_id, row.category, row.size, row.condition, f"{row.title} {row.description or ''}")
+    with graph._lock:
+        graph._apply_pending()
+        graph.dirty_users.clear()
+    return graph
+
+_graph: Optional[SwapGraph] = None
+_graph_lock = threading.Lock()
+# Hooks fired while a replacement graph loads, replayed onto it once loaded
+_replay: Optional[list] = None
+
+def _load_graph() -> SwapGraph:
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return build_swap_graph(db)
+    finally:
+        db.close()
+
+def get_swap_graph() -> SwapGraph:
+    """
+    Returns the process-wide graph, loading it from the database on first
+    use. Once it is MATCHING_REBUILD_SECONDS old it is reloaded, so changes
+    made by other workers are picked up; one caller does the reload while
+    the others keep using the old graph. Blocks while loading: call it from
+    a worker thread in async code.
+    """
+    global _graph, _replay
+    with _graph_lock:
+        if _graph is None:
+            _graph = _load_graph()
+            return _graph
+        if _replay is not None or time.monotonic() - _graph.built_at <= settings.MATCHING_REBUILD_SECONDS:
+            return _graph
+        _replay = []
+    try:
+        graph = _load_graph()
+    except Exception:
+        with _graph_lock:
+            _replay = None
+        raise
+    with _graph_lock:
+        for method, args in _replay:
+            getattr(graph, method)(*args)
+        _graph, _replay = graph, None
+        return graph
+
+def _notify(method: str, *args):
+    if _graph is None:
+        return
+    getattr(_graph, method)(*args)
+    if _replay is not None:
+        _replay.append((method, args))
+
+# Write-through hooks for the CRUD layer. They do nothing until the graph has
+# been loaded, and only queue work, so they are safe to call on the event loop.
+
+def item_available(item):
+    _notify("add_item", item.id, item.owner_id, item.category, item.size, item.condition, f"{item.title} {item.description or ''}")
+
+def items_unavailable(item_ids: Iterable[int]):
+    for item_id in item_ids:
+        _notify("remove_item", item_id)
+
+item_events.subscribe(available=item_available, unavailable=items_unavailable)
+
+def want_added(entry):
+    _notify("add_want", entry.id, entry.user_id, entry.item_id, entry.category, entry.size, entry.min_condition, entry.keywords)
+
+def want_removed(want_id: int):
+    _notify("remove_want", want_id)
+
+register_stats("swap_graph", lambda: _graph.stats() if _graph else None)
+
+def save_suggestions(db, cycles: List[SwapCycle]) -> int:
+    """
+    Stores a nightly batch of suggestions and drops older batches.
+    Returns the batch number.
+    """
+    from sqlalchemy import delete, func, select
+    from app.models.match import SwapSuggestion, SwapSuggestionLeg
+
+    batch = (db.scalar(select(func.max(SwapSuggestion.batch))) or 0) + 1
+    for cycle in cycles:
+        db.add(SwapSuggestion(
+            batch=batch,
+            score=cycle.score,
+            legs=[
+                SwapSuggestionLeg(position=position, receiver_id=receiver, giver_id=giver, item_id=item_id)
+                for position, (receiver, giver, item_id) in enumerate(cycle.legs)
+            ],
+        ))
+    db.flush()
+    old = select(SwapSuggestion.id).where(SwapSuggestion.batch < batch)
+    db.execute(delete(SwapSuggestionLeg).where(SwapSuggestionLeg.suggestion_id.in_(old)))
+    db.execute(delete(SwapSuggestion).where(SwapSuggestion.batch < batch))
+    db.commit()
+    return batch
+
+def main():
+    """
+    Nightly batch: python -m app.services.matching [--limit N] [--max-length N]
+    """
+    import argparse
+    from app.db.migrate import migrate
+    from app.db.session import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Find swap cycles over the whole catalogue and store them as suggestions")
+    parser.add_argument("--limit", type=int, default=1000, help="Number of cycles to keep")
+    parser.add_argument("--max-length", type=int, default=settings.MATCHING_MAX_CYCLE_LENGTH)
+    args = parser.parse_args()
+
+    migrate(engine)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        graph = build_swap_graph(db)
+        graph.max_cycle_length = args.max_length
+        loaded = time.perf_counter()
+        cycles = graph.find_cycles(limit=args.limit)
+        searched = time.perf_counter()
+        batch = save_suggestions(db, cycles)
+    finally:
+        db.close()
+    print(
+        f"batch {batch}: {len(cycles)} cycles over {graph.stats()['edges']} edges "
+        f"(load {loaded - started:.2f}s, search {searched - loaded:.2f}s)"
+    )
+
+if __name__ == "__main__":
+    main()
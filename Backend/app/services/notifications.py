@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.instrumentation import register_stats
+from app.services import item_events
+from app.services.percolator import Percolator, load_percolator
+
+# Wishlist notifications: every new listing is percolated against saved
+# searches on the request path (cheap, index lookups only), and the matches
+# are coalesced per user into a digest that a background worker writes out
+# every NOTIFY_FLUSH_SECONDS.
+
+logger = logging.getLogger(__name__)
+
+class _Digest:
+    __slots__ = ("item_ids", "total")
+
+    def __init__(self):
+        self.item_ids: List[int] = []
+        self.total = 0
+
+class NotificationQueue:
+    """
+    Coalescing queue of wishlist matches, at most one digest per user per flush.
+    - Each digest keeps the first `max_items` item ids and counts the rest.
+    - Once `max_users` users are waiting the worker is woken to flush early,
+      and matches for users not already waiting are dropped (counted in
+      `dropped`) until it has, so a bulk import cannot grow the queue
+      without bound.
+    - Digests whose write fails are put back and retried with the next
+      flush, up to `max_retries` times in a row before they are discarded
+      (counted in `digests_failed`).
+    push() is thread-safe and never does I/O.
+    """
+    def __init__(
+        self,
+        writer: Callable[[Dict[int, _Digest]], None],
+        flush_interval: float = 30,
+        max_items: int = 20,
+        max_users: int = 10000,
+        max_retries: int = 3,
+    ):
+        self.writer = writer
+        self.flush_interval = flush_interval
+        self.max_items = max_items
+        self.max_users = max_users
+        self.max_retries = max_retries
+        self.pushed = 0
+        self.dropped = 0
+        self.digests_written = 0
+        self.digests_failed = 0
+        self._failures = 0
+        self._pending: Dict[int, _Digest] = {}
+        self._lock = threading.Lock()
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def push(self, user_id: int, item_id: int) -> bool:
+        with self._lock:
+            digest = self._pending.get(user_id)
+            if digest is None:
+                if len(self._pending) >= self.max_users:
+                    self.dropped += 1
+                    self._wake_worker()
+                    return False
+                digest = self._pending[user_id] = _Digest()
+            digest.total += 1
+            if len(digest.item_ids) < self.max_items:
+                digest.item_ids.append(item_id)
+            self.pushed += 1
+            if len(self._pending) >= self.max_users:
+                self._wake_worker()
+            return True
+
+    def _wake_worker(self):
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _drain(self) -> Dict[int, _Digest]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            return pending
+
+    def _requeue(self, digests: Dict[int, _Digest]):
+        # Put a failed batch back ahead of anything pushed since it was drained
+        with self._lock:
+            for user_id, newer in self._pending.items():
+                digest = digests.setdefault(user_id, _Digest())
+                digest.total += newer.total
+                digest.item_ids.extend(newer.item_ids[:self.max_items - len(digest.item_ids)])
+            self._pending = digests
+
+    async def flush(self):
+        digests = self._drain()
+        if not digests:
+            return
+        try:
+            await asyncio.to_thread(self.writer, digests)
+        except Exception:
+            self._failures += 1
+            if self._failures <= self.max_retries:
+                self._requeue(digests)
+            else:
+                self._failures = 0
+                self.digests_failed += len(digests)
+            raise
+        self._failures = 0
+        self.digests_written += len(digests)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Writing notification digests failed")
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "waiting_users": len(self._pending),
+            "pushed": self.pushed,
+            "dropped": self.dropped,
+            "digests_written": self.digests_written,
+            "digests_failed": self.digests_failed,
+        }
+
+def write_digests(digests: Dict[int, _Digest]):
+    """Insert one notification row per digest, in a single batch"""
+    from sqlalchemy import insert
+    from app.db.session import SessionLocal
+    from app.models.notification import Notification
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": user_id,
+            "kind": "wishlist_match",
+            "message": f"{digest.total} new item{'s match' if digest.total != 1 else ' matches'} your wishlist",
+            "item_ids": ",".join(map(str, digest.item_ids)),
+            "total": digest.total,
+            "created_at": now,
+        }
+        for user_id, digest in digests.items()
+    ]
+    db = SessionLocal()
+    try:
+        db.execute(insert(Notification), rows)
+        db.commit()
+    finally:
+        db.close()
+
+_percolator: Optional[Percolator] = None
+_queue: Optional[NotificationQueue] = None
+_reload_task: Optional[asyncio.Task] = None
+# Wishlist changes made while the percolator reloads, replayed onto the new one
+_replay: Optional[list] = None
+
+def _load() -> Percolator:
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return load_percolator(db)
+    finally:
+        db.close()
+
+async def _reload_periodically():
+    # Picks up wishlist changes made through other workers
+    global _percolator, _replay
+    while True:
+        await asyncio.sleep(settings.NOTIFY_RELOAD_SECONDS)
+        _replay = []
+        try:
+            percolator = await asyncio.to_thread(_load)
+            for method, args in _replay:
+                getattr(percolator, method)(*args)
+            _percolator = percolator
+        except Exception:
+            logger.exception("Reloading saved searches failed")
+        finally:
+            _replay = None
+
+async def start_notifications():
+    """Load saved searches and start the digest worker (app startup)"""
+    global _percolator, _queue, _reload_task
+    _percolator = await asyncio.to_thread(_load)
+    _queue = NotificationQueue(
+        write_digests,
+        flush_interval=settings.NOTIFY_FLUSH_SECONDS,
+        max_items=settings.NOTIFY_MAX_ITEMS_PER_DIGEST,
+        max_users=settings.NOTIFY_MAX_PENDING_USERS,
+        max_retries=settings.NOTIFY_MAX_RETRIES,
+    )
+    _queue.start()
+    _reload_task = asyncio.create_task(_reload_periodically())
+
+async def stop_notifications():
+    """Stop the worker and write out anything still queued (app shutdown)"""
+    global _percolator, _queue, _reload_task
+    if _reload_task is not None:
+        _reload_task.cancel()
+        _reload_task = None
+    if _queue is not None:
+        await _queue.stop()
+    _percolator, _queue = None, None
+
+def get_notification_queue() -> Optional[NotificationQueue]:
+    return _queue
+
+def _notify(method: str, *args):
+    if _percolator is None:
+        return
+    getattr(_percolator, method)(*args)
+    if _replay is not None:
+        _replay.append((method, args))
+
+def search_added(entry):
+    _notify("add", entry)
+
+def search_removed(search_id: int):
+    _notify("remove", search_id)
+
+def item_available(item):
+    if _percolator is None or _queue is None:
+        return
+    for user_id in _percolator.percolate(item):
+        _queue.push(user_id, item.id)
+
+item_events.subscribe(available=item_available)
+
+register_stats("notifications", lambda: _queue.stats() if _queue else None)
@@ -0,0 +1,77 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from app.core import security
+from app.core.config import settings
+from app.core.instrumentation import register_stats
+
+# bcrypt is deliberately slow CPU work. It runs on its own small pool so a
+# burst of logins cannot take over the threadpool other routes depend on.
+# The bcrypt extension releases the GIL while hashing, so threads are enough.
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised instead of queueing when `max_pending` hash jobs are already
+    running or waiting.
+    """
+    def __init__(self, detail: str, retry_after: int = 1):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+class PasswordHasher:
+    def __init__(self, max_workers: int = 2, max_pending: int = 32):
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy("Too many sign-in attempts are being processed, please retry shortly")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(security.get_password_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """
+        Returns (valid, new_hash). `new_hash` is set when the stored hash
+        was made with a different cost than BCRYPT_ROUNDS.
+        """
+        return await self._run(security.verify_and_update_password, password, hashed_password)
+
+    def stats(self) -> dict:
+        return {"pending": self.pending, "max_pending": self.max_pending, "rejected": self.rejected}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+_hasher: Optional[PasswordHasher] = None
+
+def get_password_hasher() -> PasswordHasher:
+    """
+    Returns the process-wide hasher, creating it from settings on first use.
+    """
+    global _hasher
+    if _hasher is None:
+        _hasher = PasswordHasher(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+        )
+    return _hasher
+
+def shutdown_password_hasher():
+    global _hasher
+    if _hasher is not None:
+        _hasher.shutdown()
+        _hasher = None
+
+register_stats("password_hasher", lambda: _hasher.stats() if _hasher else None)
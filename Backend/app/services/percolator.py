@@ -0,0 +1,153 @@
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from app.services.points import condition_points
+
+# Reverse search over wishlist entries (saved searches): given a new item,
+# find the searches it satisfies without scanning all of them. Searches are
+# indexed by their predicates, (category, size or any, minimum condition,
+# one keyword or none), and an item only reads the buckets it can satisfy:
+# its own category, its size or any size, each minimum condition at or below
+# its own, and each of its words. The cost follows the number of matching
+# searches, not the number registered.
+
+_TERM_RE = re.compile(r"[a-z0-9']+")
+
+def terms(text: Optional[str]) -> frozenset:
+    return frozenset(_TERM_RE.findall((text or "").lower()))
+
+class ItemFeatures:
+    __slots__ = ("owner_id", "category", "size", "condition", "terms")
+
+    def __init__(self, owner_id, category, size, condition, text):
+        self.owner_id = owner_id
+        self.category = category
+        self.size = size
+        self.condition = condition_points(condition)
+        self.terms = terms(text)
+
+    @classmethod
+    def of(cls, item) -> "ItemFeatures":
+        return cls(item.owner_id, item.category, item.size, item.condition, f"{item.title} {item.description or ''}")
+
+class SavedSearch:
+    """
+    One wishlist entry: a specific item, or any item in a category with
+    optional size, minimum condition and keywords (all must appear).
+    """
+    __slots__ = ("user_id", "item_id", "category", "size", "min_condition", "keywords")
+
+    def __init__(self, user_id, item_id=None, category=None, size=None, min_condition=None, keywords=None):
+        self.user_id = user_id
+        self.item_id = item_id
+        self.category = category
+        self.size = size or None
+        self.min_condition = condition_points(min_condition) if min_condition else 0
+        self.keywords = terms(keywords)
+
+    @classmethod
+    def of(cls, entry) -> "SavedSearch":
+        return cls(entry.user_id, entry.item_id, entry.category, entry.size, entry.min_condition, entry.keywords)
+
+    def matches(self, item_id: int, item) -> bool:
+        if self.user_id == item.owner_id:
+            return False
+        if self.item_id is not None:
+            return self.item_id == item_id
+        return (
+            self.category == item.category
+            and (self.size is None or self.size == item.size)
+            and item.condition >= self.min_condition
+            and self.keywords <= item.terms
+        )
+
+class SavedSearchIndex:
+    """
+    Predicate index over saved searches. Not thread-safe on its own.
+    """
+    def __init__(self):
+        self.searches: Dict[int, SavedSearch] = {}
+        self.by_user: Dict[int, Set[int]] = defaultdict(set)
+        self._by_item: Dict[int, Set[int]] = defaultdict(set)
+        self._by_key: Dict[Tuple, Set[int]] = defaultdict(set)
+        self._condition_levels: Set[int] = set()
+
+    def _key(self, search: SavedSearch) -> Tuple:
+        # One keyword is enough to index on; the rest are checked by matches()
+        anchor = min(search.keywords) if search.keywords else None
+        return (search.category, search.size, search.min_condition, anchor)
+
+    def add(self, search_id: int, search: SavedSearch):
+        self.remove(search_id)
+        self.searches[search_id] = search
+        self.by_user[search.user_id].add(search_id)
+        if search.item_id is not None:
+            self._by_item[search.item_id].add(search_id)
+        else:
+            self._by_key[self._key(search)].add(search_id)
+            self._condition_levels.add(search.min_condition)
+
+    def remove(self, search_id: int) -> Optional[SavedSearch]:
+        search = self.searches.pop(search_id, None)
+        if search is None:
+            return None
+        self.by_user[search.user_id].discard(search_id)
+        if search.item_id is not None:
+            self._by_item[search.item_id].discard(search_id)
+        else:
+            self._by_key[self._key(search)].discard(search_id)
+        return search
+
+    def match(self, item_id: int, item) -> Iterable[Tuple[int, SavedSearch]]:
+        """Yields (search_id, search) for every saved search the item satisfies"""
+        candidates = set(self._by_item.get(item_id, ()))
+        anchors = [None, *item.terms]
+        for size in (item.size, None):
+            for level in self._condition_levels:
+                if level > item.condition:
+                    continue
+                for anchor in anchors:
+                    candidates.update(self._by_key.get((item.category, size, level, anchor), ()))
+        for search_id in candidates:
+            search = self.searches[search_id]
+            if search.matches(item_id, item):
+                yield search_id, search
+
+class Percolator:
+    """
+    Thread-safe SavedSearchIndex for matching new listings to wishlists.
+    """
+    def __init__(self):
+        self._index = SavedSearchIndex()
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        with self._lock:
+            self._index.add(entry.id, SavedSearch.of(entry))
+
+    def remove(self, search_id: int):
+        with self._lock:
+            self._index.remove(search_id)
+
+    def percolate(self, item) -> Dict[int, int]:
+        """
+        Returns {user_id: search_id} for users with a saved search the item
+        satisfies, one search per user.
+        """
+        features = ItemFeatures.of(item)
+        with self._lock:
+            return {search.user_id: search_id for search_id, search in self._index.match(item.id, features)}
+
+    def __len__(self):
+        return len(self._index.searches)
+
+def load_percolator(db) -> Percolator:
+    from sqlalchemy import select
+    from app.models.wishlist import WishlistEntry
+
+    percolator = Percolator()
+    for entry in db.scalars(select(WishlistEntry)):
+        percolator.add(entry)
+    return percolator
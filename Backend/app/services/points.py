@@ -0,0 +1,11 @@
+from typing import Optional
+
+# Item values, matching the calculation shown on the swap pages
+CONDITION_POINTS = {"New": 100, "Like New": 80, "Good": 60, "Fair": 40, "Poor": 20}
+CATEGORY_MULTIPLIER = {"Clothes": 1.0, "Footwear": 1.2, "Accessories": 0.8}
+
+def condition_points(condition: Optional[str]) -> int:
+    return CONDITION_POINTS.get(condition, 50)
+
+def item_points(condition: Optional[str], category: Optional[str]) -> int:
+    return round(condition_points(condition) * CATEGORY_MULTIPLIER.get(category, 1.0))
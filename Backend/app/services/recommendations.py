@@ -0,0 +1,301 @@
+import math
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.instrumentation import register_stats
+from app.services import item_events
+from app.services.points import condition_points
+
+# "Similar items" index. Every available item is one row of a float32 feature
+# matrix made of four blocks, each L2-normalised and scaled by the square
+# root of its weight, so a dot product of two rows is the weighted sum of
+# the per-block cosine similarities:
+#   text       hashed TF-IDF of title and description
+#   category   hashed one-hot
+#   size       hashed one-hot
+#   condition  unit vector at an angle set by the condition, so close
+#              conditions score close to 1
+# Nearest neighbours are found with one matrix-vector product over all rows.
+
+BLOCK_WEIGHTS = {"text": 0.6, "category": 0.25, "size": 0.1, "condition": 0.05}
+# Neighbours computed and cached per item; requests take a prefix
+CACHED_NEIGHBOURS = 20
+
+_TERM_RE = re.compile(r"[a-z0-9']+")
+
+def _bucket(value: str, dims: int) -> int:
+    # crc32 rather than hash() so buckets are the same in every process
+    return zlib.crc32(value.encode("utf-8")) % dims
+
+class SimilarItemsIndex:
+    """
+    Feature matrix plus a per-item LRU of neighbour lists. Adding or
+    removing an item only drops the cached lists it would change.
+    IDF weights are taken when a row is added; rebuilding refreshes them.
+    """
+    def __init__(self, text_dims: int = 128, category_dims: int = 32, size_dims: int = 16, cache_items: int = 10000):
+        self.text_dims = text_dims
+        self.category_dims = category_dims
+        self.size_dims = size_dims
+        self.dims = text_dims + category_dims + size_dims + 2
+        self.cache_items = cache_items
+        self.hits = 0
+        self.misses = 0
+        self.built_at = time.monotonic()
+        self._matrix = np.zeros((1024, self.dims), dtype=np.float32)
+        self._active = np.zeros(1024, dtype=bool)
+        self._ids = np.zeros(1024, dtype=np.int64)
+        self._rows: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._used = 0
+        self._df = np.zeros(text_dims, dtype=np.float64)
+        self._docs = 0
+        # item id -> (neighbour ids, neighbour scores)
+        self._cache: "OrderedDict[int, Tuple[List[int], np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _term_counts(self, text: str) -> np.ndarray:
+        counts = np.zeros(self.text_dims, dtype=np.float64)
+        for term in _TERM_RE.findall((text or "").lower()):
+            counts[_bucket(term, self.text_dims)] += 1
+        return counts
+
+    def _vector(self, category: Optional[str], size: Optional[str], condition: Optional[str], counts: np.ndarray) -> np.ndarray:
+        vector = np.zeros(self.dims, dtype=np.float32)
+        idf = np.log((1 + self._docs) / (1 + self._df)) + 1
+        text = counts * idf
+        norm = np.linalg.norm(text)
+        if norm:
+            vector[:self.text_dims] = text / norm * math.sqrt(BLOCK_WEIGHTS["text"])
+        offset = self.text_dims
+        if category:
+            vector[offset + _bucket(category, self.category_dims)] = math.sqrt(BLOCK_WEIGHTS["category"])
+        offset += self.category_dims
+        if size:
+            vector[offset + _bucket(size, self.size_dims)] = math.sqrt(BLOCK_WEIGHTS["size"])
+        angle = condition_points(condition) / 100 * math.pi / 2
+        vector[-2:] = np.array([math.cos(angle), math.sin(angle)]) * math.sqrt(BLOCK_WEIGHTS["condition"])
+        return vector
+
+    def _grow(self):
+        capacity = len(self._active) * 2
+        for name in ("_matrix", "_active", "_ids"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _insert(self, item_id, category, size, condition, counts) -> np.ndarray:
+        self._remove(item_id)
+        self._df += counts > 0
+        self._docs += 1
+        vector = self._vector(category, size, condition, counts)
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._used == len(self._active):
+                self._grow()
+            row = self._used
+            self._used += 1
+        self._matrix[row] = vector
+        self._active[row] = True
+        self._ids[row] = item_id
+        self._rows[item_id] = row
+        return vector
+
+    def add(self, item_id: int, category: str, size: str, condition: str, text: str = ""):
+        """Index an available item, replacing any previous row for it"""
+        counts = self._term_counts(text)
+        with self._lock:
+            vector = self._insert(item_id, category, size, condition, counts)
+            self._invalidate_closer_than(vector, item_id)
+
+    def add_many(self, rows: List[Tuple[int, str, str, str, str]]):
+        """
+        Bulk add of (item_id, category, size, condition, text) rows. Drops
+        the whole neighbour cache once instead of checking every cached list
+        against every new row.
+        """
+        counts = [self._term_counts(row[4]) for row in rows]
+        with self._lock:
+            for (item_id, category, size, condition, _), item_counts in zip(rows, counts):
+                self._insert(item_id, category, size, condition, item_counts)
+            self._cache.clear()
+
+    def remove(self, item_id: int):
+        with self._lock:
+            self._remove(item_id)
+
+    def _remove(self, item_id: int):
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return
+        self._df -= self._matrix[row, :self.text_dims] > 0
+        self._docs -= 1
+        self._active[row] = False
+        self._free.append(row)
+        self._cache.pop(item_id, None)
+        for key in [key for key, (ids, _) in self._cache.items() if item_id in ids]:
+            del self._cache[key]
+
+    def _invalidate_closer_than(self, vector: np.ndarray, item_id: int):
+        """Drop cached lists the new item would now appear in"""
+        if not self._cache:
+            return
+        keys = [key for key in self._cache if key in self._rows]
+        scores = self._matrix[[self._rows[key] for key in keys]] @ vector
+        for key, score in zip(keys, scores):
+            ids, neighbour_scores = self._cache[key]
+            if key != item_id and (len(ids) < CACHED_NEIGHBOURS or score > neighbour_scores[-1]):
+                del self._cache[key]
+
+    def _neighbours(self, vector: np.ndarray, exclude_row: Optional[int]) -> Tuple[List[int], np.ndarray]:
+        scores = self._matrix[:self._used] @ vector
+        scores[~self._active[:self._used]] = -np.inf
+        if exclude_row is not None:
+            scores[exclude_row] = -np.inf
+        candidates = int(np.count_nonzero(np.isfinite(scores)))
+        k = min(CACHED_NEIGHBOURS, candidates)
+        if k == 0:
+            return [], np.zeros(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return self._ids[top].tolist(), scores[top]
+
+    def similar(self, item_id: int, limit: int = 4, category=None, size=None, condition=None, text: str = "") -> List[int]:
+        """
+        Returns up to `limit` (at most CACHED_NEIGHBOURS) ids of the most
+        similar available items. Items that are not in the index, such as
+        ones already swapped, are looked up from the given attributes and
+        not cached.
+        """
+        with self._lock:
+            cached = self._cache.get(item_id)
+            if cached is not None:
+                self.hits += 1
+                self._cache.move_to_end(item_id)
+                return cached[0][:limit]
+            self.misses += 1
+            row = self._rows.get(item_id)
+            if row is None:
+                vector = self._vector(category, size, condition, self._term_counts(text))
+                return self._neighbours(vector, None)[0][:limit]
+            ids, scores = self._neighbours(self._matrix[row], row)
+            self._cache[item_id] = (ids, scores)
+            while len(self._cache) > self.cache_items:
+                self._cache.popitem(last=False)
+            return ids[:limit]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "items": len(self._rows),
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+def build_similar_items_index(db) -> SimilarItemsIndex:
+    """
+    Loads every available item. Document frequencies are counted first so
+    all rows share the same IDF weights.
+    """
+    from sqlalchemy import select
+    from app.models.item import Item, ItemStatus
+
+    index = SimilarItemsIndex(
+        text_dims=settings.SIMILAR_TEXT_DIMS,
+        cache_items=settings.SIMILAR_CACHE_ITEMS,
+    )
+    statement = select(
+        Item.id, Item.category, Item.size, Item.condition, Item.title, Item.description
+    ).where(Item.status == ItemStatus.AVAILABLE).execution_options(yield_per=5000)
+    rows = [
+        (row.id, row.category, row.size, row.condition, index._term_counts(f"{row.title} {row.description or ''}"))
+        for row in db.execute(statement)
+    ]
+    for *_, counts in rows:
+        index._df += counts > 0
+    index._docs = len(rows)
+    while len(index._active) < len(rows):
+        index._grow()
+    for row, (item_id, category, size, condition, counts) in enumerate(rows):
+        index._matrix[row] = index._vector(category, size, condition, counts)
+        index._active[row] = True
+        index._ids[row] = item_id
+        index._rows[item_id] = row
+    index._used = len(rows)
+    return index
+
+_index: Optional[SimilarItemsIndex] = None
+_index_lock = threading.Lock()
+# Hooks fired while a replacement index loads, replayed onto it once loaded
+_replay: Optional[list] = None
+
+def _load_index() -> SimilarItemsIndex:
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return build_similar_items_index(db)
+    finally:
+        db.close()
+
+def get_similar_items_index() -> SimilarItemsIndex:
+    """
+    Returns the process-wide index, loading it on first use and reloading it
+    once it is SIMILAR_REBUILD_SECONDS old (to pick up other workers' changes
+    and refresh IDF weights) while other callers keep using the old one.
+    Blocks while loading: call it from a worker thread in async code.
+    """
+    global _index, _replay
+    with _index_lock:
+        if _index is None:
+            _index = _load_index()
+            return _index
+        if _replay is not None or time.monotonic() - _index.built_at <= settings.SIMILAR_REBUILD_SECONDS:
+            return _index
+        _replay = []
+    try:
+        index = _load_index()
+    except Exception:
+        with _index_lock:
+            _replay = None
+        raise
+    with _index_lock:
+        for method, args in _replay:
+            getattr(index, method)(*args)
+        _index, _replay = index, None
+        return index
+
+def _notify(method: str, *args):
+    if _index is None:
+        return
+    getattr(_index, method)(*args)
+    if _replay is not None:
+        _replay.append((method, args))
+
+def item_available(item):
+    _notify("add", item.id, item.category, item.size, item.condition, f"{item.title} {item.description or ''}")
+
+def items_available(items):
+    _notify("add_many", [
+        (item.id, item.category, item.size, item.condition, f"{item.title} {item.description or ''}")
+        for item in items
+    ])
+
+def items_unavailable(item_ids: Iterable[int]):
+    for item_id in item_ids:
+        _notify("remove", item_id)
+
+item_events.subscribe(available=item_available, unavailable=items_unavailable, available_many=items_available)
+
+register_stats("similar_items", lambda: _index.stats() if _index else None)
@@ -0,0 +1,189 @@
+import hashlib
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.instrumentation import register_stats
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+def fingerprint(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+class _Entry:
+    __slots__ = ("response", "expires_at", "context", "terms")
+
+    def __init__(self, response: str, expires_at: float, context: str, terms: Counter):
+        self.response = response
+        self.expires_at = expires_at
+        self.context = context
+        self.terms = terms
+
+class ResponseCache:
+    """
+    Cache of chatbot answers in front of the LLM.
+    - Exact lookup on the normalised question plus the last `history_turns`
+      messages of conversation history.
+    - Optional similarity lookup: when `similarity_threshold` > 0, a question
+      with the same recent history whose TF-IDF cosine similarity to a cached
+      question reaches the threshold reuses that answer.
+    Entries expire after `ttl` seconds and the least recently used are evicted
+    beyond `max_entries`. Everything is dropped when the namespace (a
+    fingerprint of the system prompt and model) changes.
+    Not thread-safe: use it from the event loop only.
+    """
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 3600,
+        similarity_threshold: float = 0.0,
+        history_turns: int = 2,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.history_turns = history_turns
+        self.namespace: Optional[str] = None
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # term -> keys of cached questions containing it, for similarity candidates
+        self._postings: Dict[str, Set[str]] = {}
+
+    def _context(self, conversation_history: Optional[list]) -> str:
+        if not conversation_history or self.history_turns <= 0:
+            return ""
+        recent = conversation_history[-self.history_turns:]
+        return fingerprint(*(f"{turn.get('role')}:{normalize(str(turn.get('content', '')))}" for turn in recent))
+
+    def _check_namespace(self, namespace: str):
+        if namespace != self.namespace:
+            self.invalidate()
+            self.namespace = namespace
+
+    def invalidate(self):
+        """Drop every cached answer"""
+        self._entries.clear()
+        self._postings.clear()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for term in entry.terms:
+            keys = self._postings.get(term)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[term]
+
+    def _idf(self, term: str) -> float:
+        return math.log((len(self._entries) + 1) / (len(self._postings.get(term, ())) + 1)) + 1
+
+    def _vector(self, terms: Counter) -> Dict[str, float]:
+        weights = {term: count * self._idf(term) for term, count in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+        return {term: weight / norm for term, weight in weights.items()}
+
+    def _most_similar(self, terms: Counter, context: str, now: float) -> Optional[str]:
+        candidates = set()
+        for term in terms:
+            candidates.update(self._postings.get(term, ()))
+        if not candidates:
+            return None
+        query = self._vector(terms)
+        best_key, best_score = None, 0.0
+        for key in candidates:
+            entry = self._entries[key]
+            if entry.context != context or entry.expires_at <= now:
+                continue
+            vector = self._vector(entry.terms)
+            score = sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+            if score > best_score:
+                best_key, best_score = key, score
+        if best_score >= self.similarity_threshold:
+            return best_key
+        return None
+
+    def get(self, question: str, conversation_history: Optional[list], namespace: str) -> Optional[str]:
+        """
+        Returns a cached answer for the question, or None on a miss.
+        """
+        self._check_namespace(namespace)
+        normalized = normalize(question)
+        context = self._context(conversation_history)
+        key = fingerprint(context, normalized)
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            self._remove(key)
+            entry = None
+        if entry is None and self.similarity_threshold > 0 and normalized:
+            similar_key = self._most_similar(Counter(normalized.split()), context, now)
+            if similar_key is not None:
+                key, entry = similar_key, self._entries[similar_key]
+                self.similar_hits += 1
+        elif entry is not None:
+            self.exact_hits += 1
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry.response
+
+    def set(self, question: str, conversation_history: Optional[list], namespace: str, response: str):
+        """
+        Caches the answer to the question.
+        """
+        self._check_namespace(namespace)
+        normalized = normalize(question)
+        context = self._context(conversation_history)
+        key = fingerprint(context, normalized)
+        self._remove(key)
+        terms = Counter(normalized.split())
+        self._entries[key] = _Entry(response, time.monotonic() + self.ttl, context, terms)
+        for term in terms:
+            self._postings.setdefault(term, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.exact_hits + self.similar_hits) / lookups if lookups else 0.0,
+        }
+
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> ResponseCache:
+    """
+    Returns the process-wide response cache, creating it from settings on first use.
+    """
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            ttl=settings.RESPONSE_CACHE_TTL,
+            similarity_threshold=settings.RESPONSE_CACHE_SIMILARITY,
+            history_turns=settings.RESPONSE_CACHE_HISTORY_TURNS,
+        )
+    return _response_cache
+
+register_stats("response_cache", lambda: _response_cache.stats() if _response_cache else None)
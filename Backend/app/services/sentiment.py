@@ -0,0 +1,346 @@
+import asyncio
+import importlib.util
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.instrumentation import register_stats
+
+# Chat message sentiment, scored the way TextBlob's default PatternAnalyzer
+# scores it (same lexicon, tokenisation, negation, intensifier, "!" and
+# emoticon rules) without building a TextBlob per message. The lexicon is
+# compiled once into a flat dict, and scores are memoised per text.
+
+logger = logging.getLogger(__name__)
+
+NEGATIONS = frozenset(("no", "not", "n't", "never"))
+# Matches TextBlob's PUNCTUATION; "." is handled separately
+_PUNCTUATION = ".,;:!?()[]{}`''\"@#$^&*+-|=~_"
+_SPLIT = tuple(_PUNCTUATION.replace(".", ""))
+_ABBREVIATIONS = frozenset((
+    "a.", "adj.", "adv.", "al.", "a.m.", "c.", "cf.", "comp.", "conf.", "def.", "ed.", "e.g.", "esp.",
+    "etc.", "ex.", "f.", "fig.", "gen.", "id.", "i.e.", "int.", "l.", "m.", "Med.", "Mil.", "Mr.", "n.",
+    "n.q.", "orig.", "pl.", "pred.", "pres.", "p.m.", "ref.", "v.", "vs.", "w/",
+))
+_RE_ABBR = re.compile(r"^[A-Za-z]\.$|^([A-Za-z]\.)+$|^[A-Z][bcdfghjklmnpqrstvwxz]+.$")
+_RE_CONTRACTION = re.compile(r"('d|'m|'s|'ll|'re|'ve|n't)")
+_RE_QUOTES = re.compile("([“”‘’'\"])")
+_RE_SARCASM = re.compile(r"\( ?\! ?\)")
+EMOTICONS = {
+    +1.00: ("<3", "♥", ">:D", ":-D", ":D", "=-D", "=D", "X-D", "x-D", "XD", "xD", "8-D"),
+    +0.75: (">:P", ":-P", ":P", ":-p", ":p", ":-b", ":b", ":c)", ":o)", ":^)"),
+    +0.50: (">:)", ":-)", ":)", "=)", "=]", ":]", ":}", ":>", ":3", "8)", "8-)"),
+    +0.25: (">;]", ";-)", ";)", ";-]", ";]", ";D", ";^)", "*-)", "*)"),
+    +0.05: (">:o", ":-O", ":O", ":o", ":-o", "o_O", "o.O", "°O°", "°o°"),
+    -0.25: (">:/", ":-/", ":/", ":\\", ">:\\", ":-.", ":-s", ":s", ":S", ":-S", ">.>"),
+    -0.75: (">:[", ":-(", ":(", "=(", ":-[", ":[", ":{", ":-<", ":c", ":-c", "=/"),
+    -1.00: (":'(", ":'''(", ";'("),
+}
+_RE_EMOTICONS = re.compile(
+    r"(%s)($|\s)" % "|".join(r" ?".join(map(re.escape, e)) for faces in EMOTICONS.values() for e in faces)
+)
+_EMOTICON_POLARITY: Dict[str, float] = {}
+for _polarity, _faces in EMOTICONS.items():
+    for _face in _faces:
+        _EMOTICON_POLARITY.setdefault(_face.lower(), _polarity)
+
+def lexicon_path() -> str:
+    """TextBlob's sentiment lexicon, found without importing textblob"""
+    spec = importlib.util.find_spec("textblob")
+    if spec is None or not spec.submodule_search_locations:
+        raise RuntimeError("The sentiment lexicon ships with the textblob package, which is not installed")
+    return os.path.join(spec.submodule_search_locations[0], "en", "en-sentiment.xml")
+
+def compile_lexicon(path: str) -> Dict[str, Tuple[float, float, bool]]:
+    """
+    Reads the XML lexicon into {word: (polarity, intensity, is_modifier)},
+    averaging word senses as TextBlob does, and adds the "-ly" adverb of
+    every adjective ("terrible" -> "terribly").
+    """
+    from xml.etree import ElementTree
+
+    senses: Dict[str, Dict[Optional[str], list]] = {}
+    for node in ElementTree.parse(path).getroot().iter("word"):
+        form = node.get("form")
+        if form:
+            scores = (float(node.get("polarity", 0.0)), float(node.get("intensity", 1.0)))
+            senses.setdefault(form, {}).setdefault(node.get("pos"), []).append(scores)
+
+    def average(scores):
+        return [sum(column) / len(column) for column in zip(*scores)]
+
+    words: Dict[str, Dict[Optional[str], list]] = {}
+    for form, by_pos in senses.items():
+        entry = {pos: average(scores) for pos, scores in by_pos.items()}
+        entry[None] = average(list(entry.values()))
+        words[form] = entry
+    for form, entry in list(words.items()):
+        if "JJ" in entry:
+            adverb = form[:-1] + "i" if form.endswith("y") else form
+            adverb = adverb[:-2] if adverb.endswith("le") else adverb
+            annotated = words.setdefault(adverb + "ly", {})
+            annotated["RB"] = annotated[None] = entry["JJ"]
+    return {form: (entry[None][0], entry[None][1], "RB" in entry) for form, entry in words.items()}
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased tokens, split the way TextBlob's tokenizer splits them"""
+    text = _RE_CONTRACTION.sub(r" \1", text)
+    text = _RE_QUOTES.sub(r" \1 ", text)
+    tokens = []
+    for token in text.split():
+        while token.startswith(_SPLIT):
+            tokens.append(token[0])
+            token = token[1:]
+        tail = []
+        while token.endswith(_SPLIT + (".",)):
+            if token.endswith(_SPLIT):
+                tail.append(token[-1])
+                token = token[:-1]
+            if token.endswith("..."):
+                tail.append("...")
+                token = token[:-3].rstrip(".")
+            if token.endswith("."):
+                if token in _ABBREVIATIONS or _RE_ABBR.match(token):
+                    break
+                tail.append(".")
+                token = token[:-1]
+        if token:
+            tokens.append(token)
+        tokens.extend(reversed(tail))
+    joined = _RE_SARCASM.sub("(!)", " ".join(tokens))
+    joined = _RE_EMOTICONS.sub(lambda m: m.group(1).replace(" ", "") + m.group(2), joined)
+    return joined.lower().split()
+
+class SentimentAnalyzer:
+    """
+    Polarity in [-1, 1] and a positive/negative/neutral label per text.
+    Results are memoised in an LRU of `cache_entries` texts. Thread-safe.
+    """
+    def __init__(self, lexicon: Dict[str, Tuple[float, float, bool]], cache_entries: int = 10000, threshold: float = 0.1):
+        self.lexicon = lexicon
+        self.cache_entries = cache_entries
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def polarity(self, text: str) -> float:
+        """Mean polarity of the assessed words, or 0.0 if there are none"""
+        lexicon = self.lexicon
+        # Each assessment is [polarity, intensity, negated]
+        assessments = []
+        modifier = None
+        negation = None
+        for word in tokenize(text):
+            known = lexicon.get(word)
+            if known is not None:
+                polarity, intensity, is_modifier = known
+                if modifier is None:
+                    assessments.append([polarity, intensity, False])
+                else:
+                    # "really good": scaled by the modifier's intensity
+                    last = assessments[-1]
+                    last[0] = max(-1.0, min(polarity * last[1], 1.0))
+                    last[1] = intensity
+                if negation is not None:
+                    assessments[-1][1] = 1.0 / assessments[-1][1]
+                    assessments[-1][2] = True
+                modifier = word if is_modifier else None
+                negation = word if word in NEGATIONS else None
+                continue
+            if word in NEGATIONS:
+                negation = word
+            elif negation and len(word.strip("'")) > 1:
+                # Negation carries across short words only ("not a good")
+                negation = None
+            if negation is not None and modifier is not None and modifier.endswith("ly"):
+                # "really not good"
+                assessments[-1][2] = True
+                negation = None
+            elif modifier and len(word) > 2:
+                modifier = None
+            if word == "!" and assessments:
+                assessments[-1][0] = max(-1.0, min(assessments[-1][0] * 1.25, 1.0))
+            if word == "(!)":
+                assessments.append([0.0, 1.0, False])
+            if len(word) <= 5 and not word.isalpha() and word not in _PUNCTUATION:
+                face = _EMOTICON_POLARITY.get(word)
+                if face is not None:
+                    assessments.append([face, 1.0, False])
+        if not assessments:
+            return 0.0
+        # "not good" is slightly bad, "not bad" slightly good. Summed left to
+        # right like TextBlob; sum() compensates and can flip labels at ±0.1
+        total = 0.0
+        for p, _, negated in assessments:
+            total += p * -0.5 if negated else p
+        return total / len(assessments)
+
+    def label(self, polarity: float) -> str:
+        if polarity > self.threshold:
+            return "positive"
+        if polarity < -self.threshold:
+            return "negative"
+        return "neutral"
+
+    def score_many(self, texts: Sequence[str]) -> List[Tuple[float, str]]:
+        """
+        (polarity, label) per text. Repeats within the batch and texts seen
+        recently are scored once; the cache lock is taken twice per batch.
+        """
+        with self._lock:
+            found = {}
+            for text in texts:
+                if text in found:
+                    continue
+                cached = self._cache.get(text)
+                if cached is not None:
+                    self._cache.move_to_end(text)
+                    found[text] = cached
+            self.hits += len(texts) - sum(1 for text in texts if text not in found)
+        scored = {}
+        for text in texts:
+            if text not in found and text not in scored:
+                polarity = self.polarity(text)
+                scored[text] = (polarity, self.label(polarity))
+        if scored:
+            with self._lock:
+                self.misses += len(scored)
+                self._cache.update(scored)
+                while len(self._cache) > self.cache_entries:
+                    self._cache.popitem(last=False)
+        return [found.get(text) or scored[text] for text in texts]
+
+    def score(self, text: str) -> Tuple[float, str]:
+        return self.score_many((text,))[0]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "lexicon_words": len(self.lexicon),
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+class SentimentLog:
+    """
+    Buffers (session_id, polarity, label) per chat message and writes them
+    with one bulk insert every `flush_interval` seconds, so analytics cost
+    the request path an append. Past `max_pending` buffered rows new ones
+    are dropped (counted in `dropped`). record() is thread-safe.
+    """
+    def __init__(self, writer: Callable[[list], None], flush_interval: float = 10, max_pending: int = 10000):
+        self.writer = writer
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self._pending: list = []
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, session_id: Optional[str], polarity: float, label: str):
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending.append({
+                "session_id": session_id,
+                "polarity": polarity,
+                "label": label,
+                "created_at": datetime.utcnow(),
+            })
+            self.recorded += 1
+
+    async def flush(self):
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if rows:
+            await asyncio.to_thread(self.writer, rows)
+            self.written += len(rows)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Writing chat sentiment failed")
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), "recorded": self.recorded, "dropped": self.dropped, "written": self.written}
+
+def write_sentiments(rows: list):
+    """Insert buffered chat sentiment rows in a single batch"""
+    from sqlalchemy import insert
+    from app.db.session import SessionLocal
+    from app.models.chat_sentiment import ChatSentiment
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(ChatSentiment), rows)
+        db.commit()
+    finally:
+        db.close()
+
+_analyzer: Optional[SentimentAnalyzer] = None
+_analyzer_lock = threading.Lock()
+_log: Optional[SentimentLog] = None
+
+def get_sentiment_analyzer() -> SentimentAnalyzer:
+    """
+    Returns the process-wide analyzer, compiling the lexicon on first use
+    (about a tenth of a second; the chatbot startup hook does it early).
+    """
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                _analyzer = SentimentAnalyzer(
+                    compile_lexicon(lexicon_path()),
+                    cache_entries=settings.SENTIMENT_CACHE_ENTRIES,
+                )
+    return _analyzer
+
+def get_sentiment_log() -> Optional[SentimentLog]:
+    return _log
+
+async def start_sentiment():
+    """Compile the lexicon off the event loop and, with SENTIMENT_PERSIST on, start the log writer"""
+    global _log
+    await asyncio.to_thread(get_sentiment_analyzer)
+    if settings.SENTIMENT_PERSIST and _log is None:
+        _log = SentimentLog(write_sentiments, flush_interval=settings.SENTIMENT_FLUSH_SECONDS)
+        _log.start()
+
+async def stop_sentiment():
+    """Write out buffered rows (app shutdown)"""
+    global _log
+    if _log is not None:
+        await _log.stop()
+        _log = None
+
+register_stats("sentiment", lambda: _analyzer.stats() if _analyzer else None)
+register_stats("sentiment_log", lambda: _log.stats() if _log else None)
@@ -0,0 +1,153 @@
+import asyncio
+import io
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+from app.core.instrumentation import register_stats
+
+# Voice ingestion for the chatbot: uploads are read in bounded chunks and
+# decoded/recognised in a dedicated worker pool, never on the event loop.
+
+class AudioTooLarge(Exception):
+    pass
+
+class SpeechBusy(Exception):
+    pass
+
+class SpeechRecognitionFailed(Exception):
+    pass
+
+class SpeechRecognitionBackend:
+    """
+    Decodes WAV/AIFF/FLAC audio with the speech_recognition package and runs
+    one of its engines: "google" (Web Speech API, needs network) or "sphinx"
+    (offline, needs pocketsphinx).
+    """
+    def __init__(self, engine: str = "google", language: str = "en-US"):
+        self.engine = engine
+        self.language = language
+
+    def transcribe(self, audio_data: bytes) -> str:
+        import speech_recognition as sr
+
+        recognizer = sr.Recognizer()
+        with sr.AudioFile(io.BytesIO(audio_data)) as source:
+            audio = recognizer.record(source)
+        recognize = getattr(recognizer, f"recognize_{self.engine}")
+        return recognize(audio, language=self.language)
+
+class StubRecognizer:
+    """
+    Local stand-in for tests and benchmarks: checks the upload is a readable
+    WAV file and returns fixed text after `latency` seconds, without any
+    network or model.
+    """
+    def __init__(self, text: str = "How do points work?", latency: float = 0.0):
+        self.text = text
+        self.latency = latency
+
+    def transcribe(self, audio_data: bytes) -> str:
+        with wave.open(io.BytesIO(audio_data)) as audio:
+            audio.readframes(audio.getnframes())
+        if self.latency:
+            time.sleep(self.latency)
+        return self.text
+
+RECOGNIZERS = {
+    "google": lambda: SpeechRecognitionBackend("google", settings.STT_LANGUAGE),
+    "sphinx": lambda: SpeechRecognitionBackend("sphinx", settings.STT_LANGUAGE),
+    "stub": lambda: StubRecognizer(settings.STT_STUB_TEXT, settings.STT_STUB_LATENCY),
+}
+
+class SpeechPipeline:
+    """
+    Bounded speech-to-text pipeline.
+    - Request bodies and uploads are counted as they are read and rejected
+      with AudioTooLarge as soon as they pass `max_bytes`.
+    - Recognition runs on `max_workers` threads; once `max_pending` jobs
+      are running or queued, new ones are rejected with SpeechBusy.
+    """
+    def __init__(self, recognizer, max_bytes: int, chunk_size: int = 64 * 1024, max_workers: int = 4, max_pending: int = 16):
+        self.recognizer = recognizer
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stt")
+
+    async def read_stream(self, chunks: AsyncIterator[bytes], content_length: Optional[str] = None, overhead: int = 0) -> bytes:
+        """
+        Read a raw request body holding the audio, enforcing the size cap plus
+        `overhead` bytes for the framing around it (multipart boundaries and
+        other fields). A declared Content-Length over that is rejected before
+        anything is read.
+        """
+        limit = self.max_bytes + overhead
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            raise AudioTooLarge(f"Audio uploads are limited to {self.max_bytes} bytes")
+        buffer = bytearray()
+        async for chunk in chunks:
+            buffer.extend(chunk)
+            if len(buffer) > limit:
+                raise AudioTooLarge(f"Audio uploads are limited to {self.max_bytes} bytes")
+        return bytes(buffer)
+
+    async def read_upload(self, upload) -> bytes:
+        """Read an UploadFile in chunks, enforcing the size cap"""
+        buffer = bytearray()
+        while True:
+            chunk = await upload.read(self.chunk_size)
+            if not chunk:
+                break
+            buffer.extend(chunk)
+            if len(buffer) > self.max_bytes:
+                raise AudioTooLarge(f"Audio uploads are limited to {self.max_bytes} bytes")
+        return bytes(buffer)
+
+    async def transcribe(self, audio_data: bytes) -> str:
+        if self.pending >= self.max_pending:
+            raise SpeechBusy("Too many voice messages are being processed, please retry shortly")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self.recognizer.transcribe, audio_data)
+        except Exception as e:
+            raise SpeechRecognitionFailed(str(e) or type(e).__name__) from e
+        finally:
+            self.pending -= 1
+
+    async def transcribe_upload(self, upload) -> str:
+        return await self.transcribe(await self.read_upload(upload))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+_pipeline: Optional[SpeechPipeline] = None
+
+def get_speech_pipeline() -> SpeechPipeline:
+    """
+    Returns the process-wide pipeline, creating it from settings on first use.
+    """
+    global _pipeline
+    if _pipeline is None:
+        if settings.STT_BACKEND not in RECOGNIZERS:
+            raise ValueError(f"Unsupported STT_BACKEND: {settings.STT_BACKEND}")
+        _pipeline = SpeechPipeline(
+            recognizer=RECOGNIZERS[settings.STT_BACKEND](),
+            max_bytes=settings.STT_MAX_UPLOAD_BYTES,
+            chunk_size=settings.STT_CHUNK_SIZE,
+            max_workers=settings.STT_MAX_WORKERS,
+            max_pending=settings.STT_MAX_PENDING,
+        )
+    return _pipeline
+
+def shutdown_speech_pipeline():
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.shutdown()
+        _pipeline = None
+
+register_stats("speech", lambda: {"pending": _pipeline.pending} if _pipeline else None)
@@ -0,0 +1,202 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.instrumentation import register_stats
+
+def gtts_synthesize(text: str, lang: str, voice: str) -> bytes:
+    """
+    Synthesises MP3 audio with gTTS entirely in memory. `voice` selects the
+    Google Translate domain (e.g. "com", "co.uk"), which changes the accent.
+    """
+    from gtts import gTTS
+
+    buffer = io.BytesIO()
+    gTTS(text=text, lang=lang, tld=voice).write_to_fp(buffer)
+    return buffer.getvalue()
+
+def stub_synthesize(text: str, lang: str, voice: str) -> bytes:
+    """
+    Offline stand-in for tests and benchmarks: waits TTS_STUB_LATENCY seconds
+    and returns a silent MPEG frame per 20 characters, without any network.
+    """
+    if settings.TTS_STUB_LATENCY:
+        time.sleep(settings.TTS_STUB_LATENCY)
+    # MPEG-1 Layer III, 32 kbit/s, 44.1 kHz, mono: 104-byte frames
+    frame = bytes([0xFF, 0xFB, 0x10, 0xC4]) + bytes(100)
+    return frame * (len(text) // 20 + 1)
+
+SYNTHESIZERS = {
+    "gtts": gtts_synthesize,
+    "stub": stub_synthesize,
+}
+
+def audio_key(text: str, lang: str = "en", voice: str = "com") -> str:
+    """
+    Content address of the audio for (text, lang, voice).
+    """
+    return hashlib.sha256(f"{lang}\0{voice}\0{text}".encode("utf-8")).hexdigest()
+
+class TTSCache:
+    """
+    Two-tier cache of synthesised speech, keyed by audio_key().
+    - Memory: LRU of up to `memory_items` clips.
+    - Disk: one file per clip under `disk_dir`, trimmed to `disk_max_bytes`
+      by evicting the least recently used files (access refreshes mtime).
+    Concurrent requests for the same missing clip synthesise it only once.
+    """
+    def __init__(
+        self,
+        disk_dir: Optional[str],
+        memory_items: int = 256,
+        disk_max_bytes: int = 256 * 1024 * 1024,
+        synthesize: Callable[[str, str, str], bytes] = gtts_synthesize,
+    ):
+        self.disk_dir = disk_dir
+        self.memory_items = memory_items
+        self.disk_max_bytes = disk_max_bytes
+        self.synthesize = synthesize
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._disk_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.mp3")
+
+    def _disk_entries(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _remember(self, key: str, data: bytes):
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key: str, data: bytes):
+        if not self.disk_dir:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers never see a partial file
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        # A rewrite replaces the old file, so only the difference is new
+        try:
+            replaced = os.stat(path).st_size
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._disk_bytes += len(data) - replaced
+            over_budget = self._disk_bytes > self.disk_max_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        # Trim to 90% of the budget so eviction does not run on every write
+        target = int(self.disk_max_bytes * 0.9)
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the cached audio for `key`, or None if it is not cached.
+        """
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+        data = self._read_disk(key)
+        if data is not None:
+            self._remember(key, data)
+        return data
+
+    def get_or_create(self, text: str, lang: str = "en", voice: str = "com") -> Tuple[str, bytes]:
+        """
+        Returns (key, audio), synthesising and caching the audio on a miss.
+        """
+        key = audio_key(text, lang, voice)
+        data = self.get(key)
+        if data is not None:
+            self.hits += 1
+            return key, data
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                # Another thread may have synthesised it while we waited
+                data = self.get(key)
+                if data is not None:
+                    self.hits += 1
+                    return key, data
+                self.misses += 1
+                data = self.synthesize(text, lang, voice)
+                self._write_disk(key, data)
+                self._remember(key, data)
+                return key, data
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+_tts_cache: Optional[TTSCache] = None
+
+def get_tts_cache() -> TTSCache:
+    """
+    Returns the process-wide TTS cache, creating it from settings on first use.
+    """
+    global _tts_cache
+    if _tts_cache is None:
+        if settings.TTS_BACKEND not in SYNTHESIZERS:
+            raise ValueError(f"Unsupported TTS_BACKEND: {settings.TTS_BACKEND}")
+        _tts_cache = TTSCache(
+            disk_dir=settings.TTS_CACHE_DIR or None,
+            memory_items=settings.TTS_MEMORY_CACHE_ITEMS,
+            disk_max_bytes=settings.TTS_CACHE_MAX_BYTES,
+            synthesize=SYNTHESIZERS[settings.TTS_BACKEND],
+        )
+    return _tts_cache
+
+register_stats("tts_cache", lambda: {"hits": _tts_cache.hits, "misses": _tts_cache.misses} if _tts_cache else None)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the API.
+
+Starts fresh interpreters that import app.main under `python -X importtime`
+and run the app's startup hooks, then reports for each FEATURES scenario:
+- median time to import app.main and to finish startup
+- import time per top-level package and the slowest individual modules
+
+The schema is migrated once beforehand and the workers start with
+AUTO_MIGRATE=0, as in production. Uses a throwaway SQLite database unless
+DATABASE_URL is set. Fails with exit code 1 when --max-seconds is given and
+any scenario takes longer to import and start, e.g. in CI:
+    python bench_startup.py --max-seconds 1.5
+    python bench_startup.py --features auth,items,users --features all
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+ALL_FEATURES = "auth,items,users,swaps,wishlist,notifications,exports,activity,feed,chatbot"
+
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def start():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+ready = asyncio.run(start())
+print(json.dumps({"import": imported - started, "startup": ready - imported}))
+"""
+
+# "import time:       123 |       4567 |     package.module"
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--features", action="append",
+        help="FEATURES value to benchmark, repeatable ('all' for every feature); "
+             "defaults to all features and a catalogue-only worker",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts per scenario; the median is reported")
+    parser.add_argument("--top", type=int, default=15, help="Packages and modules to list")
+    parser.add_argument("--max-seconds", type=float, help="Fail if import plus startup takes longer")
+    return parser.parse_args()
+
+def parse_importtime(stderr: str):
+    """Returns {module: (self seconds, cumulative seconds)} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, name = match.groups()
+            modules[name] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+    return modules
+
+def cold_start(env):
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        env=env, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if completed.returncode:
+        sys.exit(f"app failed to start:\n{completed.stderr[-4000:]}")
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    return timings, parse_importtime(completed.stderr)
+
+def report(features, runs, top):
+    timings = [run[0] for run in runs]
+    # Module times from the run with the median import time
+    modules = sorted(runs, key=lambda run: run[0]["import"])[len(runs) // 2][1]
+    import_s = statistics.median(t["import"] for t in timings)
+    startup_s = statistics.median(t["startup"] for t in timings)
+    print(f"\nFEATURES={features}")
+    print(f"  import app.main {import_s:.3f}s + startup {startup_s:.3f}s = {import_s + startup_s:.3f}s (median of {len(runs)})")
+
+    by_package = defaultdict(float)
+    for name, (self_s, _) in modules.items():
+        by_package[name.split(".")[0]] += self_s
+    print("  import time by package:")
+    for package, seconds in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"    {seconds * 1000:8.1f} ms  {package}")
+    print("  slowest modules (self time):")
+    for name, (self_s, cumulative_s) in sorted(modules.items(), key=lambda kv: -kv[1][0])[:top]:
+        print(f"    {self_s * 1000:8.1f} ms  {name} (cumulative {cumulative_s * 1000:.1f} ms)")
+    return import_s + startup_s
+
+def main():
+    args = parse_args()
+    env = dict(os.environ)
+    if not env.get("DATABASE_URL"):
+        path = os.path.join(tempfile.mkdtemp(prefix="rewear-startup-"), "startup.db")
+        env["DATABASE_URL"] = f"sqlite:///{path}"
+    # Only the key's format is checked at startup; no request reaches the provider
+    env.setdefault("OPENROUTER_API_KEY", "sk-or-v1-startup-benchmark")
+    env["AUTO_MIGRATE"] = "0"
+    backend = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run([sys.executable, "-m", "app.db.migrate"], env=env, cwd=backend, check=True, stdout=subprocess.DEVNULL)
+
+    failures = []
+    for features in args.features or ["all", "auth,items,users"]:
+        env["FEATURES"] = ALL_FEATURES if features == "all" else features
+        runs = [cold_start(env) for _ in range(args.runs)]
+        seconds = report(features, runs, args.top)
+        if args.max_seconds is not None and seconds > args.max_seconds:
+            failures.append(f"FEATURES={features} took {seconds:.3f}s, over the {args.max_seconds}s budget")
+    if failures:
+        print()
+        for failure in failures:
+            print("FAILED:", failure)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
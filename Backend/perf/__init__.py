@@ -0,0 +1,9 @@
+"""
+Load-testing and benchmark suite for the API.
+
+    python -m perf                 run every scenario against a fresh local server
+    python -m perf.datagen         fill a database with synthetic users and items
+    python -m perf.fakes           run the fake OpenAI-compatible LLM on its own
+
+See `python -m perf --help` for scenarios, load shape, baselines and thresholds.
+"""
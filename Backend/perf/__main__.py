@@ -0,0 +1,239 @@
+"""
+Load-test runner.
+
+Creates a throwaway SQLite database (unless DATABASE_URL is set), fills it
+with synthetic users and items, starts the fake LLM and the API under
+uvicorn with the offline TTS/STT stubs, then runs each scenario for
+--duration seconds on --concurrency virtual users. Reports throughput and
+p50/p95/p99 latency per route.
+
+Results are compared with perf/baselines/<--baseline>.json when it exists;
+the run fails when a route's p95 or throughput regressed past the
+thresholds, or any route's error rate is too high. --save-baseline stores
+this run as the new baseline. Baselines only compare like with like: keep
+the machine and options the same.
+    python -m perf --save-baseline
+    python -m perf --scenarios browse,item_detail --concurrency 50 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(BACKEND, "perf", "baselines")
+
+def parse_args():
+    from perf.scenarios import SCENARIOS
+
+    parser = argparse.ArgumentParser(prog="python -m perf", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=20, help="Virtual users per scenario")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--follows", type=int, default=20, help="Follows per user")
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Fake LLM seconds to first token")
+    parser.add_argument("--llm-token-latency", type=float, default=0.01)
+    parser.add_argument("--tts-latency", type=float, default=0.05)
+    parser.add_argument("--stt-latency", type=float, default=0.2)
+    parser.add_argument("--baseline", default="local", help="Baseline name under perf/baselines/")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--max-p95-regression", type=float, default=0.25, help="Allowed relative p95 increase")
+    parser.add_argument("--max-throughput-drop", type=float, default=0.25, help="Allowed relative req/s decrease")
+    parser.add_argument("--noise-ms", type=float, default=5, help="p95 increases smaller than this always pass")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+    unknown = set(args.scenarios.split(",")) - SCENARIOS.keys()
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))] if ordered else 0.0
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_until_up(port: int, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"server on port {port} exited with code {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    sys.exit(f"server on port {port} did not start within {timeout}s")
+
+def server_env(args, llm_port: int, workdir: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "LLM_BASE_URL": f"http://127.0.0.1:{llm_port}/v1",
+        "OPENROUTER_API_KEY": "sk-or-v1-perf",
+        "TTS_BACKEND": "stub",
+        "TTS_STUB_LATENCY": str(args.tts_latency),
+        "TTS_CACHE_DIR": os.path.join(workdir, "tts"),
+        "STT_BACKEND": "stub",
+        "STT_STUB_LATENCY": str(args.stt_latency),
+        "AUTO_MIGRATE": "0",
+    })
+    # Slow-request logs would flood the report; pass a lower value to see them
+    env.setdefault("SLOW_REQUEST_SECONDS", "30")
+    return env
+
+async def login(base_url: str, usernames, password: str):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        responses = await asyncio.gather(*(
+            client.post("/api/v1/auth/login", data={"username": username, "password": password})
+            for username in usernames
+        ))
+    return [response.json()["access_token"] for response in responses]
+
+async def run_scenario(name, base_url, recorder, concurrency: int, duration: float) -> float:
+    import httpx
+    from perf.scenarios import SCENARIOS
+
+    scenario = SCENARIOS[name]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+
+        async def virtual_user():
+            while time.perf_counter() < deadline:
+                await scenario(client, recorder)
+
+        await asyncio.gather(*(virtual_user() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+def summarise(name, recorder, elapsed: float) -> dict:
+    results = {}
+    for route, samples in recorder.samples.items():
+        latencies = [seconds * 1000 for _, seconds in samples]
+        errors = sum(1 for status, _ in samples if status == 0 or status >= 400)
+        results[f"{name} {route}"] = {
+            "requests": len(samples),
+            "errors": errors,
+            "rps": len(samples) / elapsed,
+            "p50_ms": percentile(latencies, 0.5),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+        }
+    return results
+
+def compare(args, results: dict, baseline: dict) -> list:
+    failures = []
+    for key, result in results.items():
+        if result["errors"] / result["requests"] > args.max_error_rate:
+            failures.append(f"{key}: {result['errors']} of {result['requests']} requests failed")
+        previous = baseline.get("routes", {}).get(key)
+        if previous is None:
+            continue
+        p95_limit = previous["p95_ms"] * (1 + args.max_p95_regression)
+        if result["p95_ms"] > p95_limit and result["p95_ms"] - previous["p95_ms"] > args.noise_ms:
+            failures.append(f"{key}: p95 {result['p95_ms']:.1f} ms, baseline {previous['p95_ms']:.1f} ms")
+        if result["rps"] < previous["rps"] * (1 - args.max_throughput_drop):
+            failures.append(f"{key}: {result['rps']:.1f} req/s, baseline {previous['rps']:.1f} req/s")
+    return failures
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="rewear-perf-")
+    if not os.getenv("DATABASE_URL"):
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'perf.db')}"
+    sys.path.insert(0, BACKEND)
+    from app.db.migrate import migrate
+    from perf.datagen import generate
+    from perf.scenarios import Recorder
+
+    migrate()
+    started = time.perf_counter()
+    dataset = generate(args.users, args.items, seed=args.seed, follows=args.follows, posts=args.posts)
+    print(
+        f"generated {len(dataset.user_ids)} users, {len(dataset.item_ids)} items and {len(dataset.post_ids)} posts "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+    llm_port, api_port = free_port(), free_port()
+    llm = subprocess.Popen(
+        [sys.executable, "-m", "perf.fakes", "--port", str(llm_port),
+         "--latency", str(args.llm_latency), "--token-latency", str(args.llm_token_latency)],
+        cwd=BACKEND,
+    )
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(api_port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND, env=server_env(args, llm_port, workdir),
+    )
+    try:
+        wait_until_up(llm_port, llm)
+        wait_until_up(api_port, api)
+        base_url = f"http://127.0.0.1:{api_port}"
+        tokens = asyncio.run(login(base_url, dataset.usernames[:args.concurrency], dataset.password))
+
+        results = {}
+        for name in args.scenarios.split(","):
+            recorder = Recorder(dataset, tokens, seed=args.seed)
+            elapsed = asyncio.run(run_scenario(name, base_url, recorder, args.concurrency, args.duration))
+            results.update(summarise(name, recorder, elapsed))
+    finally:
+        for process in (api, llm):
+            process.terminate()
+            process.wait(timeout=30)
+
+    print(f"\n{'route':<42} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for key, result in results.items():
+        print(
+            f"{key:<42} {result['requests']:>8} {result['errors']:>6} {result['rps']:>8.1f} "
+            f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f}"
+        )
+
+    config = {
+        key: getattr(args, key)
+        for key in ("duration", "concurrency", "users", "items", "follows", "posts", "workers", "llm_latency", "llm_token_latency", "tts_latency", "stt_latency")
+    }
+    run = {"config": config, "routes": results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(run, f, indent=2)
+
+    baseline_path = os.path.join(BASELINE_DIR, f"{args.baseline}.json")
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print(f"\nwarning: {baseline_path} was recorded with different options: {baseline.get('config')}")
+    failures = compare(args, results, baseline)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"\nsaved baseline {baseline_path}")
+    if failures:
+        print(f"\nFAILED: {len(failures)} regressions")
+        for failure in failures:
+            print(" -", failure)
+        sys.exit(1)
+    print("\nOK" + (f": within thresholds of {baseline_path}" if baseline else ": no baseline to compare with"))
+
+if __name__ == "__main__":
+    main()
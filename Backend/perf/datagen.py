@@ -0,0 +1,135 @@
+"""
+Synthetic data for load tests, written through the CRUD layer's bulk inserts.
+
+Every user shares one password, hashed once at the configured BCRYPT_ROUNDS,
+so logins cost what they cost in production without hashing N passwords here.
+Follows are skewed so the most followed accounts cross
+FEED_FANOUT_MAX_FOLLOWERS and exercise the pull side of home timelines.
+    python -m perf.datagen --users 1000 --items 50000
+    python -m perf.datagen --users 5000 --follows 20 --posts 1000000
+"""
+
+import argparse
+import random
+import time
+from dataclasses import dataclass, field
+from typing import List
+
+PASSWORD = "perf-password"
+CATEGORIES = ["Clothes", "Footwear", "Accessories"]
+CONDITIONS = ["New", "Like New", "Good", "Fair", "Poor"]
+SIZES = {"Clothes": ["XS", "S", "M", "L", "XL"], "Footwear": ["38", "39", "40", "41", "42", "43"], "Accessories": ["One Size"]}
+COLOURS = ["black", "white", "navy", "red", "green", "grey", "beige", "denim", "brown", "pink"]
+MATERIALS = ["cotton", "wool", "leather", "linen", "silk", "suede", "canvas", "polyester"]
+NOUNS = {
+    "Clothes": ["jacket", "shirt", "dress", "jeans", "sweater", "coat", "skirt", "hoodie"],
+    "Footwear": ["sneakers", "boots", "sandals", "loafers", "heels", "running shoes"],
+    "Accessories": ["scarf", "belt", "watch", "necklace", "handbag", "cap", "sunglasses"],
+}
+
+@dataclass
+class Dataset:
+    usernames: List[str] = field(default_factory=list)
+    user_ids: List[int] = field(default_factory=list)
+    item_ids: List[int] = field(default_factory=list)
+    post_ids: List[int] = field(default_factory=list)
+    password: str = PASSWORD
+
+def item_row(rng: random.Random, owner_id: int) -> dict:
+    category = rng.choice(CATEGORIES)
+    colour, material, noun = rng.choice(COLOURS), rng.choice(MATERIALS), rng.choice(NOUNS[category])
+    return {
+        "title": f"{colour.title()} {material} {noun}",
+        "description": f"{rng.choice(['Barely worn', 'Well loved', 'Vintage', 'Brand new'])} {colour} {material} {noun}, "
+                       f"{rng.choice(['great fit', 'runs small', 'runs large', 'true to size'])}.",
+        "category": category,
+        "size": rng.choice(SIZES[category]),
+        "condition": rng.choice(CONDITIONS),
+        "owner_id": owner_id,
+    }
+
+def generate(users: int, items: int, seed: int = 1, chunk_size: int = 5000, follows: int = 0, posts: int = 0) -> Dataset:
+    """
+    Inserts `users` users and `items` items spread across them, then
+    `follows` follows per user and `posts` feed posts, one transaction per
+    chunk. Run it before starting the server under test: no item events are
+    fired, so running workers do not see the new items until their indexes
+    reload.
+    """
+    from sqlalchemy import insert
+    from app.core.config import settings
+    from app.core.security import get_password_hash
+    from app.crud import crud_feed, crud_item, crud_user
+    from app.db.session import SessionLocal
+    from app.models.feed import Follow
+    from app.services import feed
+
+    rng = random.Random(seed)
+    run = f"{seed}_{int(time.time())}"
+    hashed_password = get_password_hash(PASSWORD)
+    dataset = Dataset()
+    db = SessionLocal()
+    try:
+        for start in range(0, users, chunk_size):
+            rows = [
+                {
+                    "username": f"perf_{run}_{n}",
+                    "email": f"perf_{run}_{n}@example.com",
+                    "hashed_password": hashed_password,
+                    "points_balance": rng.randint(0, 500),
+                }
+                for n in range(start, min(start + chunk_size, users))
+            ]
+            dataset.user_ids += crud_user.bulk_insert_users(db, rows)
+            dataset.usernames += [row["username"] for row in rows]
+            db.commit()
+        for start in range(0, items, chunk_size):
+            rows = [item_row(rng, rng.choice(dataset.user_ids)) for _ in range(start, min(start + chunk_size, items))]
+            dataset.item_ids += crud_item.bulk_insert_items(db, rows)
+            db.commit()
+        if follows and len(dataset.user_ids) > 1:
+            # Zipf-like popularity: the n-th user is followed about 1/n as often
+            weights = [1 / (rank + 1) for rank in range(len(dataset.user_ids))]
+            pairs = set()
+            for follower_id in dataset.user_ids:
+                for followee_id in rng.choices(dataset.user_ids, weights, k=follows):
+                    if followee_id != follower_id:
+                        pairs.add((follower_id, followee_id))
+            pairs = [{"follower_id": follower_id, "followee_id": followee_id} for follower_id, followee_id in sorted(pairs)]
+            for start in range(0, len(pairs), chunk_size):
+                db.execute(insert(Follow), pairs[start:start + chunk_size])
+            feed.recount(db)
+        for start in range(0, posts, chunk_size):
+            rows = [
+                {"author_id": rng.choice(dataset.user_ids), "body": f"Just listed {item_row(rng, 0)['title'].lower()}"}
+                for _ in range(start, min(start + chunk_size, posts))
+            ]
+            dataset.post_ids += crud_feed.bulk_insert_posts(db, rows)
+            db.commit()
+        if posts:
+            feed.trim_timelines(db, settings.FEED_TIMELINE_MAX)
+    finally:
+        db.close()
+    return dataset
+
+def main():
+    from app.db.migrate import migrate
+
+    parser = argparse.ArgumentParser(description="Insert synthetic users and items for load tests")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--follows", type=int, default=20, help="Follows per user")
+    parser.add_argument("--posts", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    migrate()
+    started = time.perf_counter()
+    dataset = generate(args.users, args.items, seed=args.seed, follows=args.follows, posts=args.posts)
+    print(
+        f"created {len(dataset.user_ids)} users, {len(dataset.item_ids)} items and {len(dataset.post_ids)} posts in "
+        f"{time.perf_counter() - started:.2f}s; every user's password is {PASSWORD!r}"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Fake backends for load tests.
+
+A local OpenAI-compatible chat completions server with configurable latency,
+so chat can be load tested without the network, cost or rate limits of a
+real provider. Point the API at it with LLM_BASE_URL=http://HOST:PORT/v1.
+    python -m perf.fakes --port 8099 --latency 0.4 --token-latency 0.01
+
+Text-to-speech and speech-to-text have offline stubs in the app itself
+(TTS_BACKEND=stub, STT_BACKEND=stub, with TTS_STUB_LATENCY and
+STT_STUB_LATENCY); wav_bytes() builds a voice upload for them.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import random
+import time
+import wave
+
+REPLY = (
+    "Swapping is simple: list an item, earn points when someone takes it, and spend "
+    "those points on something you love. Every swap keeps clothing in use and out of landfill."
+)
+
+class FakeLLM:
+    """
+    ASGI app answering POST /v1/chat/completions, streaming or not.
+    - `latency`: seconds before the first token (or the whole reply)
+    - `token_latency`: seconds between streamed chunks
+    - `error_rate`: share of calls answered with a 503, to exercise retries
+    """
+    def __init__(self, latency: float = 0.3, token_latency: float = 0.01, tokens: int = 40, error_rate: float = 0.0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.words = (REPLY.split() * (tokens // len(REPLY.split()) + 1))[:tokens]
+        self.error_rate = error_rate
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await receive()
+            await send({"type": "lifespan.startup.complete"})
+            await receive()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        if scope["method"] != "POST" or not scope["path"].endswith("/chat/completions"):
+            return await self._send_json(send, 404, {"error": {"message": "not found"}})
+        self.calls += 1
+        request = json.loads(body or b"{}")
+        await asyncio.sleep(self.latency)
+        if random.random() < self.error_rate:
+            return await self._send_json(send, 503, {"error": {"message": "fake overload", "type": "server_error"}})
+        completion_id = f"chatcmpl-fake-{self.calls}"
+        base = {"id": completion_id, "created": int(time.time()), "model": request.get("model", "fake")}
+        if not request.get("stream"):
+            return await self._send_json(send, 200, {
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(self.words)}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(self.words), "total_tokens": len(self.words)},
+            })
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+        for n, word in enumerate(self.words):
+            if n:
+                await asyncio.sleep(self.token_latency)
+            chunk = {**base, "object": "chat.completion.chunk", "choices": [
+                {"index": 0, "delta": {"content": word if n == 0 else " " + word}, "finish_reason": None}
+            ]}
+            await send({"type": "http.response.body", "body": f"data: {json.dumps(chunk)}\n\n".encode(), "more_body": True})
+        done = {**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        await send({"type": "http.response.body", "body": f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode()})
+
+    @staticmethod
+    async def _send_json(send, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+def wav_bytes(seconds: float = 1.0, rate: int = 16000) -> bytes:
+    """A silent mono 16-bit WAV clip, accepted by the STT stub"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as clip:
+        clip.setnchannels(1)
+        clip.setsampwidth(2)
+        clip.setframerate(rate)
+        clip.writeframes(bytes(int(seconds * rate) * 2))
+    return buffer.getvalue()
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI-compatible chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="Seconds between streamed chunks")
+    parser.add_argument("--tokens", type=int, default=40, help="Words per reply")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls answered with a 503")
+    args = parser.parse_args()
+
+    app = FakeLLM(args.latency, args.token_latency, args.tokens, args.error_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Scripted user journeys. Each scenario is one iteration of what a user does;
+the runner loops it on many concurrent virtual users and records every
+request under a route label.
+"""
+
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from perf.datagen import CATEGORIES, Dataset, item_row
+from perf.fakes import wav_bytes
+
+CHAT_PROMPTS = [
+    "How do points work?",
+    "What can I get for a pair of leather boots?",
+    "How do I list a jacket?",
+    "Is swapping better for the environment than buying new?",
+    "Can I swap with more than one person at once?",
+]
+
+class Recorder:
+    """
+    Per-scenario request log: (status, seconds) samples by route label.
+    Status 0 means the request failed before a response arrived.
+    """
+    def __init__(self, dataset: Dataset, tokens: List[str], seed: int = 1):
+        self.dataset = dataset
+        self.tokens = tokens
+        self.rng = random.Random(seed)
+        self.samples: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        self.wav = wav_bytes()
+
+    async def call(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.samples[route].append((0, time.perf_counter() - started))
+            return None
+        self.samples[route].append((response.status_code, time.perf_counter() - started))
+        return response
+
+    def auth(self) -> dict:
+        return {"Authorization": f"Bearer {self.rng.choice(self.tokens)}"}
+
+async def browse(client, rec: Recorder):
+    """Page through the catalogue with the cursor, sometimes filtered by category"""
+    params = {"limit": 20}
+    if rec.rng.random() < 0.5:
+        params["category"] = rec.rng.choice(CATEGORIES)
+    for _ in range(rec.rng.randint(1, 5)):
+        response = await rec.call(client, "GET /items/", "GET", "/api/v1/items/", params=params)
+        cursor = response.headers.get("x-next-cursor") if response is not None else None
+        if not cursor:
+            break
+        params["cursor"] = cursor
+
+async def item_detail(client, rec: Recorder):
+    """Open a product page: the item, then its similar items"""
+    item_id = rec.rng.choice(rec.dataset.item_ids)
+    await rec.call(client, "GET /items/{id}", "GET", f"/api/v1/items/{item_id}")
+    await rec.call(client, "GET /items/{id}/similar", "GET", f"/api/v1/items/{item_id}/similar")
+
+async def login_storm(client, rec: Recorder):
+    """Log in as a random user, as after a deploy that expired every session"""
+    data = {"username": rec.rng.choice(rec.dataset.usernames), "password": rec.dataset.password}
+    await rec.call(client, "POST /auth/login", "POST", "/api/v1/auth/login", data=data)
+
+async def create_item(client, rec: Recorder):
+    """List a new item"""
+    item = item_row(rec.rng, owner_id=0)
+    del item["owner_id"]
+    await rec.call(client, "POST /items/", "POST", "/api/v1/items/", json=item, headers=rec.auth())
+
+async def feed(client, rec: Recorder):
+    """Scroll the home timeline and like the odd post"""
+    headers = rec.auth()
+    params = {"limit": 20}
+    for _ in range(rec.rng.randint(1, 3)):
+        response = await rec.call(client, "GET /feed/", "GET", "/api/v1/feed/", params=params, headers=headers)
+        if response is None or response.status_code != 200:
+            break
+        posts = response.json()
+        if posts and rec.rng.random() < 0.3:
+            post_id = rec.rng.choice(posts)["id"]
+            await rec.call(client, "PUT /feed/posts/{id}/like", "PUT", f"/api/v1/feed/posts/{post_id}/like", headers=headers)
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+        params["cursor"] = cursor
+
+async def chat(client, rec: Recorder):
+    """Ask the assistant a question; half are repeats the response cache can answer"""
+    message = rec.rng.choice(CHAT_PROMPTS)
+    if rec.rng.random() < 0.5:
+        message += f" (#{rec.rng.randrange(1_000_000)})"
+    await rec.call(client, "POST /chatbot/chat", "POST", "/api/v1/chatbot/chat", json={"message": message})
+
+async def voice_chat(client, rec: Recorder):
+    """Send a voice message: speech-to-text, the assistant, then text-to-speech"""
+    files = {"audio_file": ("question.wav", rec.wav, "audio/wav")}
+    await rec.call(client, "POST /chatbot/voice-chat", "POST", "/api/v1/chatbot/voice-chat", files=files)
+
+SCENARIOS = {
+    "browse": browse,
+    "item_detail": item_detail,
+    "login_storm": login_storm,
+    "create_item": create_item,
+    "feed": feed,
+    "chat": chat,
+    "voice_chat": voice_chat,
+}
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for the swap engine.
+
+Fires hundreds of concurrent swap requests at a handful of hot items through
+the real API (in-process, via httpx), retries some of them with the same
+Idempotency-Key, then checks that nothing was double-spent:
+- every item took part in at most one swap, and is SWAPPED exactly if it did
+- total points are conserved and no balance went negative
+- each user's materialised balance matches their ledger
+- retries returned the original swap
+- the activity counters match a rebuild from scratch
+
+Uses a throwaway SQLite database unless DATABASE_URL is set, e.g.
+    DATABASE_URL=postgresql://localhost/rewear_stress python stress_swaps.py
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--items-per-user", type=int, default=3)
+    parser.add_argument("--hot-items", type=int, default=5, help="Items every request competes for")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--retry-share", type=float, default=0.2, help="Share of requests resent with the same key")
+    parser.add_argument("--starting-points", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))] if ordered else 0.0
+
+def setup_data(args):
+    from app import models
+    from app.core import security
+    from app.crud import crud_item
+    from app.db.session import SessionLocal
+
+    conditions = ["New", "Like New", "Good", "Fair", "Poor"]
+    categories = ["Clothes", "Footwear", "Accessories"]
+    db = SessionLocal()
+    users = []
+    for n in range(args.users):
+        user = models.User(
+            username=f"stress_{uuid.uuid4().hex[:8]}_{n}",
+            email=f"stress_{uuid.uuid4().hex[:8]}_{n}@example.com",
+            hashed_password="!",
+            points_balance=args.starting_points,
+        )
+        db.add(user)
+        users.append(user)
+    db.flush()
+    # Through the CRUD layer so the activity counters see the new items
+    rows = [
+        {
+            "title": "Stress item",
+            "description": "",
+            "category": random.choice(categories),
+            "size": "M",
+            "condition": random.choice(conditions),
+            "owner_id": user.id,
+        }
+        for user in users
+        for _ in range(args.items_per_user)
+    ]
+    item_ids = defaultdict(list)
+    for row, item_id in zip(rows, crud_item.bulk_insert_items(db, rows)):
+        item_ids[row["owner_id"]].append(item_id)
+    db.commit()
+
+    tokens = {
+        user.id: security.create_access_token(data={"sub": user.username, "uid": user.id, "adm": False, "pts": user.points_balance})
+        for user in users
+    }
+    owners = [user.id for user in users[:args.hot_items]]
+    hot_items = [item_ids[owner_id][0] for owner_id in owners]
+    item_ids = {user.id: item_ids[user.id] for user in users}
+    user_ids = [user.id for user in users]
+    db.close()
+    return user_ids, tokens, item_ids, hot_items
+
+def build_requests(args, user_ids, item_ids, hot_items):
+    requests = []
+    for _ in range(args.requests):
+        item_id = random.choice(hot_items)
+        requester = random.choice(user_ids)
+        # Offer the requester's own non-hot items; some requests reuse them across targets
+        own = [i for i in item_ids[requester] if i not in hot_items]
+        offered = random.sample(own, random.randint(0, min(2, len(own))))
+        requests.append((requester, {"item_id": item_id, "offered_item_ids": offered}, uuid.uuid4().hex))
+    retries = random.sample(requests, int(len(requests) * args.retry_share))
+    return requests + retries
+
+async def fire(args, requests, tokens):
+    import httpx
+    from app.main import app
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    results = []
+
+    async def send(client, requester, body, key):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/v1/swaps/",
+                json=body,
+                headers={"Authorization": f"Bearer {tokens[requester]}", "Idempotency-Key": key},
+            )
+            results.append((key, response.status_code, response.json(), time.perf_counter() - started))
+
+    random.shuffle(requests)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://stress", timeout=120) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(send(client, *request) for request in requests))
+        elapsed = time.perf_counter() - started
+    return results, elapsed
+
+def verify(args, user_ids, item_ids, results):
+    from sqlalchemy import func
+    from app import models
+    from app.db.session import SessionLocal
+    from app.services import activity
+
+    failures = []
+    swap_ids_by_key = defaultdict(set)
+    for key, code, body, _ in results:
+        if code in (200, 201):
+            swap_ids_by_key[key].add(body["id"])
+        elif code not in (404, 409, 422):
+            failures.append(f"unexpected status {code}: {body}")
+    for key, swap_ids in swap_ids_by_key.items():
+        if len(swap_ids) > 1:
+            failures.append(f"retries with key {key} created swaps {sorted(swap_ids)}")
+
+    db = SessionLocal()
+    all_items = [item_id for ids in item_ids.values() for item_id in ids]
+    swaps = db.query(models.Swap).filter(models.Swap.requester_id.in_(user_ids)).all()
+    used = Counter()
+    for swap in swaps:
+        used[swap.item_id] += 1
+        for item_id in swap.offered_item_ids:
+            used[item_id] += 1
+    for item_id, count in used.items():
+        if count > 1:
+            failures.append(f"item {item_id} was swapped {count} times")
+    swapped = {
+        item.id for item in db.query(models.Item).filter(models.Item.id.in_(all_items))
+        if item.status == models.item.ItemStatus.SWAPPED
+    }
+    if swapped != set(used):
+        failures.append(f"{len(swapped ^ set(used))} items have a status that does not match the swaps")
+
+    balances = dict(db.query(models.User.id, models.User.points_balance).filter(models.User.id.in_(user_ids)))
+    if sum(balances.values()) != args.starting_points * len(user_ids):
+        failures.append(f"points not conserved: {sum(balances.values())} != {args.starting_points * len(user_ids)}")
+    for user_id, balance in balances.items():
+        if balance < 0:
+            failures.append(f"user {user_id} has a negative balance {balance}")
+        delta = db.query(func.coalesce(func.sum(models.PointsLedgerEntry.delta), 0)).filter(
+            models.PointsLedgerEntry.user_id == user_id
+        ).scalar()
+        last = db.query(models.PointsLedgerEntry).filter(
+            models.PointsLedgerEntry.user_id == user_id
+        ).order_by(models.PointsLedgerEntry.id.desc()).first()
+        if args.starting_points + delta != balance or (last and last.balance_after != balance):
+            failures.append(f"user {user_id} balance {balance} does not match the ledger")
+    failures += [f"activity counter drift: {line}" for line in activity.verify(db)]
+    db.close()
+    return swaps, failures
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+    if not os.getenv("DATABASE_URL"):
+        path = os.path.join(tempfile.mkdtemp(prefix="rewear-stress-"), "stress.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("DB_POOL_SIZE", "20")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app.db.migrate import migrate
+    migrate()
+
+    user_ids, tokens, item_ids, hot_items = setup_data(args)
+    requests = build_requests(args, user_ids, item_ids, hot_items)
+    results, elapsed = asyncio.run(fire(args, requests, tokens))
+    swaps, failures = verify(args, user_ids, item_ids, results)
+
+    latencies = [latency * 1000 for *_, latency in results]
+    print(f"{len(results)} requests in {elapsed:.2f}s ({len(results) / elapsed:.0f} req/s), {len(swaps)} swaps completed")
+    print("status codes:", dict(sorted(Counter(code for _, code, _, _ in results).items())))
+    print(f"latency ms: p50={percentile(latencies, 0.5):.1f} p95={percentile(latencies, 0.95):.1f} p99={percentile(latencies, 0.99):.1f}")
+    if failures:
+        print(f"FAILED: {len(failures)} invariant violations")
+        for failure in failures[:20]:
+            print(" -", failure)
+        sys.exit(1)
+    print("OK: no double spends, points conserved, balances and activity counters match the ledger")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""
+python -m unittest discover -s tests (from Backend/)
+"""
+import os
+import tempfile
+
+# Settings are read when app.core.config is imported, so configure the
+# test database before any test module imports the app
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='rewear-tests-')}/test.db")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("METRICS_ENABLED", "0")
+os.environ.setdefault("FEATURES", "auth,items,users,swaps,wishlist,notifications,exports,activity,feed")
@@ -0,0 +1,72 @@
+import itertools
+import unittest
+from unittest import mock
+
+from sqlalchemy import select
+
+from app.models.activity import ActivityTotals
+from app.services import activity
+from tests.support import DatabaseTestCase, auth_headers
+
+def new_item(title: str, category: str = "Clothes", condition: str = "Good") -> dict:
+    return {"title": title, "description": "", "category": category, "size": "M", "condition": condition}
+
+class ActivityCountersTest(DatabaseTestCase):
+    """
+    Counters maintained by the writes must match a recount from scratch.
+    """
+    async def test_counters_match_a_recount_after_mixed_writes(self):
+        alice, bob = self.add_user("alice", points=500), self.add_user("bob", points=500)
+        alice_headers, bob_headers = auth_headers(alice), auth_headers(bob)
+        async with self.client() as client:
+            coat = (await client.post("/api/v1/items/", json=new_item("Coat", condition="New"), headers=alice_headers)).json()
+            boots = (await client.post("/api/v1/items/", json=new_item("Boots", "Footwear"), headers=bob_headers)).json()
+            scarf = (await client.post("/api/v1/items/", json=new_item("Scarf", "Accessories"), headers=bob_headers)).json()
+            imported = await client.post(
+                "/api/v1/items/import?format=ndjson",
+                content="\n".join('{"title": "Tee %d", "category": "Clothes", "size": "S", "condition": "Worn"}' % n for n in range(3)),
+                headers=alice_headers,
+            )
+            self.assertEqual(imported.json()["imported"], 3)
+            # A swap with a points difference, and a points-only redemption
+            swapped = await client.post(
+                "/api/v1/swaps/", json={"item_id": coat["id"], "offered_item_ids": [boots["id"]]}, headers=bob_headers
+            )
+            redeemed = await client.post("/api/v1/swaps/", json={"item_id": scarf["id"]}, headers=alice_headers)
+            self.assertEqual((swapped.status_code, redeemed.status_code), (201, 201))
+            community = (await client.get("/api/v1/activity/community")).json()
+            mine = (await client.get("/api/v1/activity/me", headers=alice_headers)).json()
+
+        self.assertEqual(activity.verify(self.db), [])
+        self.assertEqual(community["items_listed"], 6)
+        self.assertEqual(community["items_available"], 6 - 3)
+        self.assertEqual(community["swaps_completed"], 2)
+        self.assertEqual(mine["items_listed"], 4)
+        self.assertEqual(mine["swaps_completed"], 2)
+        # Alice received the boots and the scarf
+        expected_co2 = activity.item_impact("Footwear")[0] + activity.item_impact("Accessories")[0]
+        self.assertAlmostEqual(mine["co2_saved_kg"], expected_co2)
+
+    async def test_community_counters_are_summed_over_shards(self):
+        headers = auth_headers(self.add_user("alice"))
+        shards = itertools.cycle([0, -1, -2])
+        with mock.patch.object(activity, "community_shard", lambda: next(shards)):
+            async with self.client() as client:
+                for n in range(5):
+                    await client.post("/api/v1/items/", json=new_item(f"Tee {n}"), headers=headers)
+                community = (await client.get("/api/v1/activity/community")).json()
+                history = (await client.get("/api/v1/activity/community/history?period=day")).json()
+
+        self.assertEqual(sorted(self.db.scalars(select(ActivityTotals.user_id).where(ActivityTotals.user_id <= 0))), [-2, -1, 0])
+        self.assertEqual(community["items_listed"], 5)
+        self.assertEqual(sum(bucket["items_listed"] for bucket in history), 5)
+        self.assertEqual(activity.verify(self.db), [])
+
+    async def test_verify_reports_drift_and_rebuild_repairs_it(self):
+        self.add_item(self.add_user("owner").id)  # bypasses the counters
+        self.assertTrue(activity.verify(self.db))
+        activity.rebuild(self.db)
+        self.assertEqual(activity.verify(self.db), [])
+
+if __name__ == "__main__":
+    unittest.main()
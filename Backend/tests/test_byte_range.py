@@ -0,0 +1,23 @@
+import unittest
+
+from app.api.endpoints.chatbot import RangeNotSatisfiable, parse_byte_range
+
+class ByteRangeTest(unittest.TestCase):
+    def test_single_ranges(self):
+        self.assertEqual(parse_byte_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_byte_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_byte_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_byte_range("bytes=50-500", 100), (50, 99))
+
+    def test_malformed_and_multiple_ranges_are_ignored(self):
+        for header in ("bytes=0-1,5-6", "items=0-9", "bytes=9-3", "bytes=-", "garbage"):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_byte_range(header, 100))
+
+    def test_ranges_past_the_end_are_unsatisfiable(self):
+        for header in ("bytes=100-", "bytes=150-200", "bytes=-0"):
+            with self.subTest(header=header), self.assertRaises(RangeNotSatisfiable):
+                parse_byte_range(header, 100)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+
+from tests.support import DatabaseTestCase, auth_headers
+
+class ExportResumeTest(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.user = self.add_user("owner")
+        start = datetime(2026, 1, 1, 12, 0, 0)
+        # Several rows share an updated_at, so resuming must break ties on id
+        stamps = [start, start, start, start + timedelta(seconds=1), start + timedelta(seconds=1), start + timedelta(seconds=2)]
+        self.items = [self.add_item(self.user.id, title=f"Item {n}", updated_at=stamp) for n, stamp in enumerate(stamps)]
+        # Changing an older item moves it to the end of the export
+        self.items[0].updated_at = start + timedelta(seconds=3)
+        self.db.commit()
+
+    async def export(self, **params) -> list:
+        async with self.client() as client:
+            response = await client.get("/api/v1/exports/items", params=params, headers=auth_headers(self.user))
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    async def test_full_export_is_ordered_by_updated_at_then_id(self):
+        rows = await self.export()
+        expected = sorted(self.items, key=lambda item: (item.updated_at, item.id))
+        self.assertEqual([row["id"] for row in rows], [item.id for item in expected])
+
+    async def test_resume_continues_after_the_last_row(self):
+        everything = await self.export()
+        for cut in range(1, len(everything)):
+            last = everything[cut - 1]
+            rest = await self.export(since=last["updated_at"], after_id=last["id"])
+            self.assertEqual([row["id"] for row in rest], [row["id"] for row in everything[cut:]], f"cut after {cut}")
+
+    async def test_since_alone_includes_rows_at_that_time(self):
+        rows = await self.export(since="2026-01-01T12:00:01")
+        self.assertEqual([row["id"] for row in rows], [self.items[n].id for n in (3, 4, 5, 0)])
+
+if __name__ == "__main__":
+    unittest.main()
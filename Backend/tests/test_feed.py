@@ -0,0 +1,75 @@
+import unittest
+from unittest import mock
+
+from app.core.config import settings
+from tests.support import DatabaseTestCase, auth_headers
+
+class HomeTimelineTest(DatabaseTestCase):
+    """
+    With a fan-out threshold of 2 followers, `small` is pushed into its
+    followers' timelines and `big` is pulled on read.
+    """
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        patcher = mock.patch.object(settings, "FEED_FANOUT_MAX_FOLLOWERS", 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.reader = self.add_user("reader")
+        self.small = self.add_user("small")
+        self.big = self.add_user("big")
+        self.fans = [self.add_user(f"fan{n}") for n in range(2)]
+        self.headers = {user.username: auth_headers(user) for user in [self.reader, self.small, self.big, *self.fans]}
+        self.client_ = self.client()
+        self.addAsyncCleanup(self.client_.aclose)
+        await self.follow("reader", self.small.id)
+        for follower in ["reader", "fan0", "fan1"]:
+            await self.follow(follower, self.big.id)
+
+    async def follow(self, username: str, user_id: int):
+        response = await self.client_.put(f"/api/v1/feed/users/{user_id}/follow", headers=self.headers[username])
+        self.assertEqual(response.status_code, 204)
+
+    async def post(self, username: str, body: str) -> dict:
+        response = await self.client_.post("/api/v1/feed/posts", json={"body": body}, headers=self.headers[username])
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    async def home(self, username: str = "reader", limit: int = 20) -> list:
+        posts, cursor = [], None
+        while True:
+            params = {"limit": limit, **({"cursor": cursor} if cursor is not None else {})}
+            response = await self.client_.get("/api/v1/feed/", params=params, headers=self.headers[username])
+            self.assertEqual(response.status_code, 200)
+            posts += response.json()
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                return posts
+
+    async def test_pushed_and_pulled_posts_merge_newest_first(self):
+        posts = [await self.post(author, f"post {n}") for n, author in enumerate(["small", "big", "reader", "big", "small"])]
+        self.assertEqual([post["id"] for post in await self.home()], [post["id"] for post in reversed(posts)])
+        # Paging two at a time gives the same sequence
+        self.assertEqual([post["id"] for post in await self.home(limit=2)], [post["id"] for post in reversed(posts)])
+
+    async def test_only_small_authors_are_fanned_out(self):
+        small_post = await self.post("small", "pushed")
+        big_post = await self.post("big", "pulled")
+        self.assertEqual([post["id"] for post in await self.home("fan0")], [big_post["id"]])
+        self.assertIn(small_post["id"], [post["id"] for post in await self.home()])
+
+    async def test_author_crossing_the_threshold_is_not_duplicated(self):
+        before = await self.post("small", "while small")
+        # Two more followers take `small` over the threshold
+        for fan in ["fan0", "fan1"]:
+            await self.follow(fan, self.small.id)
+        after = await self.post("small", "while big")
+        self.assertEqual([post["id"] for post in await self.home()], [after["id"], before["id"]])
+
+    async def test_unfollow_removes_pushed_posts(self):
+        await self.post("small", "pushed")
+        response = await self.client_.delete(f"/api/v1/feed/users/{self.small.id}/follow", headers=self.headers["reader"])
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(await self.home(), [])
+
+if __name__ == "__main__":
+    unittest.main()
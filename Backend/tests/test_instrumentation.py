@@ -0,0 +1,20 @@
+import unittest
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.instrumentation import install_sql_hooks
+
+class SqlHooksTest(unittest.TestCase):
+    def test_failed_statements_do_not_leave_start_times_behind(self):
+        install_sql_hooks()
+        engine = create_engine("sqlite://")
+        with engine.connect() as conn:
+            for _ in range(3):
+                with self.assertRaises(OperationalError):
+                    conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+            self.assertEqual(conn.connection.info.get("query_started"), [])
+
+if __name__ == "__main__":
+    unittest.main()
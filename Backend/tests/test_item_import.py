@@ -0,0 +1,59 @@
+import unittest
+
+from sqlalchemy import select
+
+from app.models.item import Item
+from tests.support import DatabaseTestCase, auth_headers
+
+ROWS = "\n".join([
+    '{"title": "Linen shirt", "category": "Clothes", "size": "L", "condition": "Good", "owner_id": %(other)d}',
+    '{"title": "No size", "category": "Clothes", "condition": "Good"}',
+    'not json',
+    '{"title": "Sandals", "category": "Footwear", "size": "40", "condition": "New"}',
+])
+
+class ItemImportTest(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.other = self.add_user("other")
+
+    async def import_as(self, user) -> dict:
+        async with self.client() as client:
+            response = await client.post(
+                "/api/v1/items/import?format=ndjson", content=ROWS % {"other": self.other.id}, headers=auth_headers(user)
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def owners(self) -> dict:
+        return dict(self.db.execute(select(Item.title, Item.owner_id)).all())
+
+    async def test_bad_rows_are_reported_by_line_and_skipped(self):
+        result = await self.import_as(self.add_user("uploader"))
+        self.assertEqual((result["imported"], result["failed"]), (2, 2))
+        self.assertEqual([error["line"] for error in result["errors"]], [2, 3])
+        self.assertIn("size", result["errors"][0]["error"])
+
+    async def test_owner_column_is_ignored_for_regular_users(self):
+        uploader = self.add_user("uploader")
+        await self.import_as(uploader)
+        self.assertEqual(self.owners(), {"Linen shirt": uploader.id, "Sandals": uploader.id})
+
+    async def test_admins_can_import_for_other_users(self):
+        admin = self.add_user("admin", is_admin=True)
+        await self.import_as(admin)
+        self.assertEqual(self.owners(), {"Linen shirt": self.other.id, "Sandals": admin.id})
+
+    async def test_a_demoted_admin_token_no_longer_grants_the_owner_column(self):
+        admin = self.add_user("admin", is_admin=True)
+        headers = auth_headers(admin)
+        admin.is_admin = False
+        self.db.commit()
+        async with self.client() as client:
+            await client.post(
+                "/api/v1/items/import?format=ndjson", content=ROWS % {"other": self.other.id}, headers=headers
+            )
+        self.assertEqual(self.owners(), {"Linen shirt": admin.id, "Sandals": admin.id})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from tests.support import DatabaseTestCase
+
+class CataloguePaginationTest(DatabaseTestCase):
+    async def test_cursor_walks_every_item_once(self):
+        owner = self.add_user("owner")
+        ids = [self.add_item(owner.id, title=f"Item {n}").id for n in range(5)]
+        seen, cursor = [], None
+        async with self.client() as client:
+            while True:
+                params = {"limit": 2, **({"cursor": cursor} if cursor is not None else {})}
+                response = await client.get("/api/v1/items/", params=params)
+                self.assertEqual(response.status_code, 200)
+                seen += [item["id"] for item in response.json()]
+                cursor = response.headers.get("X-Next-Cursor")
+                if cursor is None:
+                    break
+        self.assertEqual(seen, ids)
+
+    async def test_cursor_combines_with_filters(self):
+        owner = self.add_user("owner")
+        shoes = [self.add_item(owner.id, category="Footwear").id for _ in range(3)]
+        self.add_item(owner.id, category="Clothes")
+        async with self.client() as client:
+            response = await client.get("/api/v1/items/", params={"category": "Footwear", "cursor": shoes[0]})
+        self.assertEqual([item["id"] for item in response.json()], shoes[1:])
+        self.assertNotIn("X-Next-Cursor", response.headers)
+
+    async def test_a_limit_over_the_cap_is_clamped(self):
+        owner = self.add_user("owner")
+        for n in range(101):
+            self.add_item(owner.id, title=f"Item {n}")
+        async with self.client() as client:
+            response = await client.get("/api/v1/items/", params={"limit": 500})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 100)
+        self.assertIn("X-Next-Cursor", response.headers)
+
+class FacetsTest(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        owner = self.add_user("owner")
+        for category, condition in [("Clothes", "Good"), ("Clothes", "New"), ("Footwear", "Good"), ("Accessories", "Worn")]:
+            self.add_item(owner.id, category=category, condition=condition)
+
+    async def facets(self, **params) -> dict:
+        async with self.client() as client:
+            response = await client.get("/api/v1/items/facets", params=params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    async def test_unfiltered(self):
+        facets = await self.facets()
+        self.assertEqual(facets["category"], {"Clothes": 2, "Footwear": 1, "Accessories": 1})
+        self.assertEqual(facets["condition"], {"Good": 2, "New": 1, "Worn": 1})
+
+    async def test_a_facet_ignores_its_own_filter(self):
+        facets = await self.facets(category="Clothes")
+        # Every category stays selectable; conditions narrow to the clothes
+        self.assertEqual(facets["category"], {"Clothes": 2, "Footwear": 1, "Accessories": 1})
+        self.assertEqual(facets["condition"], {"Good": 1, "New": 1})
+
+    async def test_both_facets_filtered(self):
+        facets = await self.facets(category="Clothes", condition="Good")
+        self.assertEqual(facets["category"], {"Clothes": 1, "Footwear": 1})
+        self.assertEqual(facets["condition"], {"Good": 1, "New": 1})
+
+if __name__ == "__main__":
+    unittest.main()
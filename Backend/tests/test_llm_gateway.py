@@ -0,0 +1,51 @@
+"""
+python -m unittest discover -s tests (from Backend/)
+"""
+
+import asyncio
+import threading
+import unittest
+
+import uvicorn
+
+from app.services.llm_gateway import LLMGateway
+from perf.fakes import FakeLLM
+
+class FakeLLMServer:
+    """The fake LLM on a real socket, so the gateway's connection pool is exercised"""
+    def __init__(self, **options):
+        config = uvicorn.Config(FakeLLM(**options), host="127.0.0.1", port=0, log_level="warning", lifespan="off")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> str:
+        self.thread.start()
+        while not self.server.started:
+            threading.Event().wait(0.01)
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+class StreamTest(unittest.IsolatedAsyncioTestCase):
+    async def test_closing_a_stream_early_frees_its_connection(self):
+        with FakeLLMServer(latency=0, token_latency=0.01, tokens=20) as base_url:
+            gateway = LLMGateway(base_url, "sk-test", "fake", max_in_flight=2, request_timeout=3, max_retries=0)
+            try:
+                # More abandoned streams than the pool has connections
+                for _ in range(gateway.max_in_flight + 1):
+                    tokens = gateway.stream([{"role": "user", "content": "hi"}])
+                    self.assertTrue(await tokens.__anext__())
+                    await tokens.aclose()
+                async def read_all():
+                    return "".join([token async for token in gateway.stream([{"role": "user", "content": "hi"}])])
+
+                self.assertEqual(len((await asyncio.wait_for(read_all(), timeout=2)).split()), 20)
+                self.assertEqual(gateway.metrics.in_flight, 0)
+            finally:
+                await gateway.aclose()
+
+if __name__ == "__main__":
+    unittest.main()
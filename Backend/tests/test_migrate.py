@@ -0,0 +1,27 @@
+import os
+import unittest
+
+from sqlalchemy import inspect, text
+
+from app.db.migrate import migrate
+from app.db.session import engine
+
+class MigrateTest(unittest.TestCase):
+    def setUp(self):
+        engine.dispose()
+        if os.path.exists(engine.url.database):
+            os.remove(engine.url.database)
+
+    def test_swap_suggestions_keep_their_rows_when_renamed(self):
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE swapsuggestions (id INTEGER PRIMARY KEY, batch INTEGER NOT NULL, score FLOAT NOT NULL, created_at DATETIME)"))
+            conn.execute(text("INSERT INTO swapsuggestions (id, batch, score) VALUES (7, 1, 0.5)"))
+        migrate(engine)
+        migrate(engine)
+        tables = set(inspect(engine).get_table_names())
+        self.assertNotIn("swapsuggestions", tables)
+        with engine.connect() as conn:
+            self.assertEqual(conn.execute(text("SELECT id, batch, score FROM swap_suggestions")).all(), [(7, 1, 0.5)])
+
+if __name__ == "__main__":
+    unittest.main()
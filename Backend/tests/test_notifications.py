@@ -0,0 +1,42 @@
+import unittest
+
+from app.services.notifications import NotificationQueue
+
+class FlakyWriter:
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.written = []
+
+    def __call__(self, digests):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("database is down")
+        self.written.append({user_id: (digest.total, list(digest.item_ids)) for user_id, digest in digests.items()})
+
+class NotificationQueueTest(unittest.IsolatedAsyncioTestCase):
+    async def test_a_failed_batch_is_retried_with_later_matches(self):
+        writer = FlakyWriter(failures=1)
+        queue = NotificationQueue(writer, max_items=2, max_retries=3)
+        queue.push(1, 10)
+        with self.assertRaises(OSError):
+            await queue.flush()
+        queue.push(1, 11)
+        queue.push(1, 12)
+        queue.push(2, 20)
+        await queue.flush()
+        self.assertEqual(writer.written, [{1: (3, [10, 11]), 2: (1, [20])}])
+        self.assertEqual((queue.digests_written, queue.digests_failed), (2, 0))
+
+    async def test_a_batch_is_discarded_after_max_retries(self):
+        writer = FlakyWriter(failures=3)
+        queue = NotificationQueue(writer, max_retries=2)
+        queue.push(1, 10)
+        for _ in range(3):
+            with self.assertRaises(OSError):
+                await queue.flush()
+        await queue.flush()
+        self.assertEqual(writer.written, [])
+        self.assertEqual(queue.digests_failed, 1)
+
+if __name__ == "__main__":
+    unittest.main()
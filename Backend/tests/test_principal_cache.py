@@ -0,0 +1,43 @@
+import unittest
+
+from app.core.principal_cache import PrincipalCache
+from app.schemas.token import Principal
+
+def principal(username: str) -> Principal:
+    return Principal(id=1, username=username, is_admin=False, points_balance=0)
+
+class PrincipalCacheTest(unittest.TestCase):
+    def test_invalidate_drops_the_entry(self):
+        cache = PrincipalCache(max_entries=10)
+        cache.set("alice", cache.version("alice"), principal("alice"))
+        cache.invalidate("alice")
+        self.assertIsNone(cache.get("alice"))
+
+    def test_a_lookup_started_before_invalidation_is_not_cached(self):
+        cache = PrincipalCache(max_entries=10)
+        version = cache.version("alice")
+        cache.invalidate("alice")
+        cache.set("alice", version, principal("alice"))
+        self.assertIsNone(cache.get("alice"))
+
+    def test_versions_stay_bounded(self):
+        cache = PrincipalCache(max_entries=10)
+        for n in range(1000):
+            cache.invalidate(f"user{n}")
+        self.assertLessEqual(len(cache._versions), 10)
+
+    def test_forgotten_versions_are_never_reused(self):
+        cache = PrincipalCache(max_entries=4)
+        version = cache.version("alice")
+        cache.invalidate("alice")
+        # alice's version is forgotten while her lookup is still running
+        for n in range(10):
+            cache.invalidate(f"user{n}")
+        self.assertNotIn("alice", cache._versions)
+        cache.set("alice", version, principal("alice"))
+        self.assertIsNone(cache.get("alice"))
+        cache.set("alice", cache.version("alice"), principal("alice"))
+        self.assertIsNotNone(cache.get("alice"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from app.db.query_counter import assert_max_queries
+from app.models.swap import Swap, SwapOfferedItem
+from tests.support import DatabaseTestCase, auth_headers
+
+OWNERS = 30
+
+class ListQueryBudgetTest(DatabaseTestCase):
+    """
+    List pages must cost the same number of queries however many distinct
+    owners they show; a lazily loaded relationship would add one per row.
+    """
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.owners = [self.add_user(f"owner{n}") for n in range(OWNERS)]
+        self.items = [self.add_item(owner.id, title=f"Wool scarf {n}") for n, owner in enumerate(self.owners)]
+
+    async def test_item_list(self):
+        async with self.client() as client:
+            # Catalogue version, then the page with its owners joined in
+            with assert_max_queries(2):
+                response = await client.get("/api/v1/items/", params={"limit": 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({item["owner"]["id"] for item in response.json()}, {owner.id for owner in self.owners})
+
+    async def test_item_search(self):
+        async with self.client() as client:
+            # Catalogue version, ranked ids, then the items with their owners
+            with assert_max_queries(3):
+                response = await client.get("/api/v1/items/search", params={"q": "wool", "limit": 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), OWNERS)
+
+    async def test_swap_list(self):
+        requester = self.add_user("requester")
+        offered = [self.add_item(requester.id, title=f"Offered {n}") for n in range(OWNERS)]
+        for item, offer in zip(self.items, offered):
+            self.db.add(Swap(
+                requester_id=requester.id, owner_id=item.owner_id, item_id=item.id, points=0,
+                offered=[SwapOfferedItem(item_id=offer.id)],
+            ))
+        self.db.commit()
+        headers = auth_headers(requester)
+        async with self.client() as client:
+            # The swaps, then every offered item in one IN query
+            with assert_max_queries(2):
+                response = await client.get("/api/v1/swaps/", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), OWNERS)
+        self.assertTrue(all(len(swap["offered_item_ids"]) == 1 for swap in response.json()))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from app.db import search
+from tests.support import DatabaseTestCase
+
+class FullTextSearchTest(DatabaseTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        owner = self.add_user("owner")
+        self.in_description = self.add_item(owner.id, title="Winter coat", description="Lined with red wool").id
+        self.in_title = self.add_item(owner.id, title="Red wool jumper", description="Hand knitted").id
+        self.unrelated = self.add_item(owner.id, title="Leather boots", description="Barely worn").id
+
+    async def search(self, q: str) -> list:
+        async with self.client() as client:
+            response = await client.get("/api/v1/items/search", params={"q": q})
+        self.assertEqual(response.status_code, 200)
+        return [item["id"] for item in response.json()]
+
+    async def test_title_matches_rank_first(self):
+        self.assertEqual(await self.search("red wool"), [self.in_title, self.in_description])
+
+    async def test_last_term_matches_as_a_prefix(self):
+        self.assertEqual(await self.search("boo"), [self.unrelated])
+
+    async def test_text_without_terms_matches_nothing(self):
+        self.assertEqual(await self.search("!!"), [])
+
+    async def test_databases_without_fts_fall_back_to_substring_match(self):
+        # Any dialect other than SQLite and Postgres; the statement is plain SQL
+        statement = search.ranked_ids_statement("RED WOOL", "mssql", limit=10)
+        rows = self.db.execute(statement).all()
+        self.assertEqual([item_id for item_id, _ in rows], [self.in_description, self.in_title])
+        self.assertTrue(all(score == 0.0 for _, score in rows))
+
+    async def test_fallback_escapes_wildcards(self):
+        self.add_item(None, title="100 cotton tee")
+        statement = search.ranked_ids_statement("100%", "mssql")
+        self.assertEqual(self.db.execute(statement).all(), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,20 @@
+import unittest
+
+from sqlalchemy import func, select
+
+from app.models.swap import Swap
+from tests.support import DatabaseTestCase, auth_headers
+
+class OwnerlessItemTest(DatabaseTestCase):
+    async def test_swapping_for_an_item_without_an_owner_is_rejected(self):
+        requester = self.add_user("requester", points=100)
+        legacy = self.add_item(owner_id=None)
+        async with self.client() as client:
+            response = await client.post(
+                "/api/v1/swaps/", json={"item_id": legacy.id}, headers=auth_headers(requester)
+            )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.db.scalar(select(func.count()).select_from(Swap)), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -85,13 +85,11 @@ export default function ProductPage() {
 
   const fetchSimilarProducts = async () => {
     try {
-      const response = await fetch(`/api/proxy?url=${encodeURIComponent('http://localhost:8000/api/v1/items/')}`);
+      // Ranked on the server by category, size, condition and description
+      const response = await fetch(`/api/proxy?url=${encodeURIComponent(`http://localhost:8000/api/v1/items/${params.id}/similar?limit=4`)}`);
       if (response.ok) {
         const data = await response.json();
-        // Filter similar products (same category, different items)
         const similar = data
-          .filter((item: any) => item.id !== parseInt(params.id as string) && item.category === product?.category)
-          .slice(0, 4)
           .map((item: any) => ({
             ...item,
             image: `/${item.category.toLowerCase()}.png`,
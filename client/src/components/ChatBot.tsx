@@ -26,9 +26,11 @@ interface Message {
 
 interface ChatResponse {
   response: string;
+  audio_url?: string;
   audio_base64?: string;
   sentiment: string;
   user_message?: string;
+  session_id?: string;
 }
 
 export default function ChatBot() {
@@ -38,7 +40,8 @@ export default function ChatBot() {
   const [isLoading, setIsLoading] = useState(false);
   const [isRecording, setIsRecording] = useState(false);
   const [isAudioEnabled, setIsAudioEnabled] = useState(true);
-  const [conversationHistory, setConversationHistory] = useState<any[]>([]);
+  // The backend keeps the conversation; we only hold its session id
+  const [sessionId, setSessionId] = useState<string | null>(null);
   
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const mediaRecorderRef = useRef<MediaRecorder | null>(null);
@@ -63,15 +66,20 @@ export default function ChatBot() {
     setMessages(prev => [...prev, newMessage]);
   };
 
-  const playAudio = async (audioBase64: string) => {
+  const playAudio = async (data: ChatResponse) => {
     if (!isAudioEnabled) return;
     
     try {
-      const audioBlob = new Blob(
-        [Uint8Array.from(atob(audioBase64), c => c.charCodeAt(0))],
-        { type: 'audio/mp3' }
-      );
-      const audioUrl = URL.createObjectURL(audioBlob);
+      // Prefer the cacheable audio URL; fall back to inlined audio
+      let audioUrl = data.audio_url;
+      if (!audioUrl && data.audio_base64) {
+        const audioBlob = new Blob(
+          [Uint8Array.from(atob(data.audio_base64), c => c.charCodeAt(0))],
+          { type: 'audio/mp3' }
+        );
+        audioUrl = URL.createObjectURL(audioBlob);
+      }
+      if (!audioUrl) return;
       const audio = new Audio(audioUrl);
       await audio.play();
       return audioUrl;
@@ -97,7 +105,7 @@ export default function ChatBot() {
           method: 'POST',
           data: {
             message: text,
-            conversation_history: conversationHistory
+            session_id: sessionId ?? undefined
           }
         })
       });
@@ -105,18 +113,14 @@ export default function ChatBot() {
       if (response.ok) {
         const data: ChatResponse = await response.json();
         
-        // Update conversation history
-        const newHistory = [
-          ...conversationHistory,
-          { role: 'user', content: text },
-          { role: 'assistant', content: data.response }
-        ];
-        setConversationHistory(newHistory);
+        if (data.session_id) {
+          setSessionId(data.session_id);
+        }
 
         // Play audio if available
         let audioUrl;
-        if (data.audio_base64) {
-          audioUrl = await playAudio(data.audio_base64);
+        if (data.audio_url || data.audio_base64) {
+          audioUrl = await playAudio(data);
         }
 
         addMessage(data.response, 'bot', audioUrl);
@@ -168,6 +172,9 @@ export default function ChatBot() {
     try {
       const formData = new FormData();
       formData.append('audio_file', audioBlob, 'voice.wav');
+      if (sessionId) {
+        formData.append('session_id', sessionId);
+      }
 
       const response = await fetch('/api/proxy', {
         method: 'POST',
@@ -182,18 +189,14 @@ export default function ChatBot() {
       if (response.ok) {
         const data: ChatResponse = await response.json();
         
-        // Update conversation history
-        const newHistory = [
-          ...conversationHistory,
-          { role: 'user', content: data.user_message || 'Voice message' },
-          { role: 'assistant', content: data.response }
-        ];
-        setConversationHistory(newHistory);
+        if (data.session_id) {
+          setSessionId(data.session_id);
+        }
 
         // Play audio if available
         let audioUrl;
-        if (data.audio_base64) {
-          audioUrl = await playAudio(data.audio_base64);
+        if (data.audio_url || data.audio_base64) {
+          audioUrl = await playAudio(data);
         }
 
         addMessage(data.response, 'bot', audioUrl);
@@ -218,7 +221,7 @@ export default function ChatBot() {
 
   const clearChat = () => {
     setMessages([]);
-    setConversationHistory([]);
+    setSessionId(null);
   };
 
   return (